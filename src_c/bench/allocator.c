@@ -0,0 +1,154 @@
+#include <stdint.h>
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+#include <time.h>
+
+#include "hat/arena_allocator.h"
+#include "hat/ht.h"
+#include "hat/libc_allocator.h"
+#include "hat/pool_allocator.h"
+
+#define NODE_SIZE 48
+#define BLOCK_SIZE (64 * 1024)
+#define SLAB_ITEMS 1024
+
+
+static double get_time() {
+    struct timespec ts;
+    timespec_get(&ts, TIME_UTC);
+    return ts.tv_sec + ts.tv_nsec / 1e9;
+}
+
+
+static void print_result(char *name, char *action, size_t count, double dt) {
+    printf("%-6s %-12s count=%-8zu: %12.0f ops/s\n", name, action, count,
+           count / dt);
+}
+
+
+static void print_stats(char *name, hat_allocator_stats_t *stats) {
+    printf("%-6s stats: size=%zu peak_size=%zu reserved_size=%zu "
+           "alloc_count=%zu realloc_count=%zu free_count=%zu\n",
+           name, stats->size, stats->peak_size, stats->reserved_size,
+           stats->alloc_count, stats->realloc_count, stats->free_count);
+}
+
+
+static int bench_nodes(char *name, hat_allocator_t *a, size_t count,
+                       int free_nodes) {
+    void **nodes = malloc(count * sizeof(void *));
+    if (!nodes)
+        return -1;
+
+    double t0 = get_time();
+
+    for (size_t i = 0; i < count; ++i) {
+        nodes[i] = hat_allocator_alloc(a, NODE_SIZE);
+        if (!nodes[i]) {
+            free(nodes);
+            return -1;
+        }
+        memset(nodes[i], i & 0xff, NODE_SIZE);
+    }
+
+    double t1 = get_time();
+
+    for (size_t i = 0; i < count; ++i) {
+        if (((uint8_t *)nodes[i])[NODE_SIZE - 1] != (i & 0xff)) {
+            free(nodes);
+            return -1;
+        }
+        if (free_nodes)
+            hat_allocator_free(a, nodes[i]);
+    }
+
+    double t2 = get_time();
+
+    print_result(name, "node alloc", count, t1 - t0);
+    if (free_nodes)
+        print_result(name, "node free", count, t2 - t1);
+
+    free(nodes);
+    return 0;
+}
+
+
+static int bench_ht(char *name, hat_allocator_t *a, size_t count) {
+    double t0 = get_time();
+
+    hat_ht_t *t = hat_ht_create(a);
+    if (!t)
+        return -1;
+
+    uint8_t key[32] = {0};
+    for (size_t i = 0; i < count; ++i) {
+        memcpy(key, &i, sizeof(i));
+        if (hat_ht_set(t, key, sizeof(key), (void *)(i + 1))) {
+            hat_ht_destroy(t);
+            return -1;
+        }
+    }
+
+    hat_ht_destroy(t);
+
+    double t1 = get_time();
+
+    print_result(name, "ht insert", count, t1 - t0);
+    return 0;
+}
+
+
+int main(int argc, char **argv) {
+    size_t count = (argc > 1 ? strtoull(argv[1], NULL, 10) : 1000000);
+    hat_allocator_stats_t stats;
+
+    if (bench_nodes("libc", &hat_libc_allocator, count, 1) ||
+        bench_ht("libc", &hat_libc_allocator, count))
+        goto error;
+
+    hat_arena_allocator_t *arena =
+        hat_arena_allocator_create(&hat_libc_allocator, BLOCK_SIZE);
+    if (!arena)
+        goto error;
+
+    if (bench_nodes("arena", hat_arena_allocator_get_allocator(arena), count,
+                    0)) {
+        hat_arena_allocator_destroy(arena);
+        goto error;
+    }
+
+    hat_arena_allocator_reset(arena);
+
+    if (bench_ht("arena", hat_arena_allocator_get_allocator(arena), count)) {
+        hat_arena_allocator_destroy(arena);
+        goto error;
+    }
+
+    hat_arena_allocator_get_stats(arena, &stats);
+    print_stats("arena", &stats);
+    hat_arena_allocator_destroy(arena);
+
+    hat_pool_allocator_t *pool =
+        hat_pool_allocator_create(&hat_libc_allocator, NODE_SIZE, SLAB_ITEMS);
+    if (!pool)
+        goto error;
+
+    if (bench_nodes("pool", hat_pool_allocator_get_allocator(pool), count,
+                    1) ||
+        bench_nodes("pool", hat_pool_allocator_get_allocator(pool), count,
+                    1)) {
+        hat_pool_allocator_destroy(pool);
+        goto error;
+    }
+
+    hat_pool_allocator_get_stats(pool, &stats);
+    print_stats("pool", &stats);
+    hat_pool_allocator_destroy(pool);
+
+    return EXIT_SUCCESS;
+
+error:
+    fprintf(stderr, "benchmark failed\n");
+    return EXIT_FAILURE;
+}
@@ -0,0 +1,119 @@
+#include <stdint.h>
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+#include <time.h>
+
+#include "hat/ht.h"
+#include "hat/libc_allocator.h"
+
+
+typedef struct {
+    size_t count;
+    size_t key_size;
+    int reserve;
+} params_t;
+
+
+static double get_time() {
+    struct timespec ts;
+    timespec_get(&ts, TIME_UTC);
+    return ts.tv_sec + ts.tv_nsec / 1e9;
+}
+
+
+static void get_key(uint8_t *key, size_t key_size, size_t i) {
+    // keys are pseudo-random (splitmix64) so that access patterns don't
+    // depend on insertion order
+    uint64_t x = i * 0x9e3779b97f4a7c15ULL;
+    x = (x ^ (x >> 30)) * 0xbf58476d1ce4e5b9ULL;
+    x = (x ^ (x >> 27)) * 0x94d049bb133111ebULL;
+    x ^= x >> 31;
+
+    memset(key, 'x', key_size);
+    memcpy(key, &x, (key_size < sizeof(x) ? key_size : sizeof(x)));
+}
+
+
+static void print_result(params_t *params, char *action, double dt) {
+    printf("%-8s count=%-8zu key_size=%-4zu reserve=%d: %12.0f ops/s\n",
+           action, params->count, params->key_size, params->reserve,
+           params->count / dt);
+}
+
+
+static int bench(params_t *params) {
+    int result = EXIT_FAILURE;
+    uint8_t *key = NULL;
+    hat_ht_t *t = hat_ht_create(&hat_libc_allocator);
+    if (!t)
+        goto cleanup;
+
+    key = malloc(params->key_size);
+    if (!key)
+        goto cleanup;
+
+    double t0 = get_time();
+
+    if (params->reserve && hat_ht_reserve(t, params->count))
+        goto cleanup;
+
+    for (size_t i = 0; i < params->count; ++i) {
+        get_key(key, params->key_size, i);
+        if (hat_ht_set(t, key, params->key_size, (void *)(i + 1)))
+            goto cleanup;
+    }
+
+    double t1 = get_time();
+
+    for (size_t i = 0; i < params->count; ++i) {
+        get_key(key, params->key_size, i);
+        if (hat_ht_get(t, key, params->key_size) != (void *)(i + 1))
+            goto cleanup;
+    }
+
+    double t2 = get_time();
+
+    for (size_t i = 0; i < params->count; ++i) {
+        get_key(key, params->key_size, i);
+        if (hat_ht_del(t, key, params->key_size))
+            goto cleanup;
+    }
+
+    double t3 = get_time();
+
+    if (hat_ht_count(t))
+        goto cleanup;
+
+    print_result(params, "insert", t1 - t0);
+    print_result(params, "lookup", t2 - t1);
+    print_result(params, "delete", t3 - t2);
+
+    result = EXIT_SUCCESS;
+
+cleanup:
+    if (result != EXIT_SUCCESS)
+        fprintf(stderr, "benchmark failed\n");
+
+    free(key);
+    if (t)
+        hat_ht_destroy(t);
+    return result;
+}
+
+
+int main(int argc, char **argv) {
+    size_t count = (argc > 1 ? strtoull(argv[1], NULL, 10) : 1000000);
+    size_t key_sizes[] = {8, 16, 32};
+
+    for (size_t i = 0; i < sizeof(key_sizes) / sizeof(key_sizes[0]); ++i) {
+        for (int reserve = 0; reserve < 2; ++reserve) {
+            params_t params = {
+                .count = count, .key_size = key_sizes[i], .reserve = reserve};
+            if (bench(&params))
+                return EXIT_FAILURE;
+        }
+    }
+
+    return EXIT_SUCCESS;
+}
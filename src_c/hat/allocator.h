@@ -13,6 +13,26 @@ extern "C" {
 
 typedef struct hat_allocator_t hat_allocator_t;
 
+/*! \brief Allocator statistics
+
+    Statistics are provided by allocators which keep track of their
+    memory usage (e.g. arena and pool allocators).
+ */
+typedef struct {
+    /** \brief currently allocated memory size */
+    size_t size;
+    /** \brief maximum allocated memory size */
+    size_t peak_size;
+    /** \brief memory size obtained from underlying allocator */
+    size_t reserved_size;
+    /** \brief number of successful allocations of new memory blocks */
+    size_t alloc_count;
+    /** \brief number of successful reallocations of existing blocks */
+    size_t realloc_count;
+    /** \brief number of freed memory blocks */
+    size_t free_count;
+} hat_allocator_stats_t;
+
 /*! \brief Custom allocator implementation function
     \param[in] a allocator instance
     \param[in] size new memory block size
@@ -0,0 +1,262 @@
+#include "arena_allocator.h"
+#include <stdint.h>
+#include <string.h>
+
+#define ALIGN_SIZE(size)                                                      \
+    (((size) + _Alignof(max_align_t) - 1) & ~(_Alignof(max_align_t) - 1))
+
+
+typedef struct block_t {
+    struct block_t *next;
+    struct block_t *prev;
+    size_t size;
+    size_t pos;
+} block_t;
+
+typedef union {
+    struct {
+        size_t size;
+        size_t dedicated;
+    };
+    max_align_t align;
+} header_t;
+
+struct hat_arena_allocator_t {
+    hat_allocator_t a;
+    hat_allocator_t *parent;
+    size_t block_size;
+    block_t *blocks;
+    hat_allocator_stats_t stats;
+};
+
+#define BLOCK_HEADER_SIZE ALIGN_SIZE(sizeof(block_t))
+
+
+static inline uint8_t *get_block_data(block_t *block) {
+    return (uint8_t *)block + BLOCK_HEADER_SIZE;
+}
+
+
+static inline header_t *get_header(void *ptr) { return (header_t *)ptr - 1; }
+
+
+static int is_last(hat_arena_allocator_t *arena, void *ptr) {
+    block_t *block = arena->blocks;
+    if (!block)
+        return 0;
+
+    header_t *header = get_header(ptr);
+    return (uint8_t *)ptr + ALIGN_SIZE(header->size) ==
+           get_block_data(block) + block->pos;
+}
+
+
+static void free_block(hat_arena_allocator_t *arena, block_t *block) {
+    arena->stats.reserved_size -= block->size;
+    hat_allocator_free(arena->parent, block);
+}
+
+
+static void free_dedicated(hat_arena_allocator_t *arena, void *ptr) {
+    block_t *block =
+        (block_t *)((uint8_t *)get_header(ptr) - BLOCK_HEADER_SIZE);
+
+    if (block->prev) {
+        block->prev->next = block->next;
+    } else {
+        arena->blocks = block->next;
+    }
+
+    if (block->next)
+        block->next->prev = block->prev;
+
+    free_block(arena, block);
+}
+
+
+static void *alloc(hat_arena_allocator_t *arena, size_t size) {
+    if (size > SIZE_MAX - sizeof(header_t) - BLOCK_HEADER_SIZE -
+                   _Alignof(max_align_t))
+        return NULL;
+
+    size_t n = sizeof(header_t) + ALIGN_SIZE(size);
+    block_t *block = arena->blocks;
+    int dedicated = 0;
+
+    if (!block || block->size - BLOCK_HEADER_SIZE - block->pos < n) {
+        size_t block_size = BLOCK_HEADER_SIZE + n;
+        dedicated = n > arena->block_size / 4;
+        if (!dedicated && block_size < arena->block_size)
+            block_size = arena->block_size;
+
+        block_t *new_block = hat_allocator_alloc(arena->parent, block_size);
+        if (!new_block)
+            return NULL;
+
+        new_block->size = block_size;
+        new_block->pos = 0;
+        arena->stats.reserved_size += block_size;
+
+        // dedicated blocks are kept behind current block which can be
+        // used for following allocations
+        if (dedicated && block) {
+            new_block->prev = block;
+            new_block->next = block->next;
+            block->next = new_block;
+
+        } else {
+            new_block->prev = NULL;
+            new_block->next = block;
+            arena->blocks = new_block;
+        }
+
+        if (new_block->next)
+            new_block->next->prev = new_block;
+
+        block = new_block;
+    }
+
+    header_t *header = (header_t *)(get_block_data(block) + block->pos);
+    header->size = size;
+    header->dedicated = dedicated;
+    block->pos += n;
+
+    arena->stats.size += size;
+    if (arena->stats.size > arena->stats.peak_size)
+        arena->stats.peak_size = arena->stats.size;
+
+    return header + 1;
+}
+
+
+static void free_last(hat_arena_allocator_t *arena, void *ptr) {
+    block_t *block = arena->blocks;
+    header_t *header = get_header(ptr);
+    block->pos -= sizeof(header_t) + ALIGN_SIZE(header->size);
+}
+
+
+static void *arena_realloc(hat_allocator_t *a, size_t size, void *old) {
+    hat_arena_allocator_t *arena = (hat_arena_allocator_t *)a;
+
+    if (!old) {
+        if (!size)
+            return NULL;
+
+        void *ptr = alloc(arena, size);
+        if (ptr)
+            arena->stats.alloc_count += 1;
+        return ptr;
+    }
+
+    header_t *header = get_header(old);
+    size_t old_size = header->size;
+
+    if (!size) {
+        if (header->dedicated) {
+            free_dedicated(arena, old);
+        } else if (is_last(arena, old)) {
+            free_last(arena, old);
+        }
+
+        arena->stats.size -= old_size;
+        arena->stats.free_count += 1;
+        return NULL;
+    }
+
+    if (ALIGN_SIZE(size) <= ALIGN_SIZE(old_size) || is_last(arena, old)) {
+        block_t *block = arena->blocks;
+        size_t available = ALIGN_SIZE(old_size);
+        if (is_last(arena, old))
+            available += block->size - BLOCK_HEADER_SIZE - block->pos;
+
+        if (ALIGN_SIZE(size) <= available) {
+            if (is_last(arena, old))
+                block->pos += ALIGN_SIZE(size) - ALIGN_SIZE(old_size);
+
+            header->size = size;
+            arena->stats.size += size - old_size;
+            if (arena->stats.size > arena->stats.peak_size)
+                arena->stats.peak_size = arena->stats.size;
+
+            arena->stats.realloc_count += 1;
+            return old;
+        }
+    }
+
+    void *ptr = alloc(arena, size);
+    if (!ptr)
+        return NULL;
+
+    memcpy(ptr, old, (old_size < size ? old_size : size));
+    if (header->dedicated)
+        free_dedicated(arena, old);
+
+    arena->stats.size -= old_size;
+    arena->stats.realloc_count += 1;
+    return ptr;
+}
+
+
+hat_arena_allocator_t *hat_arena_allocator_create(hat_allocator_t *a,
+                                                  size_t block_size) {
+    hat_arena_allocator_t *arena =
+        hat_allocator_alloc(a, sizeof(hat_arena_allocator_t));
+    if (!arena)
+        return NULL;
+
+    arena->a.realloc = arena_realloc;
+    arena->parent = a;
+    arena->block_size = block_size;
+    arena->blocks = NULL;
+    memset(&arena->stats, 0, sizeof(arena->stats));
+    return arena;
+}
+
+
+void hat_arena_allocator_destroy(hat_arena_allocator_t *arena) {
+    while (arena->blocks) {
+        block_t *block = arena->blocks;
+        arena->blocks = block->next;
+        free_block(arena, block);
+    }
+
+    hat_allocator_free(arena->parent, arena);
+}
+
+
+hat_allocator_t *
+hat_arena_allocator_get_allocator(hat_arena_allocator_t *arena) {
+    return &arena->a;
+}
+
+
+void hat_arena_allocator_reset(hat_arena_allocator_t *arena) {
+    block_t *keep = NULL;
+
+    while (arena->blocks) {
+        block_t *block = arena->blocks;
+        arena->blocks = block->next;
+
+        if (!keep && block->size == arena->block_size) {
+            keep = block;
+        } else {
+            free_block(arena, block);
+        }
+    }
+
+    if (keep) {
+        keep->next = NULL;
+        keep->prev = NULL;
+        keep->pos = 0;
+    }
+
+    arena->blocks = keep;
+    arena->stats.size = 0;
+}
+
+
+void hat_arena_allocator_get_stats(hat_arena_allocator_t *arena,
+                                   hat_allocator_stats_t *stats) {
+    *stats = arena->stats;
+}
@@ -0,0 +1,73 @@
+#ifndef HAT_ARENA_ALLOCATOR_H
+#define HAT_ARENA_ALLOCATOR_H
+
+/*! \file
+    \brief Arena memory allocator
+
+    Arena allocator obtains large memory blocks from underlying allocator
+    and serves allocations by advancing position inside current block.
+    Freeing of individual allocations doesn't return memory to underlying
+    allocator - all memory is released at once with
+    `hat_arena_allocator_reset` or `hat_arena_allocator_destroy`. Only
+    exceptions are most recent allocation, which can be freed or resized
+    in place, and large allocations served with dedicated memory blocks,
+    which are returned to underlying allocator once freed.
+
+    Arena allocator is intended for short-lived structures (e.g. parsers or
+    temporary hash tables) which would otherwise require large number of
+    small allocations.
+ */
+
+#include <stddef.h>
+#include "allocator.h"
+
+#ifdef __cplusplus
+extern "C" {
+#endif
+
+/*! \brief Arena allocator */
+typedef struct hat_arena_allocator_t hat_arena_allocator_t;
+
+
+/*! \brief Create new arena allocator
+    \param[in] a underlying allocator
+    \param[in] block_size size of memory blocks obtained from `a`
+    \return arena or ``NULL`` on failure
+
+    Allocations larger than quarter of `block_size` are served with
+    dedicated memory blocks.
+ */
+hat_arena_allocator_t *hat_arena_allocator_create(hat_allocator_t *a,
+                                                  size_t block_size);
+
+/*! \brief Destroy arena allocator and free all allocated memory
+    \param[in] arena arena
+ */
+void hat_arena_allocator_destroy(hat_arena_allocator_t *arena);
+
+/*! \brief Get allocator interface
+    \param[in] arena arena
+    \return allocator
+ */
+hat_allocator_t *hat_arena_allocator_get_allocator(hat_arena_allocator_t *arena);
+
+/*! \brief Free all allocated memory
+    \param[in] arena arena
+
+    All memory previously allocated with arena becomes invalid. Single
+    memory block is kept for reuse by following allocations.
+ */
+void hat_arena_allocator_reset(hat_arena_allocator_t *arena);
+
+/*! \brief Get allocator statistics
+    \param[in] arena arena
+    \param[out] stats statistics
+ */
+void hat_arena_allocator_get_stats(hat_arena_allocator_t *arena,
+                                   hat_allocator_stats_t *stats);
+
+#ifdef __cplusplus
+}
+#endif
+
+#endif
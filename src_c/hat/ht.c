@@ -3,102 +3,199 @@
 #include <stdint.h>
 #include <string.h>
 
+#define INLINE_KEY_SIZE 16
+#define MIN_CAP 8
 
-typedef struct element_t {
-    struct element_t *next;
-    size_t hash;
-    size_t key_size;
+
+typedef struct {
+    uint32_t hash;
+    uint32_t key_size;
     void *value;
-    uint8_t key[];
-} element_t;
+    union {
+        uint8_t data[INLINE_KEY_SIZE];
+        uint8_t *ptr;
+    } key;
+} entry_t;
 
 struct hat_ht_t {
     hat_allocator_t *a;
+    hat_ht_hash_t hash;
     size_t count;
     size_t cap;
-    element_t **slots;
+    entry_t *entries;
 };
 
 
-static size_t hash_function(uint8_t *key, size_t key_size) {
-    size_t fnv_prime = (sizeof(size_t) > 4 ? 1099511628211ULL : 16777619UL);
-    size_t hash = (sizeof(size_t) > 4 ? 14695981039346656037ULL : 2166136261UL);
+static inline uint64_t rotl(uint64_t x, int r) {
+    return (x << r) | (x >> (64 - r));
+}
+
+
+static inline uint64_t mix(uint64_t x) {
+    x ^= x >> 33;
+    x *= 0xff51afd7ed558ccdULL;
+    x ^= x >> 33;
+    x *= 0xc4ceb9fe1a85ec53ULL;
+    x ^= x >> 33;
+    return x;
+}
+
+
+static inline uint64_t read_word(const uint8_t *p) {
+    uint64_t w;
+    memcpy(&w, p, sizeof(w));
+    return w;
+}
+
+
+size_t hat_ht_hash(const void *key, size_t key_size) {
+    const uint8_t *p = key;
+    uint64_t h = 0x9e3779b97f4a7c15ULL ^ key_size;
+
+    for (; key_size >= 8; key_size -= 8, p += 8) {
+        h ^= rotl(read_word(p) * 0x87c37b91114253d5ULL, 31) *
+             0x4cf5ad432745937fULL;
+        h = rotl(h, 27) * 5 + 0x52dce729;
+    }
 
-    for (size_t i = 0; i < key_size; ++i) {
-        hash ^= key[i];
-        hash *= fnv_prime;
+    if (key_size) {
+        uint64_t w = 0;
+        memcpy(&w, p, key_size);
+        h ^= rotl(w * 0x87c37b91114253d5ULL, 31) * 0x4cf5ad432745937fULL;
     }
 
-    return hash;
+    return mix(h);
 }
 
 
-static int resize(hat_ht_t *t) {
-    if (t->count * 2 < 8)
-        return HAT_HT_SUCCESS;
+static inline uint32_t get_hash(hat_ht_t *t, void *key, size_t key_size) {
+    uint64_t h = t->hash(key, key_size);
+    uint32_t hash = h ^ (h >> 32);
+    return hash ? hash : 1;
+}
 
-    size_t avg_count = (t->cap - 1) * 8 / 10;
-    if (t->count < avg_count && t->count > avg_count / 4)
-        return HAT_HT_SUCCESS;
 
-    size_t new_cap = t->count * 2 * 10 / 8 + 1;
+static inline uint8_t *get_key(entry_t *e) {
+    return (e->key_size > INLINE_KEY_SIZE ? e->key.ptr : e->key.data);
+}
+
+
+static inline size_t get_max_count(size_t cap) { return cap - cap / 5; }
+
+
+static entry_t *find(hat_ht_t *t, uint32_t hash, void *key,
+                     size_t key_size) {
+    if (!t->cap)
+        return NULL;
+
+    size_t mask = t->cap - 1;
+
+    for (size_t i = hash & mask;; i = (i + 1) & mask) {
+        entry_t *e = t->entries + i;
 
-    element_t **new_slots =
-        hat_allocator_alloc(t->a, new_cap * sizeof(element_t *));
-    if (!new_slots)
+        if (!e->hash)
+            return NULL;
+
+        if (e->hash == hash && e->key_size == key_size &&
+            memcmp(get_key(e), key, key_size) == 0)
+            return e;
+    }
+}
+
+
+static entry_t *find_empty(entry_t *entries, size_t cap, uint32_t hash) {
+    size_t mask = cap - 1;
+    size_t i = hash & mask;
+
+    while (entries[i].hash)
+        i = (i + 1) & mask;
+
+    return entries + i;
+}
+
+
+static int rehash(hat_ht_t *t, size_t new_cap) {
+    entry_t *new_entries =
+        hat_allocator_alloc(t->a, new_cap * sizeof(entry_t));
+    if (!new_entries)
         return HAT_HT_ERROR;
 
-    memset(new_slots, 0, new_cap * sizeof(element_t *));
+    memset(new_entries, 0, new_cap * sizeof(entry_t));
 
     for (size_t i = 0; i < t->cap; ++i) {
-        element_t *el = t->slots[i];
-        while (el) {
-            element_t *next = el->next;
-            el->next = new_slots[el->hash % new_cap];
-            new_slots[el->hash % new_cap] = el;
-            el = next;
-        }
+        entry_t *e = t->entries + i;
+        if (e->hash)
+            *find_empty(new_entries, new_cap, e->hash) = *e;
     }
 
-    hat_allocator_free(t->a, t->slots);
+    if (t->entries)
+        hat_allocator_free(t->a, t->entries);
 
     t->cap = new_cap;
-    t->slots = new_slots;
+    t->entries = new_entries;
     return HAT_HT_SUCCESS;
 }
 
 
+static void remove_entry(hat_ht_t *t, entry_t *e) {
+    if (e->key_size > INLINE_KEY_SIZE)
+        hat_allocator_free(t->a, e->key.ptr);
+
+    // backward shift deletion - no tombstones are needed
+    size_t mask = t->cap - 1;
+    size_t i = e - t->entries;
+    size_t j = i;
+
+    for (;;) {
+        j = (j + 1) & mask;
+        entry_t *next = t->entries + j;
+        if (!next->hash)
+            break;
+
+        size_t k = next->hash & mask;
+        if ((j > i && (k <= i || k > j)) || (j < i && k <= i && k > j)) {
+            t->entries[i] = *next;
+            i = j;
+        }
+    }
+
+    t->entries[i].hash = 0;
+    t->count -= 1;
+
+    // shrinking is optional - on allocation failure, table stays valid
+    if (t->cap > MIN_CAP && t->count < t->cap / 8)
+        rehash(t, t->cap / 2);
+}
+
+
 hat_ht_t *hat_ht_create(hat_allocator_t *a) {
+    return hat_ht_create_with_hash(a, NULL);
+}
+
+
+hat_ht_t *hat_ht_create_with_hash(hat_allocator_t *a, hat_ht_hash_t hash) {
     hat_ht_t *t = hat_allocator_alloc(a, sizeof(hat_ht_t));
     if (!t)
         return NULL;
 
     t->a = a;
+    t->hash = (hash ? hash : hat_ht_hash);
     t->count = 0;
-    t->cap = 8 * 10 / 8 + 1;
-
-    t->slots = hat_allocator_alloc(a, t->cap * sizeof(element_t *));
-    if (!t->slots) {
-        hat_allocator_free(a, t);
-        return NULL;
-    }
-
-    memset(t->slots, 0, t->cap * sizeof(element_t *));
+    t->cap = 0;
+    t->entries = NULL;
     return t;
 }
 
 
 void hat_ht_destroy(hat_ht_t *t) {
     for (size_t i = 0; i < t->cap; ++i) {
-        element_t *el = t->slots[i];
-        while (el) {
-            element_t *next = el->next;
-            hat_allocator_free(t->a, el);
-            el = next;
-        }
+        entry_t *e = t->entries + i;
+        if (e->hash && e->key_size > INLINE_KEY_SIZE)
+            hat_allocator_free(t->a, e->key.ptr);
     }
 
-    hat_allocator_free(t->a, t->slots);
+    if (t->entries)
+        hat_allocator_free(t->a, t->entries);
     hat_allocator_free(t->a, t);
 }
 
@@ -106,131 +203,123 @@ void hat_ht_destroy(hat_ht_t *t) {
 size_t hat_ht_count(hat_ht_t *t) { return t->count; }
 
 
-int hat_ht_set(hat_ht_t *t, void *key, size_t key_size, void *value) {
-    size_t hash = hash_function(key, key_size);
-    element_t *el = NULL;
-    element_t **slot = t->slots + (hash % t->cap);
-
-    while (*slot) {
-        if ((*slot)->hash == hash && (*slot)->key_size == key_size &&
-            memcmp((*slot)->key, key, key_size) == 0) {
-            el = *slot;
-            break;
-        }
-        slot = &((*slot)->next);
+int hat_ht_reserve(hat_ht_t *t, size_t count) {
+    size_t cap = (t->cap ? t->cap : MIN_CAP);
+
+    while (get_max_count(cap) < count) {
+        if (cap > SIZE_MAX / 2 / sizeof(entry_t))
+            return HAT_HT_ERROR;
+        cap *= 2;
     }
 
-    if (el) {
-        el->value = value;
+    if (cap == t->cap)
+        return HAT_HT_SUCCESS;
+
+    return rehash(t, cap);
+}
+
+
+int hat_ht_set(hat_ht_t *t, void *key, size_t key_size, void *value) {
+    if (key_size > UINT32_MAX)
+        return HAT_HT_ERROR;
+
+    uint32_t hash = get_hash(t, key, key_size);
+    entry_t *e = find(t, hash, key, key_size);
+
+    if (e) {
+        e->value = value;
         return HAT_HT_SUCCESS;
     }
 
-    el = hat_allocator_alloc(t->a, sizeof(element_t) + key_size);
-    if (!el)
+    if (hat_ht_reserve(t, t->count + 1))
         return HAT_HT_ERROR;
 
-    el->next = NULL;
-    el->hash = hash;
-    el->key_size = key_size;
-    el->value = value;
-    memcpy(el->key, key, key_size);
+    uint8_t *key_ptr = NULL;
+    if (key_size > INLINE_KEY_SIZE) {
+        key_ptr = hat_allocator_alloc(t->a, key_size);
+        if (!key_ptr)
+            return HAT_HT_ERROR;
+        memcpy(key_ptr, key, key_size);
+    }
 
-    *slot = el;
-    t->count += 1;
+    e = find_empty(t->entries, t->cap, hash);
+    e->hash = hash;
+    e->key_size = key_size;
+    e->value = value;
 
-    resize(t); // TODO check resize error
+    if (key_ptr) {
+        e->key.ptr = key_ptr;
+    } else if (key_size) {
+        memcpy(e->key.data, key, key_size);
+    }
 
+    t->count += 1;
     return HAT_HT_SUCCESS;
 }
 
 
 void *hat_ht_get(hat_ht_t *t, void *key, size_t key_size) {
-    size_t hash = hash_function(key, key_size);
-    element_t *el = t->slots[hash % t->cap];
-
-    while (el) {
-        if (el->hash == hash && el->key_size == key_size &&
-            memcmp(el->key, key, key_size) == 0) {
-            return el->value;
-        }
-        el = el->next;
-    }
+    if (key_size > UINT32_MAX)
+        return NULL;
 
-    return NULL;
+    entry_t *e = find(t, get_hash(t, key, key_size), key, key_size);
+    return (e ? e->value : NULL);
 }
 
 
 void *hat_ht_pop(hat_ht_t *t, void *key, size_t key_size) {
-    size_t hash = hash_function(key, key_size);
-    element_t **slot = t->slots + (hash % t->cap);
-
-    while (*slot) {
-        if ((*slot)->hash == hash && (*slot)->key_size == key_size &&
-            memcmp((*slot)->key, key, key_size) == 0) {
-            element_t *el = *slot;
-            void *value = el->value;
-            *slot = el->next;
-            hat_allocator_free(t->a, el);
-            t->count -= 1;
-            resize(t); // TODO check resize error
-            return value;
-        }
-        slot = &((*slot)->next);
-    }
+    if (key_size > UINT32_MAX)
+        return NULL;
 
-    return NULL;
+    entry_t *e = find(t, get_hash(t, key, key_size), key, key_size);
+    if (!e)
+        return NULL;
+
+    void *value = e->value;
+    remove_entry(t, e);
+    return value;
 }
 
 
 int hat_ht_del(hat_ht_t *t, void *key, size_t key_size) {
-    size_t hash = hash_function(key, key_size);
-    element_t **slot = t->slots + (hash % t->cap);
-
-    while (*slot) {
-        if ((*slot)->hash == hash && (*slot)->key_size == key_size &&
-            memcmp((*slot)->key, key, key_size) == 0) {
-            element_t *el = *slot;
-            *slot = el->next;
-            hat_allocator_free(t->a, el);
-            t->count -= 1;
-            resize(t); // TODO check resize error
-            return HAT_HT_SUCCESS;
-        }
-        slot = &((*slot)->next);
-    }
+    if (key_size > UINT32_MAX)
+        return HAT_HT_ERROR;
 
-    return HAT_HT_ERROR;
+    entry_t *e = find(t, get_hash(t, key, key_size), key, key_size);
+    if (!e)
+        return HAT_HT_ERROR;
+
+    remove_entry(t, e);
+    return HAT_HT_SUCCESS;
 }
 
 
 hat_ht_iter_t hat_ht_iter_next(hat_ht_t *t, hat_ht_iter_t prev) {
-    element_t *el = prev;
+    if (!t->cap)
+        return NULL;
 
-    if (el && el->next)
-        return el->next;
+    entry_t *e = (prev ? (entry_t *)prev + 1 : t->entries);
+    entry_t *end = t->entries + t->cap;
 
-    for (size_t i = (el ? (el->hash % t->cap) + 1 : 0); i < t->cap; ++i) {
-        if (t->slots[i])
-            return t->slots[i];
+    for (; e < end; ++e) {
+        if (e->hash)
+            return e;
     }
 
     return NULL;
 }
 
 
-void *hat_ht_iter_key(hat_ht_iter_t i) {
-    element_t *el = i;
-    return el->key;
-}
+void *hat_ht_iter_key(hat_ht_iter_t i) { return get_key(i); }
 
 
 size_t hat_ht_iter_key_size(hat_ht_iter_t i) {
-    element_t *el = i;
-    return el->key_size;
+    entry_t *e = i;
+    return e->key_size;
 }
 
 
 void *hat_ht_iter_value(hat_ht_iter_t i) {
-    element_t *el = i;
-    return el->value;
+    entry_t *e = i;
+    return e->value;
 }
@@ -6,6 +6,12 @@
 
     This hash table implementation stores copies of key data and value
     pointers.
+
+    Elements are stored in single array of power-of-two capacity (open
+    addressing with linear probing). Keys of up to 16 bytes are stored
+    inline in array elements - larger keys are copied into separately
+    allocated memory. Any modification of table (except setting value of
+    existing key) invalidates existing iterators.
  */
 
 #include <stddef.h>
@@ -25,6 +31,23 @@ typedef struct hat_ht_t hat_ht_t;
 /*! \brief Hash table iterator */
 typedef void *hat_ht_iter_t;
 
+/*! \brief Hash function
+    \param[in] key key
+    \param[in] key_size key size
+    \return hash
+ */
+typedef size_t (*hat_ht_hash_t)(const void *key, size_t key_size);
+
+
+/*! \brief Default hash function
+    \param[in] key key
+    \param[in] key_size key size
+    \return hash
+
+    Key data is processed one word (8 bytes) at a time.
+ */
+size_t hat_ht_hash(const void *key, size_t key_size);
+
 
 /*! \brief Create new hash table
     \param[in] a allocator
@@ -32,6 +55,13 @@ typedef void *hat_ht_iter_t;
  */
 hat_ht_t *hat_ht_create(hat_allocator_t *a);
 
+/*! \brief Create new hash table with custom hash function
+    \param[in] a allocator
+    \param[in] hash hash function (``NULL`` for `hat_ht_hash`)
+    \return table or ``NULL`` on failure
+ */
+hat_ht_t *hat_ht_create_with_hash(hat_allocator_t *a, hat_ht_hash_t hash);
+
 /*! \brief Destroy hash table
     \param[in] t table
  */
@@ -43,6 +73,16 @@ void hat_ht_destroy(hat_ht_t *t);
  */
 size_t hat_ht_count(hat_ht_t *t);
 
+/*! \brief Reserve capacity for elements
+    \param[in] t table
+    \param[in] count elements count
+    \return ``HAT_HT_SUCCESS`` or ``HAT_HT_ERROR``
+
+    After successful reservation, adding elements until table contains
+    `count` elements doesn't require resizing.
+ */
+int hat_ht_reserve(hat_ht_t *t, size_t count);
+
 /*! \brief Set element in table
     \param[in] t table
     \param[in] key key
@@ -50,7 +90,9 @@ size_t hat_ht_count(hat_ht_t *t);
     \param[in] value value
     \return ``HAT_HT_SUCCESS`` or ``HAT_HT_ERROR``
 
-    If key already exist, value is overridden.
+    If key already exist, value is overridden. If table could not be
+    resized (or key could not be copied), ``HAT_HT_ERROR`` is returned and
+    table is not changed.
  */
 int hat_ht_set(hat_ht_t *t, void *key, size_t key_size, void *value);
 
@@ -67,6 +109,9 @@ void *hat_ht_get(hat_ht_t *t, void *key, size_t key_size);
     \param[in] key key
     \param[in] key_size key size
     \return value or ``NULL`` on failure
+
+    Removal of elements never fails because of memory allocation - if table
+    could not be shrunk, its capacity is left unchanged.
  */
 void *hat_ht_pop(hat_ht_t *t, void *key, size_t key_size);
 
@@ -0,0 +1,136 @@
+#include "pool_allocator.h"
+#include <stdint.h>
+#include <string.h>
+
+#define ALIGN_SIZE(size)                                                      \
+    (((size) + _Alignof(max_align_t) - 1) & ~(_Alignof(max_align_t) - 1))
+
+
+typedef struct slab_t {
+    struct slab_t *next;
+} slab_t;
+
+typedef struct item_t {
+    struct item_t *next;
+} item_t;
+
+struct hat_pool_allocator_t {
+    hat_allocator_t a;
+    hat_allocator_t *parent;
+    size_t item_size;
+    size_t slab_items;
+    slab_t *slabs;
+    item_t *free_items;
+    hat_allocator_stats_t stats;
+};
+
+#define SLAB_HEADER_SIZE ALIGN_SIZE(sizeof(slab_t))
+
+
+static int add_slab(hat_pool_allocator_t *pool) {
+    size_t slab_size = SLAB_HEADER_SIZE + pool->item_size * pool->slab_items;
+
+    slab_t *slab = hat_allocator_alloc(pool->parent, slab_size);
+    if (!slab)
+        return -1;
+
+    slab->next = pool->slabs;
+    pool->slabs = slab;
+    pool->stats.reserved_size += slab_size;
+
+    uint8_t *data = (uint8_t *)slab + SLAB_HEADER_SIZE;
+    for (size_t i = pool->slab_items; i > 0; --i) {
+        item_t *item = (item_t *)(data + (i - 1) * pool->item_size);
+        item->next = pool->free_items;
+        pool->free_items = item;
+    }
+
+    return 0;
+}
+
+
+static void *pool_realloc(hat_allocator_t *a, size_t size, void *old) {
+    hat_pool_allocator_t *pool = (hat_pool_allocator_t *)a;
+
+    if (!size) {
+        if (old) {
+            item_t *item = old;
+            item->next = pool->free_items;
+            pool->free_items = item;
+
+            pool->stats.size -= pool->item_size;
+            pool->stats.free_count += 1;
+        }
+        return NULL;
+    }
+
+    if (size > pool->item_size)
+        return NULL;
+
+    if (old) {
+        pool->stats.realloc_count += 1;
+        return old;
+    }
+
+    if (!pool->free_items && add_slab(pool))
+        return NULL;
+
+    item_t *item = pool->free_items;
+    pool->free_items = item->next;
+
+    pool->stats.size += pool->item_size;
+    if (pool->stats.size > pool->stats.peak_size)
+        pool->stats.peak_size = pool->stats.size;
+    pool->stats.alloc_count += 1;
+
+    return item;
+}
+
+
+hat_pool_allocator_t *hat_pool_allocator_create(hat_allocator_t *a,
+                                                size_t item_size,
+                                                size_t slab_items) {
+    if (!item_size || !slab_items)
+        return NULL;
+
+    item_size = ALIGN_SIZE(item_size < sizeof(item_t) ? sizeof(item_t)
+                                                       : item_size);
+    if (item_size > (SIZE_MAX - SLAB_HEADER_SIZE) / slab_items)
+        return NULL;
+
+    hat_pool_allocator_t *pool =
+        hat_allocator_alloc(a, sizeof(hat_pool_allocator_t));
+    if (!pool)
+        return NULL;
+
+    pool->a.realloc = pool_realloc;
+    pool->parent = a;
+    pool->item_size = item_size;
+    pool->slab_items = slab_items;
+    pool->slabs = NULL;
+    pool->free_items = NULL;
+    memset(&pool->stats, 0, sizeof(pool->stats));
+    return pool;
+}
+
+
+void hat_pool_allocator_destroy(hat_pool_allocator_t *pool) {
+    while (pool->slabs) {
+        slab_t *slab = pool->slabs;
+        pool->slabs = slab->next;
+        hat_allocator_free(pool->parent, slab);
+    }
+
+    hat_allocator_free(pool->parent, pool);
+}
+
+
+hat_allocator_t *hat_pool_allocator_get_allocator(hat_pool_allocator_t *pool) {
+    return &pool->a;
+}
+
+
+void hat_pool_allocator_get_stats(hat_pool_allocator_t *pool,
+                                  hat_allocator_stats_t *stats) {
+    *stats = pool->stats;
+}
@@ -0,0 +1,63 @@
+#ifndef HAT_POOL_ALLOCATOR_H
+#define HAT_POOL_ALLOCATOR_H
+
+/*! \file
+    \brief Pool memory allocator
+
+    Pool allocator serves memory blocks of single fixed size (item size).
+    Items are obtained from underlying allocator in slabs containing
+    multiple items. Freed items are kept in free list and reused by
+    following allocations - memory is returned to underlying allocator
+    only by `hat_pool_allocator_destroy`.
+
+    Allocations larger than item size fail (``NULL`` is returned).
+    Reallocation of existing item to size not larger than item size
+    returns same item.
+ */
+
+#include <stddef.h>
+#include "allocator.h"
+
+#ifdef __cplusplus
+extern "C" {
+#endif
+
+/*! \brief Pool allocator */
+typedef struct hat_pool_allocator_t hat_pool_allocator_t;
+
+
+/*! \brief Create new pool allocator
+    \param[in] a underlying allocator
+    \param[in] item_size size of single item
+    \param[in] slab_items number of items in single slab
+    \return pool or ``NULL`` on failure
+ */
+hat_pool_allocator_t *hat_pool_allocator_create(hat_allocator_t *a,
+                                                size_t item_size,
+                                                size_t slab_items);
+
+/*! \brief Destroy pool allocator and free all allocated memory
+    \param[in] pool pool
+ */
+void hat_pool_allocator_destroy(hat_pool_allocator_t *pool);
+
+/*! \brief Get allocator interface
+    \param[in] pool pool
+    \return allocator
+ */
+hat_allocator_t *hat_pool_allocator_get_allocator(hat_pool_allocator_t *pool);
+
+/*! \brief Get allocator statistics
+    \param[in] pool pool
+    \param[out] stats statistics
+
+    Each allocated item is accounted as item size.
+ */
+void hat_pool_allocator_get_stats(hat_pool_allocator_t *pool,
+                                  hat_allocator_stats_t *stats);
+
+#ifdef __cplusplus
+}
+#endif
+
+#endif
@@ -1,9 +1,18 @@
+#ifdef __linux__
+#define _GNU_SOURCE
+#endif
+
 #include "socket.h"
 
 #ifndef _WIN32
+#include <errno.h>
 #include <fcntl.h>
+#include <sys/uio.h>
 #endif
 
+// number of buffers/messages passed to single system call
+#define IOV_MAX_LEN HAT_SOCKET_IOV_MAX
+
 
 int hat_socket_setup() {
 #ifdef _WIN32
@@ -42,11 +51,11 @@ int hat_socket_addr_resolve(char *name, hat_socket_ip4_addr_t *host) {
 
 
 int hat_socket_addr_convert(char *addr, hat_socket_ip4_addr_t *host) {
-    struct sockaddr_in res;
-    if (inet_aton(addr, &res))
+    struct in_addr res;
+    if (inet_pton(AF_INET, addr, &res) != 1)
         return HAT_SOCKET_ERROR;
 
-    *host = ntohl(res.sin_addr.s_addr);
+    *host = ntohl(res.s_addr);
     return HAT_SOCKET_SUCCESS;
 }
 
@@ -106,7 +115,7 @@ int hat_socket_close(hat_socket_t *s) {
 int hat_socket_set_blocking(hat_socket_t *s, bool blocking) {
 #ifdef _WIN32
     unsigned long arg = blocking ? 0 : 1;
-    return ioctlsocket(s->socket, FIONBIO, &mode) ? HAT_SOCKET_ERROR
+    return ioctlsocket(s->socket, FIONBIO, &arg) ? HAT_SOCKET_ERROR
                                                   : HAT_SOCKET_SUCCESS;
 #else
     int flags = fcntl(s->socket, F_GETFL, 0);
@@ -128,10 +137,12 @@ int hat_socket_connect(hat_socket_t *s, hat_socket_ip4_addr_t host,
                                .sin_port = htons(port),
                                .sin_addr = {.s_addr = htonl(host)}};
 
-    if (connect(s->socket, &addr, sizeof(addr)))
+    socklen_t addr_len = sizeof(addr);
+
+    if (connect(s->socket, (struct sockaddr *)&addr, addr_len))
         return HAT_SOCKET_ERROR;
 
-    if (getsockname(s->socket, &addr, sizeof(addr)))
+    if (getsockname(s->socket, (struct sockaddr *)&addr, &addr_len))
         return HAT_SOCKET_ERROR;
 
     s->local_host = ntohl(addr.sin_addr.s_addr);
@@ -148,7 +159,7 @@ int hat_socket_bind(hat_socket_t *s, hat_socket_ip4_addr_t host,
                                .sin_port = htons(port),
                                .sin_addr = {.s_addr = htonl(host)}};
 
-    if (bind(s->socket, &addr, sizeof(addr)))
+    if (bind(s->socket, (struct sockaddr *)&addr, sizeof(addr)))
         return HAT_SOCKET_ERROR;
 
     s->local_host = host;
@@ -167,13 +178,14 @@ int hat_socket_listen(hat_socket_t *s, int backlog) {
 
 int hat_socket_accept(hat_socket_t *s, hat_socket_t *client) {
     struct sockaddr_in addr;
-    client->socket = accept(s->socket, &addr, sizeof(addr));
+    socklen_t addr_len = sizeof(addr);
+    client->socket = accept(s->socket, (struct sockaddr *)&addr, &addr_len);
 
 #ifdef _WIN32
-    if (s->socket == INVALID_SOCKET)
+    if (client->socket == INVALID_SOCKET)
         return HAT_SOCKET_ERROR;
 #else
-    if (s->socket < 0)
+    if (client->socket < 0)
         return HAT_SOCKET_ERROR;
 #endif
 
@@ -181,19 +193,21 @@ int hat_socket_accept(hat_socket_t *s, hat_socket_t *client) {
     client->remote_host = ntohl(addr.sin_addr.s_addr);
     client->remote_port = ntohs(addr.sin_port);
 
-    if (getsockname(client->socket, &addr, sizeof(addr))) {
+    addr_len = sizeof(addr);
+    if (getsockname(client->socket, (struct sockaddr *)&addr, &addr_len)) {
         hat_socket_close(client);
         return HAT_SOCKET_ERROR;
     }
 
-    s->local_host = ntohl(addr.sin_addr.s_addr);
-    s->local_port = ntohs(addr.sin_port);
+    client->local_host = ntohl(addr.sin_addr.s_addr);
+    client->local_port = ntohs(addr.sin_port);
     return HAT_SOCKET_SUCCESS;
 }
 
 
 int hat_socket_send(hat_socket_t *s, hat_buff_t *data) {
-    ssize_t res = send(s->socket, data->data, hat_buff_available(data), 0);
+    ssize_t res =
+        send(s->socket, data->data + data->pos, hat_buff_available(data), 0);
     if (res < 0)
         return HAT_SOCKET_ERROR;
 
@@ -208,8 +222,9 @@ int hat_socket_send_to(hat_socket_t *s, hat_buff_t *data,
                                .sin_port = htons(port),
                                .sin_addr = {.s_addr = htonl(host)}};
 
-    ssize_t res = sendto(s->socket, data->data, hat_buff_available(data), 0,
-                         &addr, sizeof(addr));
+    ssize_t res =
+        sendto(s->socket, data->data + data->pos, hat_buff_available(data), 0,
+               (struct sockaddr *)&addr, sizeof(addr));
     if (res < 0)
         return HAT_SOCKET_ERROR;
 
@@ -233,21 +248,277 @@ int hat_socket_receive(hat_socket_t *s, hat_buff_t *data) {
 
 
 int hat_socket_receive_from(hat_socket_t *s, hat_buff_t *data,
-                            hat_socket_ip4_addr_t host,
-                            hat_socket_port_t port) {
+                            hat_socket_ip4_addr_t *host,
+                            hat_socket_port_t *port) {
     size_t available = hat_buff_available(data);
     if (!available)
         return HAT_SOCKET_ERROR;
 
-    struct sockaddr_in addr = {.sin_family = AF_INET,
-                               .sin_port = htons(port),
-                               .sin_addr = {.s_addr = htonl(host)}};
+    struct sockaddr_in addr;
+    socklen_t addr_len = sizeof(addr);
 
     ssize_t res = recvfrom(s->socket, data->data + data->pos, available, 0,
-                           &addr, sizeof(addr));
+                           (struct sockaddr *)&addr, &addr_len);
     if (res < 0)
         return HAT_SOCKET_ERROR;
 
     data->pos += res;
+    *host = ntohl(addr.sin_addr.s_addr);
+    *port = ntohs(addr.sin_port);
+    return HAT_SOCKET_SUCCESS;
+}
+
+
+static void move_positions(hat_buff_t *data, size_t data_len, size_t len) {
+    for (size_t i = 0; i < data_len && len; ++i) {
+        size_t available = hat_buff_available(data + i);
+        if (available > len)
+            available = len;
+
+        data[i].pos += available;
+        len -= available;
+    }
+}
+
+
+int hat_socket_sendv(hat_socket_t *s, hat_buff_t *data, size_t data_len) {
+    // datagram can not be split between multiple system calls
+    if (s->type == HAT_SOCKET_TYPE_IP4_UDP && data_len > IOV_MAX_LEN)
+        return HAT_SOCKET_ERROR;
+
+    bool sent = false;
+
+    while (data_len) {
+        size_t len = (data_len < IOV_MAX_LEN ? data_len : IOV_MAX_LEN);
+        size_t total = 0;
+
+#ifdef _WIN32
+        WSABUF bufs[IOV_MAX_LEN];
+        for (size_t i = 0; i < len; ++i) {
+            bufs[i].buf = (char *)data[i].data + data[i].pos;
+            bufs[i].len = hat_buff_available(data + i);
+            total += bufs[i].len;
+        }
+
+        DWORD res;
+        if (WSASend(s->socket, bufs, len, &res, 0, NULL, NULL))
+            return sent ? HAT_SOCKET_SUCCESS : HAT_SOCKET_ERROR;
+#else
+        struct iovec iov[IOV_MAX_LEN];
+        for (size_t i = 0; i < len; ++i) {
+            iov[i].iov_base = data[i].data + data[i].pos;
+            iov[i].iov_len = hat_buff_available(data + i);
+            total += iov[i].iov_len;
+        }
+
+        struct msghdr msg = {.msg_iov = iov, .msg_iovlen = len};
+        ssize_t res = sendmsg(s->socket, &msg, 0);
+        if (res < 0)
+            return sent ? HAT_SOCKET_SUCCESS : HAT_SOCKET_ERROR;
+#endif
+
+        move_positions(data, len, res);
+        sent = true;
+
+        if ((size_t)res < total)
+            break;
+
+        data += len;
+        data_len -= len;
+    }
+
+    return HAT_SOCKET_SUCCESS;
+}
+
+
+int hat_socket_receivev(hat_socket_t *s, hat_buff_t *data, size_t data_len) {
+    // datagram can not be split between multiple system calls
+    if (s->type == HAT_SOCKET_TYPE_IP4_UDP && data_len > IOV_MAX_LEN)
+        return HAT_SOCKET_ERROR;
+
+    bool received = false;
+
+    while (data_len) {
+        size_t len = (data_len < IOV_MAX_LEN ? data_len : IOV_MAX_LEN);
+        size_t total = 0;
+
+#ifdef _WIN32
+        WSABUF bufs[IOV_MAX_LEN];
+        for (size_t i = 0; i < len; ++i) {
+            bufs[i].buf = (char *)data[i].data + data[i].pos;
+            bufs[i].len = hat_buff_available(data + i);
+            total += bufs[i].len;
+        }
+
+        DWORD res;
+        DWORD flags = 0;
+        if (WSARecv(s->socket, bufs, len, &res, &flags, NULL, NULL))
+            return received ? HAT_SOCKET_SUCCESS : HAT_SOCKET_ERROR;
+#else
+        struct iovec iov[IOV_MAX_LEN];
+        for (size_t i = 0; i < len; ++i) {
+            iov[i].iov_base = data[i].data + data[i].pos;
+            iov[i].iov_len = hat_buff_available(data + i);
+            total += iov[i].iov_len;
+        }
+
+        struct msghdr msg = {.msg_iov = iov, .msg_iovlen = len};
+        ssize_t res = recvmsg(s->socket, &msg, (received ? MSG_DONTWAIT : 0));
+        if (res < 0)
+            return received ? HAT_SOCKET_SUCCESS : HAT_SOCKET_ERROR;
+#endif
+
+        move_positions(data, len, res);
+        received = true;
+
+#ifdef _WIN32
+        // WSARecv doesn't support per-call non-blocking flag - subsequent
+        // calls could block after data was already received
+        break;
+#endif
+
+        if (!res || (size_t)res < total)
+            break;
+
+        data += len;
+        data_len -= len;
+    }
+
+    return HAT_SOCKET_SUCCESS;
+}
+
+
+#ifdef __linux__
+
+int hat_socket_send_batch(hat_socket_t *s, hat_socket_msg_t *msgs,
+                          size_t msgs_len, size_t *count) {
+    struct mmsghdr hdrs[IOV_MAX_LEN];
+    struct iovec iov[IOV_MAX_LEN];
+    struct sockaddr_in addrs[IOV_MAX_LEN];
+
+    *count = 0;
+
+    while (*count < msgs_len) {
+        hat_socket_msg_t *m = msgs + *count;
+        size_t len = msgs_len - *count;
+        if (len > IOV_MAX_LEN)
+            len = IOV_MAX_LEN;
+
+        for (size_t i = 0; i < len; ++i) {
+            addrs[i] = (struct sockaddr_in){
+                .sin_family = AF_INET,
+                .sin_port = htons(m[i].port),
+                .sin_addr = {.s_addr = htonl(m[i].host)}};
+            iov[i].iov_base = m[i].data.data + m[i].data.pos;
+            iov[i].iov_len = hat_buff_available(&(m[i].data));
+            hdrs[i] = (struct mmsghdr){
+                .msg_hdr = {.msg_name = addrs + i,
+                            .msg_namelen = sizeof(addrs[i]),
+                            .msg_iov = iov + i,
+                            .msg_iovlen = 1}};
+        }
+
+        int res = sendmmsg(s->socket, hdrs, len, 0);
+        if (res < 0)
+            return *count ? HAT_SOCKET_SUCCESS : HAT_SOCKET_ERROR;
+
+        for (int i = 0; i < res; ++i)
+            m[i].data.pos += hdrs[i].msg_len;
+
+        *count += res;
+        if ((size_t)res < len)
+            break;
+    }
+
+    return HAT_SOCKET_SUCCESS;
+}
+
+
+int hat_socket_receive_batch(hat_socket_t *s, hat_socket_msg_t *msgs,
+                             size_t msgs_len, size_t *count) {
+    struct mmsghdr hdrs[IOV_MAX_LEN];
+    struct iovec iov[IOV_MAX_LEN];
+    struct sockaddr_in addrs[IOV_MAX_LEN];
+
+    *count = 0;
+
+    while (*count < msgs_len) {
+        hat_socket_msg_t *m = msgs + *count;
+        size_t len = msgs_len - *count;
+        if (len > IOV_MAX_LEN)
+            len = IOV_MAX_LEN;
+
+        for (size_t i = 0; i < len; ++i) {
+            iov[i].iov_base = m[i].data.data + m[i].data.pos;
+            iov[i].iov_len = hat_buff_available(&(m[i].data));
+            hdrs[i] = (struct mmsghdr){
+                .msg_hdr = {.msg_name = addrs + i,
+                            .msg_namelen = sizeof(addrs[i]),
+                            .msg_iov = iov + i,
+                            .msg_iovlen = 1}};
+        }
+
+        int res = recvmmsg(s->socket, hdrs, len,
+                           (*count ? MSG_DONTWAIT : MSG_WAITFORONE), NULL);
+        if (res < 0)
+            return *count ? HAT_SOCKET_SUCCESS : HAT_SOCKET_ERROR;
+
+        for (int i = 0; i < res; ++i) {
+            m[i].data.pos += hdrs[i].msg_len;
+            m[i].host = ntohl(addrs[i].sin_addr.s_addr);
+            m[i].port = ntohs(addrs[i].sin_port);
+        }
+
+        *count += res;
+        if ((size_t)res < len)
+            break;
+    }
+
     return HAT_SOCKET_SUCCESS;
 }
+
+#else
+
+int hat_socket_send_batch(hat_socket_t *s, hat_socket_msg_t *msgs,
+                          size_t msgs_len, size_t *count) {
+    for (*count = 0; *count < msgs_len; ++(*count)) {
+        hat_socket_msg_t *m = msgs + *count;
+        if (hat_socket_send_to(s, &(m->data), m->host, m->port))
+            return *count ? HAT_SOCKET_SUCCESS : HAT_SOCKET_ERROR;
+    }
+
+    return HAT_SOCKET_SUCCESS;
+}
+
+
+int hat_socket_receive_batch(hat_socket_t *s, hat_socket_msg_t *msgs,
+                             size_t msgs_len, size_t *count) {
+    for (*count = 0; *count < msgs_len; ++(*count)) {
+        hat_socket_msg_t *m = msgs + *count;
+        struct sockaddr_in addr;
+        socklen_t addr_len = sizeof(addr);
+        int flags = 0;
+
+        if (*count) {
+#ifdef MSG_DONTWAIT
+            flags = MSG_DONTWAIT;
+#else
+            break;
+#endif
+        }
+
+        ssize_t res = recvfrom(s->socket, m->data.data + m->data.pos,
+                               hat_buff_available(&(m->data)), flags,
+                               (struct sockaddr *)&addr, &addr_len);
+        if (res < 0)
+            return *count ? HAT_SOCKET_SUCCESS : HAT_SOCKET_ERROR;
+
+        m->data.pos += res;
+        m->host = ntohl(addr.sin_addr.s_addr);
+        m->port = ntohs(addr.sin_port);
+    }
+
+    return HAT_SOCKET_SUCCESS;
+}
+
+#endif
@@ -2,6 +2,7 @@
 #define HAT_SOCKET_H
 
 #include <stdbool.h>
+#include <stddef.h>
 
 #ifdef _WIN32
 #include <winsock2.h>
@@ -23,6 +24,9 @@
 #define HAT_SOCKET_TYPE_IP4_TCP 0
 #define HAT_SOCKET_TYPE_IP4_UDP 1
 
+// maximum number of buffers used by single sendv/receivev system call
+#define HAT_SOCKET_IOV_MAX 64
+
 #ifdef __cplusplus
 extern "C" {
 #endif
@@ -45,6 +49,12 @@ typedef struct {
 #endif
 } hat_socket_t;
 
+typedef struct {
+    hat_buff_t data;
+    hat_socket_ip4_addr_t host;
+    hat_socket_port_t port;
+} hat_socket_msg_t;
+
 
 int hat_socket_setup();
 void hat_socket_cleanup();
@@ -68,7 +78,30 @@ int hat_socket_send_to(hat_socket_t *s, hat_buff_t *data,
                        hat_socket_ip4_addr_t host, hat_socket_port_t port);
 int hat_socket_receive(hat_socket_t *s, hat_buff_t *data);
 int hat_socket_receive_from(hat_socket_t *s, hat_buff_t *data,
-                            hat_socket_ip4_addr_t host, hat_socket_port_t port);
+                            hat_socket_ip4_addr_t *host,
+                            hat_socket_port_t *port);
+
+// vectored send/receive - buffers are used in order and their positions
+// are moved by number of transferred bytes
+// stream sockets support any number of buffers (more than
+// HAT_SOCKET_IOV_MAX buffers are transferred with multiple system calls);
+// for datagram sockets, single datagram is transferred and number of
+// buffers is limited to HAT_SOCKET_IOV_MAX (HAT_SOCKET_ERROR is returned
+// otherwise); on windows, receivev uses at most HAT_SOCKET_IOV_MAX buffers
+// (single system call)
+int hat_socket_sendv(hat_socket_t *s, hat_buff_t *data, size_t data_len);
+int hat_socket_receivev(hat_socket_t *s, hat_buff_t *data, size_t data_len);
+
+// batched datagram send/receive (sendmmsg/recvmmsg on linux) - number of
+// sent/received messages is stored in `count`; if at least one message is
+// transferred, result is HAT_SOCKET_SUCCESS
+// receive blocks (if socket is blocking) only until first message is
+// received - received message data is stored starting from data position
+// and host/port are set to message source address
+int hat_socket_send_batch(hat_socket_t *s, hat_socket_msg_t *msgs,
+                          size_t msgs_len, size_t *count);
+int hat_socket_receive_batch(hat_socket_t *s, hat_socket_msg_t *msgs,
+                             size_t msgs_len, size_t *count);
 
 #ifdef __cplusplus
 }
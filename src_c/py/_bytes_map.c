@@ -0,0 +1,354 @@
+#include <Python.h>
+#include <stdint.h>
+
+#include "hat/ht.h"
+#include "hat/py_allocator.h"
+
+
+typedef struct {
+    PyObject_HEAD
+    hat_ht_t *ht;
+    size_t version;
+} BytesMap;
+
+typedef struct {
+    PyObject_HEAD
+    BytesMap *map;
+    hat_ht_iter_t iter;
+    size_t version;
+    int started;
+} BytesMapIter;
+
+static PyTypeObject *BytesMapIter_type = NULL;
+
+
+static int get_key(PyObject *key, Py_buffer *view) {
+    return PyObject_GetBuffer(key, view, PyBUF_SIMPLE);
+}
+
+
+static void clear_ht(hat_ht_t *ht) {
+    hat_ht_iter_t iter = NULL;
+    while ((iter = hat_ht_iter_next(ht, iter)))
+        Py_DECREF((PyObject *)hat_ht_iter_value(iter));
+    hat_ht_destroy(ht);
+}
+
+
+static PyObject *BytesMap_new(PyTypeObject *type, PyObject *args,
+                              PyObject *kwargs) {
+    BytesMap *self = (BytesMap *)type->tp_alloc(type, 0);
+    if (!self)
+        return NULL;
+
+    self->version = 0;
+    self->ht = hat_ht_create(&hat_py_allocator);
+    if (!self->ht) {
+        Py_DECREF(self);
+        return PyErr_NoMemory();
+    }
+
+    return (PyObject *)self;
+}
+
+
+static int BytesMap_traverse(BytesMap *self, visitproc visit, void *arg) {
+    Py_VISIT(Py_TYPE(self));
+
+    if (!self->ht)
+        return 0;
+
+    hat_ht_iter_t iter = NULL;
+    while ((iter = hat_ht_iter_next(self->ht, iter)))
+        Py_VISIT((PyObject *)hat_ht_iter_value(iter));
+
+    return 0;
+}
+
+
+static int BytesMap_clear_ht(BytesMap *self) {
+    hat_ht_t *ht = self->ht;
+    if (!ht)
+        return 0;
+
+    self->ht = hat_ht_create(&hat_py_allocator);
+    self->version += 1;
+    clear_ht(ht);
+
+    if (self->ht)
+        return 0;
+
+    PyErr_NoMemory();
+    return -1;
+}
+
+
+static int BytesMap_tp_clear(BytesMap *self) {
+    hat_ht_t *ht = self->ht;
+    if (!ht)
+        return 0;
+
+    self->ht = NULL;
+    self->version += 1;
+    clear_ht(ht);
+    return 0;
+}
+
+
+static void BytesMap_dealloc(BytesMap *self) {
+    PyTypeObject *type = Py_TYPE(self);
+
+    PyObject_GC_UnTrack(self);
+    BytesMap_tp_clear(self);
+
+    type->tp_free(self);
+    Py_DECREF(type);
+}
+
+
+static int check_ht(BytesMap *self) {
+    if (self->ht)
+        return 0;
+
+    PyErr_SetString(PyExc_RuntimeError, "map not initialized");
+    return -1;
+}
+
+
+static Py_ssize_t BytesMap_len(BytesMap *self) {
+    if (check_ht(self))
+        return -1;
+
+    return hat_ht_count(self->ht);
+}
+
+
+static PyObject *BytesMap_getitem(BytesMap *self, PyObject *key) {
+    if (check_ht(self))
+        return NULL;
+
+    Py_buffer view;
+    if (get_key(key, &view))
+        return NULL;
+
+    PyObject *value = hat_ht_get(self->ht, view.buf, view.len);
+    PyBuffer_Release(&view);
+
+    if (!value) {
+        PyErr_SetObject(PyExc_KeyError, key);
+        return NULL;
+    }
+
+    Py_INCREF(value);
+    return value;
+}
+
+
+static int BytesMap_setitem(BytesMap *self, PyObject *key, PyObject *value) {
+    if (check_ht(self))
+        return -1;
+
+    Py_buffer view;
+    if (get_key(key, &view))
+        return -1;
+
+    PyObject *old;
+
+    if (value) {
+        old = hat_ht_get(self->ht, view.buf, view.len);
+
+        Py_INCREF(value);
+        if (hat_ht_set(self->ht, view.buf, view.len, value)) {
+            Py_DECREF(value);
+            PyBuffer_Release(&view);
+            PyErr_NoMemory();
+            return -1;
+        }
+
+        if (!old)
+            self->version += 1;
+
+    } else {
+        old = hat_ht_pop(self->ht, view.buf, view.len);
+
+        if (!old) {
+            PyBuffer_Release(&view);
+            PyErr_SetObject(PyExc_KeyError, key);
+            return -1;
+        }
+
+        self->version += 1;
+    }
+
+    PyBuffer_Release(&view);
+    Py_XDECREF(old);
+    return 0;
+}
+
+
+static int BytesMap_contains(BytesMap *self, PyObject *key) {
+    if (check_ht(self))
+        return -1;
+
+    Py_buffer view;
+    if (get_key(key, &view)) {
+        if (!PyErr_ExceptionMatches(PyExc_TypeError))
+            return -1;
+
+        PyErr_Clear();
+        return 0;
+    }
+
+    int result = hat_ht_get(self->ht, view.buf, view.len) != NULL;
+    PyBuffer_Release(&view);
+    return result;
+}
+
+
+static PyObject *BytesMap_iter(BytesMap *self) {
+    if (check_ht(self))
+        return NULL;
+
+    BytesMapIter *iter = PyObject_GC_New(BytesMapIter, BytesMapIter_type);
+    if (!iter)
+        return NULL;
+
+    Py_INCREF(self);
+    iter->map = self;
+    iter->iter = NULL;
+    iter->version = self->version;
+    iter->started = 0;
+
+    PyObject_GC_Track(iter);
+    return (PyObject *)iter;
+}
+
+
+static PyObject *BytesMap_clear(BytesMap *self, PyObject *args) {
+    if (BytesMap_clear_ht(self))
+        return NULL;
+
+    Py_RETURN_NONE;
+}
+
+
+static int BytesMapIter_traverse(BytesMapIter *self, visitproc visit,
+                                 void *arg) {
+    Py_VISIT(Py_TYPE(self));
+    Py_VISIT(self->map);
+    return 0;
+}
+
+
+static int BytesMapIter_clear(BytesMapIter *self) {
+    Py_CLEAR(self->map);
+    return 0;
+}
+
+
+static void BytesMapIter_dealloc(BytesMapIter *self) {
+    PyTypeObject *type = Py_TYPE(self);
+
+    PyObject_GC_UnTrack(self);
+    BytesMapIter_clear(self);
+
+    PyObject_GC_Del(self);
+    Py_DECREF(type);
+}
+
+
+static PyObject *BytesMapIter_next(BytesMapIter *self) {
+    BytesMap *map = self->map;
+
+    if (!map || (self->started && !self->iter))
+        return NULL;
+
+    if (!map->ht || self->version != map->version) {
+        PyErr_SetString(PyExc_RuntimeError,
+                        "map changed size during iteration");
+        return NULL;
+    }
+
+    self->iter = hat_ht_iter_next(map->ht, self->iter);
+    self->started = 1;
+
+    if (!self->iter)
+        return NULL;
+
+    return PyBytes_FromStringAndSize(hat_ht_iter_key(self->iter),
+                                     hat_ht_iter_key_size(self->iter));
+}
+
+
+static PyMethodDef BytesMap_methods[] = {
+    {"clear", (PyCFunction)BytesMap_clear, METH_NOARGS,
+     "Remove all items"},
+    {NULL}};
+
+static PyType_Slot BytesMap_slots[] = {
+    {Py_tp_new, BytesMap_new},
+    {Py_tp_dealloc, BytesMap_dealloc},
+    {Py_tp_traverse, BytesMap_traverse},
+    {Py_tp_clear, BytesMap_tp_clear},
+    {Py_tp_iter, BytesMap_iter},
+    {Py_tp_methods, BytesMap_methods},
+    {Py_mp_length, BytesMap_len},
+    {Py_mp_subscript, BytesMap_getitem},
+    {Py_mp_ass_subscript, BytesMap_setitem},
+    {Py_sq_contains, BytesMap_contains},
+    {Py_tp_doc, "Mapping with bytes keys based on hat_ht_t\n\n"
+                "Keys are copied into hash table elements. Any object "
+                "supporting buffer protocol can be used as key.\n"},
+    {0, NULL}};
+
+static PyType_Spec BytesMap_spec = {
+    .name = "hat.util._bytes_map.BytesMap",
+    .basicsize = sizeof(BytesMap),
+    .flags = Py_TPFLAGS_DEFAULT | Py_TPFLAGS_BASETYPE | Py_TPFLAGS_HAVE_GC,
+    .slots = BytesMap_slots};
+
+static PyType_Slot BytesMapIter_slots[] = {
+    {Py_tp_dealloc, BytesMapIter_dealloc},
+    {Py_tp_traverse, BytesMapIter_traverse},
+    {Py_tp_clear, BytesMapIter_clear},
+    {Py_tp_iter, PyObject_SelfIter},
+    {Py_tp_iternext, BytesMapIter_next},
+    {0, NULL}};
+
+static PyType_Spec BytesMapIter_spec = {
+    .name = "hat.util._bytes_map.BytesMapIter",
+    .basicsize = sizeof(BytesMapIter),
+    .flags = Py_TPFLAGS_DEFAULT | Py_TPFLAGS_HAVE_GC,
+    .slots = BytesMapIter_slots};
+
+
+static int module_exec(PyObject *module) {
+    if (!BytesMapIter_type) {
+        BytesMapIter_type =
+            (PyTypeObject *)PyType_FromSpec(&BytesMapIter_spec);
+        if (!BytesMapIter_type)
+            return -1;
+    }
+
+    PyObject *type = PyType_FromSpec(&BytesMap_spec);
+    if (!type)
+        return -1;
+
+    if (PyModule_AddObject(module, "BytesMap", type)) {
+        Py_DECREF(type);
+        return -1;
+    }
+
+    return 0;
+}
+
+
+static PyModuleDef_Slot module_slots[] = {{Py_mod_exec, module_exec},
+                                          {0, NULL}};
+
+static struct PyModuleDef module_def = {.m_base = PyModuleDef_HEAD_INIT,
+                                        .m_name = "_bytes_map",
+                                        .m_slots = module_slots};
+
+
+PyMODINIT_FUNC PyInit__bytes_map() { return PyModuleDef_Init(&module_def); }
@@ -0,0 +1,515 @@
+#include <Python.h>
+#include <stdint.h>
+#include <string.h>
+
+#include "hat/py_allocator.h"
+#include "hat/ring.h"
+
+
+typedef struct {
+    PyObject_HEAD
+    hat_ring_t *ring;
+    Py_ssize_t exports;
+} RingBuffer;
+
+
+static size_t get_used(RingBuffer *self, uint8_t *data[2],
+                       size_t data_len[2]) {
+    hat_ring_used(self->ring, data, data_len);
+    return data_len[0] + data_len[1];
+}
+
+
+static uint8_t get_byte(uint8_t *data[2], size_t data_len[2], size_t i) {
+    if (i < data_len[0])
+        return data[0][i];
+    return data[1][i - data_len[0]];
+}
+
+
+static void copy_used(uint8_t *data[2], size_t data_len[2], size_t offset,
+                      uint8_t *dst, size_t len) {
+    if (offset < data_len[0]) {
+        size_t len0 = data_len[0] - offset;
+        if (len0 > len)
+            len0 = len;
+        memcpy(dst, data[0] + offset, len0);
+        dst += len0;
+        len -= len0;
+        offset = data_len[0];
+    }
+
+    if (len)
+        memcpy(dst, data[1] + offset - data_len[0], len);
+}
+
+
+static Py_ssize_t find(RingBuffer *self, uint8_t *sep, size_t sep_len,
+                       size_t start) {
+    uint8_t *data[2];
+    size_t data_len[2];
+    size_t len = get_used(self, data, data_len);
+
+    if (!sep_len || len < sep_len)
+        return -1;
+
+    for (size_t i = start; i <= len - sep_len;) {
+        if (i < data_len[0]) {
+            uint8_t *p = memchr(data[0] + i, sep[0], data_len[0] - i);
+            if (!p) {
+                i = data_len[0];
+                continue;
+            }
+            i = p - data[0];
+
+        } else {
+            uint8_t *p = memchr(data[1] + i - data_len[0], sep[0],
+                                data_len[1] - i + data_len[0]);
+            if (!p)
+                return -1;
+            i = p - data[1] + data_len[0];
+        }
+
+        if (i > len - sep_len)
+            return -1;
+
+        size_t j = 1;
+        while (j < sep_len && get_byte(data, data_len, i + j) == sep[j])
+            j += 1;
+
+        if (j == sep_len)
+            return i;
+
+        i += 1;
+    }
+
+    return -1;
+}
+
+
+static int check_exports(RingBuffer *self) {
+    if (!self->exports)
+        return 0;
+
+    PyErr_SetString(PyExc_BufferError, "existing exports of data");
+    return -1;
+}
+
+
+static size_t normalize_len(RingBuffer *self, Py_ssize_t n) {
+    size_t len = hat_ring_len(self->ring);
+    return ((n < 0 || (size_t)n > len) ? len : (size_t)n);
+}
+
+
+static PyObject *RingBuffer_new(PyTypeObject *type, PyObject *args,
+                                PyObject *kwargs) {
+    static char *kwlist[] = {"size", NULL};
+    Py_ssize_t size;
+
+    if (!PyArg_ParseTupleAndKeywords(args, kwargs, "n", kwlist, &size))
+        return NULL;
+
+    if (size < 1) {
+        PyErr_SetString(PyExc_ValueError, "invalid size");
+        return NULL;
+    }
+
+    RingBuffer *self = (RingBuffer *)type->tp_alloc(type, 0);
+    if (!self)
+        return NULL;
+
+    self->exports = 0;
+    self->ring = hat_ring_create(&hat_py_allocator, size);
+    if (!self->ring) {
+        Py_DECREF(self);
+        return PyErr_NoMemory();
+    }
+
+    return (PyObject *)self;
+}
+
+
+static void RingBuffer_dealloc(RingBuffer *self) {
+    PyTypeObject *type = Py_TYPE(self);
+
+    if (self->ring)
+        hat_ring_destroy(self->ring);
+
+    type->tp_free(self);
+    Py_DECREF(type);
+}
+
+
+static Py_ssize_t RingBuffer_len(RingBuffer *self) {
+    return hat_ring_len(self->ring);
+}
+
+
+static PyObject *RingBuffer_get_size(RingBuffer *self, void *closure) {
+    return PyLong_FromSize_t(hat_ring_size(self->ring));
+}
+
+
+static PyObject *RingBuffer_write(RingBuffer *self, PyObject *arg) {
+    Py_buffer data;
+    if (PyObject_GetBuffer(arg, &data, PyBUF_SIMPLE))
+        return NULL;
+
+    size_t len = hat_ring_write(self->ring, data.buf, data.len);
+
+    PyBuffer_Release(&data);
+    return PyLong_FromSize_t(len);
+}
+
+
+static PyObject *RingBuffer_add(RingBuffer *self, PyObject *arg) {
+    Py_buffer data;
+    if (PyObject_GetBuffer(arg, &data, PyBUF_SIMPLE))
+        return NULL;
+
+    size_t ring_len = hat_ring_len(self->ring);
+    size_t ring_size = hat_ring_size(self->ring);
+    if ((size_t)data.len > ring_size - ring_len) {
+        PyBuffer_Release(&data);
+        PyErr_SetString(PyExc_ValueError, "insufficient space");
+        return NULL;
+    }
+
+    hat_ring_write(self->ring, data.buf, data.len);
+
+    PyBuffer_Release(&data);
+    Py_RETURN_NONE;
+}
+
+
+static PyObject *RingBuffer_read(RingBuffer *self, PyObject *args,
+                                 PyObject *kwargs) {
+    static char *kwlist[] = {"n", NULL};
+    Py_ssize_t n = -1;
+    if (!PyArg_ParseTupleAndKeywords(args, kwargs, "|n", kwlist, &n))
+        return NULL;
+
+    if (check_exports(self))
+        return NULL;
+
+    size_t len = normalize_len(self, n);
+
+    PyObject *result = PyBytes_FromStringAndSize(NULL, len);
+    if (!result)
+        return NULL;
+
+    hat_ring_read(self->ring, (uint8_t *)PyBytes_AS_STRING(result), len);
+    return result;
+}
+
+
+// data is copied into single bytes object - zero-copy access to buffered
+// data is provided by buffer protocol
+static PyObject *RingBuffer_read_views(RingBuffer *self, PyObject *args,
+                                       PyObject *kwargs) {
+    PyObject *data = RingBuffer_read(self, args, kwargs);
+    if (!data)
+        return NULL;
+
+    if (!PyBytes_GET_SIZE(data)) {
+        Py_DECREF(data);
+        return PyList_New(0);
+    }
+
+    PyObject *view = PyMemoryView_FromObject(data);
+    Py_DECREF(data);
+    if (!view)
+        return NULL;
+
+    PyObject *result = PyList_New(1);
+    if (!result) {
+        Py_DECREF(view);
+        return NULL;
+    }
+
+    PyList_SET_ITEM(result, 0, view);
+    return result;
+}
+
+
+static PyObject *RingBuffer_readinto(RingBuffer *self, PyObject *arg) {
+    if (check_exports(self))
+        return NULL;
+
+    Py_buffer buf;
+    if (PyObject_GetBuffer(arg, &buf, PyBUF_WRITABLE | PyBUF_C_CONTIGUOUS))
+        return NULL;
+
+    size_t len = hat_ring_read(self->ring, buf.buf, buf.len);
+
+    PyBuffer_Release(&buf);
+    return PyLong_FromSize_t(len);
+}
+
+
+static PyObject *RingBuffer_peek(RingBuffer *self, PyObject *args,
+                                 PyObject *kwargs) {
+    static char *kwlist[] = {"n", NULL};
+    Py_ssize_t n = -1;
+    if (!PyArg_ParseTupleAndKeywords(args, kwargs, "|n", kwlist, &n))
+        return NULL;
+
+    uint8_t *data[2];
+    size_t data_len[2];
+    get_used(self, data, data_len);
+
+    size_t len = normalize_len(self, n);
+
+    PyObject *result = PyBytes_FromStringAndSize(NULL, len);
+    if (!result)
+        return NULL;
+
+    copy_used(data, data_len, 0, (uint8_t *)PyBytes_AS_STRING(result), len);
+    return result;
+}
+
+
+static PyObject *RingBuffer_peek_uint(RingBuffer *self, PyObject *args,
+                                      PyObject *kwargs) {
+    static char *kwlist[] = {"size", "byteorder", "offset", NULL};
+    Py_ssize_t size;
+    char *byteorder = "big";
+    Py_ssize_t offset = 0;
+
+    if (!PyArg_ParseTupleAndKeywords(args, kwargs, "n|sn", kwlist, &size,
+                                     &byteorder, &offset))
+        return NULL;
+
+    int little;
+    if (strcmp(byteorder, "big") == 0) {
+        little = 0;
+    } else if (strcmp(byteorder, "little") == 0) {
+        little = 1;
+    } else {
+        PyErr_SetString(PyExc_ValueError, "invalid byteorder");
+        return NULL;
+    }
+
+    if (size < 0 || offset < 0) {
+        PyErr_SetString(PyExc_ValueError, "invalid size or offset");
+        return NULL;
+    }
+
+    uint8_t *data[2];
+    size_t data_len[2];
+    size_t len = get_used(self, data, data_len);
+
+    if (len < (size_t)offset + size)
+        Py_RETURN_NONE;
+
+    if (size <= 8) {
+        unsigned long long value = 0;
+        for (Py_ssize_t i = 0; i < size; ++i) {
+            size_t pos = offset + (little ? size - i - 1 : i);
+            value = (value << 8) | get_byte(data, data_len, pos);
+        }
+        return PyLong_FromUnsignedLongLong(value);
+    }
+
+    PyObject *bytes = PyBytes_FromStringAndSize(NULL, size);
+    if (!bytes)
+        return NULL;
+
+    copy_used(data, data_len, offset, (uint8_t *)PyBytes_AS_STRING(bytes),
+              size);
+
+    PyObject *result = PyObject_CallMethod((PyObject *)&PyLong_Type,
+                                           "from_bytes", "Os", bytes,
+                                           byteorder);
+    Py_DECREF(bytes);
+    return result;
+}
+
+
+static PyObject *RingBuffer_find(RingBuffer *self, PyObject *args,
+                                 PyObject *kwargs) {
+    static char *kwlist[] = {"sep", "start", NULL};
+    Py_buffer sep;
+    Py_ssize_t start = 0;
+    if (!PyArg_ParseTupleAndKeywords(args, kwargs, "y*|n", kwlist, &sep,
+                                     &start))
+        return NULL;
+
+    if (!sep.len) {
+        PyBuffer_Release(&sep);
+        PyErr_SetString(PyExc_ValueError, "empty separator");
+        return NULL;
+    }
+
+    Py_ssize_t pos = find(self, sep.buf, sep.len, (start < 0 ? 0 : start));
+
+    PyBuffer_Release(&sep);
+    return PyLong_FromSsize_t(pos);
+}
+
+
+static PyObject *RingBuffer_readuntil(RingBuffer *self, PyObject *arg) {
+    Py_buffer sep;
+    if (PyObject_GetBuffer(arg, &sep, PyBUF_SIMPLE))
+        return NULL;
+
+    if (!sep.len) {
+        PyBuffer_Release(&sep);
+        PyErr_SetString(PyExc_ValueError, "empty separator");
+        return NULL;
+    }
+
+    Py_ssize_t pos = find(self, sep.buf, sep.len, 0);
+    Py_ssize_t sep_len = sep.len;
+    PyBuffer_Release(&sep);
+
+    if (pos < 0)
+        Py_RETURN_NONE;
+
+    if (check_exports(self))
+        return NULL;
+
+    PyObject *result = PyBytes_FromStringAndSize(NULL, pos + sep_len);
+    if (!result)
+        return NULL;
+
+    hat_ring_read(self->ring, (uint8_t *)PyBytes_AS_STRING(result),
+                  pos + sep_len);
+    return result;
+}
+
+
+static PyObject *RingBuffer_clear(RingBuffer *self, PyObject *args) {
+    if (check_exports(self))
+        return NULL;
+
+    size_t len = hat_ring_len(self->ring);
+    hat_ring_move_head(self->ring, len);
+    return PyLong_FromSize_t(len);
+}
+
+
+static int RingBuffer_getbuffer(RingBuffer *self, Py_buffer *view,
+                                int flags) {
+    if (flags & PyBUF_WRITABLE) {
+        PyErr_SetString(PyExc_BufferError, "read-only buffer");
+        view->obj = NULL;
+        return -1;
+    }
+
+    uint8_t *data[2];
+    size_t data_len[2];
+    size_t len = get_used(self, data, data_len);
+
+    if (data_len[1]) {
+        if (self->exports) {
+            PyErr_SetString(PyExc_BufferError, "existing exports of data");
+            view->obj = NULL;
+            return -1;
+        }
+
+        hat_ring_t *ring =
+            hat_ring_create(&hat_py_allocator, hat_ring_size(self->ring));
+        if (!ring) {
+            PyErr_NoMemory();
+            view->obj = NULL;
+            return -1;
+        }
+
+        hat_ring_write(ring, data[0], data_len[0]);
+        hat_ring_write(ring, data[1], data_len[1]);
+        hat_ring_destroy(self->ring);
+        self->ring = ring;
+
+        get_used(self, data, data_len);
+    }
+
+    if (PyBuffer_FillInfo(view, (PyObject *)self, data[0], len, 1, flags))
+        return -1;
+
+    self->exports += 1;
+    return 0;
+}
+
+
+static void RingBuffer_releasebuffer(RingBuffer *self, Py_buffer *view) {
+    self->exports -= 1;
+}
+
+
+static PyMethodDef RingBuffer_methods[] = {
+    {"write", (PyCFunction)RingBuffer_write, METH_O,
+     "Write as much data as possible and return number of written bytes"},
+    {"add", (PyCFunction)RingBuffer_add, METH_O,
+     "Add data (ValueError is raised if there is not enough space)"},
+    {"read", (PyCFunction)(void (*)(void))RingBuffer_read,
+     METH_VARARGS | METH_KEYWORDS,
+     "Read up to `n` bytes (all data if ``n < 0``)"},
+    {"read_views", (PyCFunction)(void (*)(void))RingBuffer_read_views,
+     METH_VARARGS | METH_KEYWORDS,
+     "Read up to `n` bytes as list of memoryviews (data is copied)"},
+    {"readinto", (PyCFunction)RingBuffer_readinto, METH_O,
+     "Read data into writable buffer and return number of read bytes"},
+    {"peek", (PyCFunction)(void (*)(void))RingBuffer_peek,
+     METH_VARARGS | METH_KEYWORDS,
+     "Get up to `n` bytes without reading them"},
+    {"peek_uint", (PyCFunction)(void (*)(void))RingBuffer_peek_uint,
+     METH_VARARGS | METH_KEYWORDS,
+     "Get unsigned integer without reading it"},
+    {"find", (PyCFunction)(void (*)(void))RingBuffer_find,
+     METH_VARARGS | METH_KEYWORDS,
+     "Find position of first occurrence of separator"},
+    {"readuntil", (PyCFunction)RingBuffer_readuntil, METH_O,
+     "Read data up to and including first occurrence of separator"},
+    {"clear", (PyCFunction)RingBuffer_clear, METH_NOARGS,
+     "Clear data and return number of bytes cleared"},
+    {NULL}};
+
+static PyGetSetDef RingBuffer_getset[] = {
+    {"size", (getter)RingBuffer_get_size, NULL, "Maximum number of bytes",
+     NULL},
+    {NULL}};
+
+static PyType_Slot RingBuffer_slots[] = {
+    {Py_tp_new, RingBuffer_new},
+    {Py_tp_dealloc, RingBuffer_dealloc},
+    {Py_tp_methods, RingBuffer_methods},
+    {Py_tp_getset, RingBuffer_getset},
+    {Py_sq_length, RingBuffer_len},
+    {Py_bf_getbuffer, RingBuffer_getbuffer},
+    {Py_bf_releasebuffer, RingBuffer_releasebuffer},
+    {Py_tp_doc, "Bounded bytes buffer based on hat_ring_t\n\n"
+                "Buffer protocol exposes read-only contiguous view of all "
+                "buffered data.\n"},
+    {0, NULL}};
+
+static PyType_Spec RingBuffer_spec = {.name = "hat.util._ring.RingBuffer",
+                                      .basicsize = sizeof(RingBuffer),
+                                      .flags = Py_TPFLAGS_DEFAULT,
+                                      .slots = RingBuffer_slots};
+
+
+static int module_exec(PyObject *module) {
+    PyObject *type = PyType_FromSpec(&RingBuffer_spec);
+    if (!type)
+        return -1;
+
+    if (PyModule_AddObject(module, "RingBuffer", type)) {
+        Py_DECREF(type);
+        return -1;
+    }
+
+    return 0;
+}
+
+
+static PyModuleDef_Slot module_slots[] = {{Py_mod_exec, module_exec},
+                                          {0, NULL}};
+
+static struct PyModuleDef module_def = {.m_base = PyModuleDef_HEAD_INIT,
+                                        .m_name = "_ring",
+                                        .m_slots = module_slots};
+
+
+PyMODINIT_FUNC PyInit__ring() { return PyModuleDef_Init(&module_def); }
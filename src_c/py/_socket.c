@@ -0,0 +1,247 @@
+#include <Python.h>
+
+#include "hat/socket.h"
+
+#ifdef _WIN32
+#define SET_SOCKET_ERROR() PyErr_SetExcFromWindowsErr(PyExc_OSError, 0)
+#define IS_INTERRUPTED() (WSAGetLastError() == WSAEINTR)
+#else
+#define SET_SOCKET_ERROR() PyErr_SetFromErrno(PyExc_OSError)
+#define IS_INTERRUPTED() (errno == EINTR)
+#endif
+
+
+static int get_socket(PyObject *fd, hat_socket_t *s) {
+    long long value = PyLong_AsLongLong(fd);
+    if (value == -1 && PyErr_Occurred())
+        return -1;
+
+    *s = (hat_socket_t){.type = HAT_SOCKET_TYPE_IP4_UDP, .socket = value};
+    return 0;
+}
+
+
+static PyObject *get_addr(hat_socket_ip4_addr_t host, hat_socket_port_t port) {
+    struct in_addr addr = {.s_addr = htonl(host)};
+    char host_str[INET_ADDRSTRLEN];
+
+    if (!inet_ntop(AF_INET, &addr, host_str, sizeof(host_str)))
+        return SET_SOCKET_ERROR();
+
+    return Py_BuildValue("(sH)", host_str, port);
+}
+
+
+static int parse_addr(PyObject *addr, hat_socket_ip4_addr_t *host,
+                      hat_socket_port_t *port) {
+    char *host_str;
+    int port_value;
+
+    if (!PyArg_ParseTuple(addr, "si", &host_str, &port_value))
+        return -1;
+
+    if (port_value < 0 || port_value > 0xFFFF) {
+        PyErr_SetString(PyExc_OverflowError, "port must be 0-65535.");
+        return -1;
+    }
+
+    // ValueError signals caller to send messages with socket.sendto (which
+    // also resolves host names)
+    if (hat_socket_addr_convert(host_str, host)) {
+        PyErr_SetString(PyExc_ValueError, "invalid IPv4 address");
+        return -1;
+    }
+
+    *port = port_value;
+    return 0;
+}
+
+
+static PyObject *send_batch(PyObject *self, PyObject *args) {
+    PyObject *fd;
+    PyObject *msgs_arg;
+    if (!PyArg_ParseTuple(args, "OO", &fd, &msgs_arg))
+        return NULL;
+
+    hat_socket_t s;
+    if (get_socket(fd, &s))
+        return NULL;
+
+    PyObject *msgs_seq = PySequence_Fast(msgs_arg, "msgs must be sequence");
+    if (!msgs_seq)
+        return NULL;
+
+    Py_ssize_t msgs_len = PySequence_Fast_GET_SIZE(msgs_seq);
+    Py_buffer *views =
+        PyMem_Calloc(msgs_len ? msgs_len : 1, sizeof(Py_buffer));
+    hat_socket_msg_t *msgs =
+        PyMem_Calloc(msgs_len ? msgs_len : 1, sizeof(hat_socket_msg_t));
+    Py_ssize_t views_len = 0;
+    PyObject *result = NULL;
+
+    if (!views || !msgs) {
+        PyErr_NoMemory();
+        goto cleanup;
+    }
+
+    for (; views_len < msgs_len; ++views_len) {
+        PyObject *data;
+        PyObject *addr;
+        PyObject *msg = PySequence_Fast_GET_ITEM(msgs_seq, views_len);
+        if (!PyArg_ParseTuple(msg, "OO", &data, &addr))
+            goto cleanup;
+
+        hat_socket_msg_t *m = msgs + views_len;
+        if (parse_addr(addr, &(m->host), &(m->port)))
+            goto cleanup;
+
+        if (PyObject_GetBuffer(data, views + views_len, PyBUF_SIMPLE))
+            goto cleanup;
+
+        m->data = (hat_buff_t){.data = views[views_len].buf,
+                               .size = views[views_len].len,
+                               .pos = 0};
+    }
+
+    size_t count = 0;
+    int status;
+
+    // interrupted calls are retried after signal handlers are run (PEP 475)
+    for (;;) {
+        Py_BEGIN_ALLOW_THREADS;
+        status = hat_socket_send_batch(&s, msgs, msgs_len, &count);
+        Py_END_ALLOW_THREADS;
+
+        if (!status || !IS_INTERRUPTED())
+            break;
+
+        if (PyErr_CheckSignals())
+            goto cleanup;
+    }
+
+    if (status) {
+        SET_SOCKET_ERROR();
+        goto cleanup;
+    }
+
+    result = PyLong_FromSize_t(count);
+
+cleanup:
+    for (Py_ssize_t i = 0; i < views_len; ++i)
+        PyBuffer_Release(views + i);
+    PyMem_Free(views);
+    PyMem_Free(msgs);
+    Py_DECREF(msgs_seq);
+    return result;
+}
+
+
+static PyObject *receive_batch(PyObject *self, PyObject *args) {
+    PyObject *fd;
+    Py_ssize_t max_count;
+    Py_ssize_t max_size;
+    if (!PyArg_ParseTuple(args, "Onn", &fd, &max_count, &max_size))
+        return NULL;
+
+    hat_socket_t s;
+    if (get_socket(fd, &s))
+        return NULL;
+
+    if (max_count < 1 || max_size < 1) {
+        PyErr_SetString(PyExc_ValueError, "invalid arguments");
+        return NULL;
+    }
+
+    PyObject **items = PyMem_Calloc(max_count, sizeof(PyObject *));
+    hat_socket_msg_t *msgs = PyMem_Calloc(max_count, sizeof(hat_socket_msg_t));
+    PyObject *result = NULL;
+
+    if (!items || !msgs) {
+        PyErr_NoMemory();
+        goto cleanup;
+    }
+
+    // data is received directly into bytes objects which are resized
+    // afterwards - max_count * max_size bytes are allocated regardless of
+    // number of received datagrams
+    for (Py_ssize_t i = 0; i < max_count; ++i) {
+        items[i] = PyBytes_FromStringAndSize(NULL, max_size);
+        if (!items[i])
+            goto cleanup;
+
+        msgs[i].data = (hat_buff_t){
+            .data = (uint8_t *)PyBytes_AS_STRING(items[i]),
+            .size = max_size,
+            .pos = 0};
+    }
+
+    size_t count = 0;
+    int status;
+
+    // interrupted calls are retried after signal handlers are run (PEP 475)
+    for (;;) {
+        Py_BEGIN_ALLOW_THREADS;
+        status = hat_socket_receive_batch(&s, msgs, max_count, &count);
+        Py_END_ALLOW_THREADS;
+
+        if (!status || !IS_INTERRUPTED())
+            break;
+
+        if (PyErr_CheckSignals())
+            goto cleanup;
+    }
+
+    if (status) {
+        SET_SOCKET_ERROR();
+        goto cleanup;
+    }
+
+    result = PyList_New(count);
+    if (!result)
+        goto cleanup;
+
+    for (size_t i = 0; i < count; ++i) {
+        if (_PyBytes_Resize(items + i, msgs[i].data.pos))
+            goto error;
+
+        PyObject *addr = get_addr(msgs[i].host, msgs[i].port);
+        if (!addr)
+            goto error;
+
+        PyObject *item = PyTuple_Pack(2, items[i], addr);
+        Py_DECREF(addr);
+        if (!item)
+            goto error;
+
+        PyList_SET_ITEM(result, i, item);
+    }
+
+    goto cleanup;
+
+error:
+    Py_CLEAR(result);
+
+cleanup:
+    if (items) {
+        for (Py_ssize_t i = 0; i < max_count; ++i)
+            Py_XDECREF(items[i]);
+    }
+    PyMem_Free(items);
+    PyMem_Free(msgs);
+    return result;
+}
+
+
+static PyMethodDef module_methods[] = {
+    {"send_batch", (PyCFunction)send_batch, METH_VARARGS,
+     "Send datagrams to addresses"},
+    {"receive_batch", (PyCFunction)receive_batch, METH_VARARGS,
+     "Receive datagrams"},
+    {NULL}};
+
+static struct PyModuleDef module_def = {.m_base = PyModuleDef_HEAD_INIT,
+                                        .m_name = "_socket",
+                                        .m_methods = module_methods};
+
+
+PyMODINIT_FUNC PyInit__socket() { return PyModuleDef_Init(&module_def); }
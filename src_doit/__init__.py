@@ -3,7 +3,13 @@ import subprocess
 import tempfile
 
 from hat.doit import common
-from hat.doit.c import get_task_clang_format
+from hat.doit.c import (get_exe_suffix,
+                        get_py_ext_suffix,
+                        get_py_c_flags,
+                        get_py_ld_flags,
+                        get_py_ld_libs,
+                        get_task_clang_format,
+                        CBuild)
 from hat.doit.docs import (build_sphinx,
                            build_pdoc)
 from hat.doit.js import (get_task_build_npm,
@@ -11,6 +17,7 @@ from hat.doit.js import (get_task_build_npm,
                          run_eslint)
 from hat.doit.py import (get_task_build_wheel,
                          get_task_run_pytest,
+                         get_py_versions,
                          run_flake8)
 
 
@@ -20,6 +27,24 @@ __all__ = ['task_clean_all',
            'task_build_py',
            'task_build_js',
            'task_build_ts',
+           'task_build_ext',
+           'task_ring',
+           'task_ring_obj',
+           'task_ring_dep',
+           'task_bytes_map',
+           'task_bytes_map_obj',
+           'task_bytes_map_dep',
+           'task_socket',
+           'task_socket_obj',
+           'task_socket_dep',
+           'task_bench_ht',
+           'task_bench_ht_exe',
+           'task_bench_ht_obj',
+           'task_bench_ht_dep',
+           'task_bench_allocator',
+           'task_bench_allocator_exe',
+           'task_bench_allocator_obj',
+           'task_bench_allocator_dep',
            'task_test',
            'task_test_pytest',
            'task_test_jest',
@@ -40,6 +65,60 @@ build_py_dir = build_dir / 'py'
 build_js_dir = build_dir / 'js'
 build_ts_dir = build_dir / 'ts'
 build_docs_dir = build_dir / 'docs'
+build_c_dir = build_dir / 'c'
+
+py_ext_suffix = get_py_ext_suffix()
+
+ring_path = src_py_dir / f'hat/util/_ring{py_ext_suffix}'
+bytes_map_path = src_py_dir / f'hat/util/_bytes_map{py_ext_suffix}'
+socket_path = src_py_dir / f'hat/util/_socket{py_ext_suffix}'
+bench_ht_path = build_c_dir / f'bench/ht{get_exe_suffix()}'
+bench_allocator_path = build_c_dir / f'bench/allocator{get_exe_suffix()}'
+
+_ring_build = CBuild(
+    src_paths=[src_c_dir / 'hat/ring.c',
+               src_c_dir / 'hat/py_allocator.c',
+               src_c_dir / 'py/_ring.c'],
+    build_dir=build_c_dir / 'ring',
+    c_flags=['-fPIC', '-O2', f'-I{src_c_dir}', *get_py_c_flags()],
+    ld_flags=[*get_py_ld_flags()],
+    ld_libs=[*get_py_ld_libs()])
+
+_bytes_map_build = CBuild(
+    src_paths=[src_c_dir / 'hat/ht.c',
+               src_c_dir / 'hat/py_allocator.c',
+               src_c_dir / 'py/_bytes_map.c'],
+    build_dir=build_c_dir / 'bytes_map',
+    c_flags=['-fPIC', '-O2', f'-I{src_c_dir}', *get_py_c_flags()],
+    ld_flags=[*get_py_ld_flags()],
+    ld_libs=[*get_py_ld_libs()])
+
+_socket_build = CBuild(
+    src_paths=[src_c_dir / 'hat/socket.c',
+               src_c_dir / 'py/_socket.c'],
+    build_dir=build_c_dir / 'socket',
+    c_flags=['-fPIC', '-O2', f'-I{src_c_dir}', *get_py_c_flags()],
+    ld_flags=[*get_py_ld_flags()],
+    ld_libs=[*get_py_ld_libs(),
+             *(['-lws2_32']
+               if common.target_platform == common.Platform.WINDOWS_AMD64
+               else [])])
+
+_bench_ht_build = CBuild(
+    src_paths=[src_c_dir / 'hat/ht.c',
+               src_c_dir / 'hat/libc_allocator.c',
+               src_c_dir / 'bench/ht.c'],
+    build_dir=build_c_dir / 'bench_ht',
+    c_flags=['-O2', f'-I{src_c_dir}'])
+
+_bench_allocator_build = CBuild(
+    src_paths=[src_c_dir / 'hat/ht.c',
+               src_c_dir / 'hat/libc_allocator.c',
+               src_c_dir / 'hat/arena_allocator.c',
+               src_c_dir / 'hat/pool_allocator.c',
+               src_c_dir / 'bench/allocator.c'],
+    build_dir=build_c_dir / 'bench_allocator',
+    c_flags=['-O2', f'-I{src_c_dir}'])
 
 
 def task_clean_all():
@@ -62,7 +141,11 @@ def task_build():
 def task_build_py():
     """Build Python wheel"""
     return get_task_build_wheel(src_dir=src_py_dir,
-                                build_dir=build_py_dir)
+                                build_dir=build_py_dir,
+                                py_versions=get_py_versions(None),
+                                platform=common.target_platform,
+                                is_purelib=False,
+                                task_dep=['build_ext'])
 
 
 def task_build_js():
@@ -85,6 +168,113 @@ def task_build_ts():
             'task_dep': ['node_modules']}
 
 
+def task_build_ext():
+    """Build Python C extensions"""
+    return {'actions': None,
+            'task_dep': ['ring',
+                         'bytes_map',
+                         'socket']}
+
+
+def task_ring():
+    """Build ring"""
+    yield from _ring_build.get_task_lib(ring_path)
+
+
+def task_ring_obj():
+    """Build ring .o files"""
+    yield from _ring_build.get_task_objs()
+
+
+def task_ring_dep():
+    """Build ring .d files"""
+    yield from _ring_build.get_task_deps()
+
+
+def task_bytes_map():
+    """Build bytes_map"""
+    yield from _bytes_map_build.get_task_lib(bytes_map_path)
+
+
+def task_bytes_map_obj():
+    """Build bytes_map .o files"""
+    yield from _bytes_map_build.get_task_objs()
+
+
+def task_bytes_map_dep():
+    """Build bytes_map .d files"""
+    yield from _bytes_map_build.get_task_deps()
+
+
+def task_socket():
+    """Build socket"""
+    yield from _socket_build.get_task_lib(socket_path)
+
+
+def task_socket_obj():
+    """Build socket .o files"""
+    yield from _socket_build.get_task_objs()
+
+
+def task_socket_dep():
+    """Build socket .d files"""
+    yield from _socket_build.get_task_deps()
+
+
+def task_bench_ht():
+    """Run hash table benchmark"""
+
+    def run(args):
+        subprocess.run([str(bench_ht_path), *(args or [])],
+                       check=True)
+
+    return {'actions': [run],
+            'pos_arg': 'args',
+            'task_dep': ['bench_ht_exe']}
+
+
+def task_bench_ht_exe():
+    """Build hash table benchmark"""
+    yield from _bench_ht_build.get_task_exe(bench_ht_path)
+
+
+def task_bench_ht_obj():
+    """Build hash table benchmark .o files"""
+    yield from _bench_ht_build.get_task_objs()
+
+
+def task_bench_ht_dep():
+    """Build hash table benchmark .d files"""
+    yield from _bench_ht_build.get_task_deps()
+
+
+def task_bench_allocator():
+    """Run allocator benchmark"""
+
+    def run(args):
+        subprocess.run([str(bench_allocator_path), *(args or [])],
+                       check=True)
+
+    return {'actions': [run],
+            'pos_arg': 'args',
+            'task_dep': ['bench_allocator_exe']}
+
+
+def task_bench_allocator_exe():
+    """Build allocator benchmark"""
+    yield from _bench_allocator_build.get_task_exe(bench_allocator_path)
+
+
+def task_bench_allocator_obj():
+    """Build allocator benchmark .o files"""
+    yield from _bench_allocator_build.get_task_objs()
+
+
+def task_bench_allocator_dep():
+    """Build allocator benchmark .d files"""
+    yield from _bench_allocator_build.get_task_deps()
+
+
 def task_test():
     """Test"""
     return {'actions': None,
@@ -94,7 +284,7 @@ def task_test():
 
 def task_test_pytest():
     """Test pytest"""
-    return get_task_run_pytest()
+    return get_task_run_pytest(task_dep=['build_ext'])
 
 
 def task_test_jest():
@@ -120,8 +310,8 @@ def task_check():
 
 def task_format():
     """Format"""
-    yield from get_task_clang_format([*Path('src_c/hat').rglob('*.c'),
-                                      *Path('src_c/hat').rglob('*.h')])
+    yield from get_task_clang_format([*src_c_dir.rglob('*.c'),
+                                      *src_c_dir.rglob('*.h')])
 
 
 def task_docs():
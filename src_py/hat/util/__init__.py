@@ -2,25 +2,75 @@
 
 from hat.util import cron
 from hat.util.bytes import (Bytes,
-                            BytesBuffer)
+                            BytesBufferStats,
+                            BytesBuffer,
+                            SpscBytesBuffer,
+                            RingBuffer,
+                            BytesMap)
 from hat.util.callback import (RegisterCallbackHandle,
                                ExceptionCb,
-                               CallbackRegistry)
+                               SlowCb,
+                               CallbackStats,
+                               Topic,
+                               TopicPattern,
+                               CallbackRegistry,
+                               BatchCallbackRegistry,
+                               TopicCallbackRegistry)
 from hat.util.first import first
+from hat.util.json import (JsonToken,
+                           JsonEvent,
+                           JsonArrayDecoder,
+                           JsonEventDecoder,
+                           decode_json_array)
 from hat.util.socket import (get_unused_tcp_port,
-                             get_unused_udp_port)
+                             get_unused_udp_port,
+                             socket_sendv,
+                             socket_recvv,
+                             socket_send_batch,
+                             socket_recv_batch)
 from hat.util.sqlite3 import (sqlite3_adapt_datetime,
-                              sqlite3_convert_timestamp)
+                              sqlite3_convert_timestamp,
+                              sqlite3_adapt_datetime_us,
+                              sqlite3_convert_timestamp_us,
+                              sqlite3_register_timestamp,
+                              sqlite3_migrate_timestamp_us,
+                              sqlite3_connect,
+                              sqlite3_insert_many)
 
 
 __all__ = ['cron',
            'Bytes',
+           'BytesBufferStats',
            'BytesBuffer',
+           'SpscBytesBuffer',
+           'RingBuffer',
+           'BytesMap',
            'RegisterCallbackHandle',
            'ExceptionCb',
+           'SlowCb',
+           'CallbackStats',
+           'Topic',
+           'TopicPattern',
            'CallbackRegistry',
+           'BatchCallbackRegistry',
+           'TopicCallbackRegistry',
            'first',
+           'JsonToken',
+           'JsonEvent',
+           'JsonArrayDecoder',
+           'JsonEventDecoder',
+           'decode_json_array',
            'get_unused_tcp_port',
            'get_unused_udp_port',
+           'socket_sendv',
+           'socket_recvv',
+           'socket_send_batch',
+           'socket_recv_batch',
            'sqlite3_adapt_datetime',
-           'sqlite3_convert_timestamp']
+           'sqlite3_convert_timestamp',
+           'sqlite3_adapt_datetime_us',
+           'sqlite3_convert_timestamp_us',
+           'sqlite3_register_timestamp',
+           'sqlite3_migrate_timestamp_us',
+           'sqlite3_connect',
+           'sqlite3_insert_many']
@@ -1,32 +1,165 @@
+import asyncio
 import collections
+import collections.abc
+import re
 import typing
 
+try:
+    from hat.util import _ring
+except ImportError:
+    _ring = None
+
+try:
+    from hat.util import _bytes_map
+except ImportError:
+    _bytes_map = None
+
 
 Bytes: typing.TypeAlias = bytes | bytearray | memoryview
 
 
+class BytesBufferStats(typing.NamedTuple):
+    """Bytes buffer statistics"""
+
+    size: int
+    """current number of bytes"""
+    peak_size: int
+    """maximum number of bytes since buffer creation"""
+    chunk_count: int
+    """current number of stored chunks"""
+
+
 class BytesBuffer:
     """Bytes buffer
 
     All data added to BytesBuffer is considered immutable - it's content
     (including size) should not be modified.
 
+    Data is stored as sequence of added chunks. Data is copied only when
+    contiguous result spanning multiple chunks is required (`read`, `peek`
+    and `readinto`) - `read_views` returns added chunks (or their slices)
+    without copying.
+
+    Optional `high_watermark` and `low_watermark` provide flow control
+    between producer and consumer. Adding data is never restricted, but
+    once buffer size exceeds `high_watermark`, buffer is no longer
+    `writable` until its size drops to `low_watermark` or below. Producer can
+    wait for buffer to become writable with `drain`. If only
+    `high_watermark` is provided, `low_watermark` defaults to quarter of
+    `high_watermark`.
+
+    If `coalesce_size` is greater than ``0``, added data of at most
+    `coalesce_size` bytes is copied into tail chunk (`bytearray`) instead of
+    being stored as separate chunk. Tail chunk grows up to `coalesce_limit`
+    bytes, after which new tail chunk is started. This keeps number of
+    stored chunks proportional to number of buffered bytes when data is
+    added in many small pieces. Tail chunk is sealed (no further data is
+    appended to it) once it is referenced by result of read or peek
+    operation.
+
     """
 
-    def __init__(self):
+    def __init__(self,
+                 high_watermark: int | None = None,
+                 low_watermark: int | None = None,
+                 coalesce_size: int = 0,
+                 coalesce_limit: int = 4096):
+        if high_watermark is None:
+            if low_watermark is not None:
+                raise ValueError('low watermark without high watermark')
+
+        else:
+            if low_watermark is None:
+                low_watermark = high_watermark // 4
+
+            if not (0 <= low_watermark <= high_watermark):
+                raise ValueError('invalid watermarks')
+
         self._data = collections.deque()
         self._data_len = 0
+        self._read_len = 0
+        self._find_cache = None
+        self._high_watermark = high_watermark
+        self._low_watermark = low_watermark
+        self._writable = True
+        self._drain_futures = collections.deque()
+        self._peak_len = 0
+        self._coalesce_size = coalesce_size
+        self._coalesce_limit = coalesce_limit
+        self._tail = None
 
     def __len__(self):
         return self._data_len
 
+    @property
+    def high_watermark(self) -> int | None:
+        """High watermark"""
+        return self._high_watermark
+
+    @property
+    def low_watermark(self) -> int | None:
+        """Low watermark"""
+        return self._low_watermark
+
+    @property
+    def writable(self) -> bool:
+        """Is buffer size below high watermark"""
+        return self._writable
+
+    @property
+    def stats(self) -> BytesBufferStats:
+        """Buffer statistics"""
+        return BytesBufferStats(size=self._data_len,
+                                peak_size=self._peak_len,
+                                chunk_count=len(self._data))
+
     def add(self, data: Bytes):
         """Add data"""
         if not data:
             return
 
+        data_len = len(data)
+
+        if data_len > self._coalesce_size:
+            self._data.append(data)
+            self._tail = None
+
+        elif (self._tail is None or
+                len(self._tail) + data_len > self._coalesce_limit):
+            self._tail = bytearray(data)
+            self._data.append(self._tail)
+
+        else:
+            self._tail.extend(data)
+
+        self._data_len += data_len
+
+        if self._data_len > self._peak_len:
+            self._peak_len = self._data_len
+
+        if (self._writable and
+                self._high_watermark is not None and
+                self._data_len > self._high_watermark):
+            self._writable = False
+
+    async def drain(self):
+        """Wait until buffer is writable"""
+        if self._writable:
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        self._drain_futures.append(future)
+        await future
+
+    def compact(self):
+        """Join all stored chunks into single chunk"""
+        if len(self._data) < 2:
+            return
+
+        data = bytearray().join(self._data)
+        self._data.clear()
         self._data.append(data)
-        self._data_len += len(data)
+        self._tail = data if len(data) < self._coalesce_limit else None
 
     def read(self, n: int = -1) -> Bytes:
         """Read up to `n` bytes
@@ -34,34 +167,347 @@ class BytesBuffer:
         If ``n < 0``, read all data.
 
         """
+        data = self._pop(n)
+
+        if len(data) < 1:
+            return b''
+
+        if len(data) < 2:
+            return data[0]
+
+        return bytearray().join(data)
+
+    def read_views(self, n: int = -1) -> list[memoryview]:
+        """Read up to `n` bytes as list of memoryviews
+
+        If ``n < 0``, read all data.
+
+        Resulting memoryviews reference added data without copying. Result
+        can be used as argument for functions accepting multiple buffers
+        (e.g. `socket.socket.sendmsg` or `asyncio.WriteTransport.writelines`).
+
+        """
+        return [memoryview(i) for i in self._pop(n)]
+
+    def readinto(self, buf: Bytes) -> int:
+        """Read data into writable buffer `buf`
+
+        Up to ``len(buf)`` bytes are read. Number of read bytes is returned.
+        If `buf` is not writable C-contiguous buffer, `TypeError` is raised
+        and no data is read.
+
+        """
+        buf = memoryview(buf)
+        if buf.readonly:
+            raise TypeError('buffer is not writable')
+
+        if not buf.c_contiguous:
+            raise TypeError('buffer is not C-contiguous')
+
+        buf = buf.cast('B')
+        buf_len = 0
+
+        for i in self._pop(len(buf)):
+            buf[buf_len:buf_len+len(i)] = i
+            buf_len += len(i)
+
+        return buf_len
+
+    def peek(self, n: int = -1) -> Bytes:
+        """Get up to `n` bytes without reading them
+
+        If ``n < 0``, get all data.
+
+        If requested data is contained in single chunk, it is returned
+        without copying.
+
+        """
+        if n < 0 or n > self._data_len:
+            n = self._data_len
+
         if n == 0:
             return b''
 
+        head = self._data[0]
+        if len(head) >= n:
+            if head is self._tail:
+                self._tail = None
+
+            return head if len(head) == n else memoryview(head)[:n]
+
+        data = bytearray(n)
+        data_len = 0
+
+        for i in self._data:
+            i = i if data_len + len(i) <= n else memoryview(i)[:n-data_len]
+            data[data_len:data_len+len(i)] = i
+            data_len += len(i)
+
+            if data_len >= n:
+                break
+
+        return data
+
+    def peek_uint(self,
+                  size: int,
+                  byteorder: typing.Literal['big', 'little'] = 'big',
+                  offset: int = 0
+                  ) -> int | None:
+        """Get unsigned integer without reading it
+
+        Integer is encoded with `size` bytes starting at `offset`. If buffer
+        doesn't contain enough data, ``None`` is returned.
+
+        """
+        if self._data_len < offset + size:
+            return
+
+        data = self.peek(offset + size)
+        if offset:
+            data = memoryview(data)[offset:]
+
+        return int.from_bytes(data, byteorder)
+
+    def find(self, sep: Bytes, start: int = 0) -> int:
+        """Find position of first occurrence of `sep`
+
+        Search starts at position `start`. If `sep` is not found, ``-1`` is
+        returned.
+
+        Separator is searched across chunk boundaries without joining
+        chunks. Result of search is remembered so that subsequent search for
+        the same separator (from the same or later position) continues from
+        previously searched data, even if some data was read in the
+        meantime.
+
+        """
+        if not sep:
+            raise ValueError('empty separator')
+
+        start = max(start, 0)
+        start_abs = self._read_len + start
+        from_abs = start_abs
+        search_abs = start_abs
+
+        cache = self._find_cache
+        if (cache and cache.sep == sep and
+                cache.from_abs <= start_abs < cache.searched_abs):
+            from_abs = cache.from_abs
+            search_abs = cache.searched_abs
+
+        pos = self._find(sep, search_abs - self._read_len)
+
+        if pos < 0:
+            searched = max(search_abs - self._read_len,
+                           self._data_len - len(sep) + 1)
+
+        else:
+            searched = pos
+
+        self._find_cache = _FindCache(sep=bytes(sep),
+                                      from_abs=from_abs,
+                                      searched_abs=self._read_len + searched)
+
+        return pos
+
+    def readuntil(self, sep: Bytes) -> Bytes | None:
+        """Read data up to and including first occurrence of `sep`
+
+        If `sep` is not found, no data is read and ``None`` is returned.
+
+        """
+        pos = self.find(sep)
+        if pos < 0:
+            return
+
+        return self.read(pos + len(sep))
+
+    def clear(self) -> int:
+        """Clear data and return number of bytes cleared"""
+        self._data.clear()
+        self._tail = None
+        data_len, self._data_len = self._data_len, 0
+        self._read_len += data_len
+
+        if not self._writable:
+            self._set_writable()
+
+        return data_len
+
+    def _set_writable(self):
+        self._writable = True
+
+        while self._drain_futures:
+            future = self._drain_futures.popleft()
+            if not future.done():
+                future.set_result(None)
+
+    def _find(self, sep, pos):
+        if pos >= self._data_len:
+            return -1
+
+        tail_len = len(sep) - 1
+        tail = b''
+        pattern = None
+        offset = 0
+
+        for chunk in self._data:
+            chunk_offset, offset = offset, offset + len(chunk)
+            if offset <= pos:
+                continue
+
+            chunk_start = max(pos - chunk_offset, 0)
+
+            if tail:
+                data = tail + bytes(memoryview(chunk)[:tail_len])
+                i = data.find(sep)
+                if i >= 0:
+                    return chunk_offset - len(tail) + i
+
+            # memoryviews (e.g. partially read chunks) are searched with
+            # regular expression which, unlike `bytes.find`, doesn't require
+            # copying of searched data
+            if isinstance(chunk, memoryview):
+                if pattern is None:
+                    pattern = re.compile(re.escape(bytes(sep)))
+
+                match = pattern.search(chunk.cast('B'), chunk_start)
+                i = match.start() if match else -1
+
+            else:
+                i = chunk.find(sep, chunk_start)
+
+            if i >= 0:
+                return chunk_offset + i
+
+            if tail_len:
+                tail_start = max(len(chunk) - tail_len, chunk_start)
+                tail = tail + bytes(memoryview(chunk)[tail_start:])
+                tail = tail[-tail_len:]
+
+        return -1
+
+    def _pop(self, n):
+        if n == 0:
+            return collections.deque()
+
         if n < 0 or n >= self._data_len:
             data, self._data = self._data, collections.deque()
-            data_len, self._data_len = self._data_len, 0
+            self._read_len += self._data_len
+            self._data_len = 0
+            self._tail = None
 
-        else:
-            data = collections.deque()
-            data_len = 0
+            if not self._writable:
+                self._set_writable()
+
+            return data
+
+        data = collections.deque()
+        data_len = 0
+
+        while data_len < n:
+            head = self._data.popleft()
+            self._data_len -= len(head)
+
+            if data_len + len(head) <= n:
+                data.append(head)
+                data_len += len(head)
+
+            else:
+                head = memoryview(head)
+                head1, head2 = head[:n-data_len], head[n-data_len:]
+
+                data.append(head1)
+                data_len += len(head1)
+
+                self._data.appendleft(head2)
+                self._data_len += len(head2)
+
+        self._read_len += data_len
+
+        if self._tail is not None and self._data[-1] is not self._tail:
+            self._tail = None
+
+        if not self._writable and self._data_len <= self._low_watermark:
+            self._set_writable()
+
+        return data
+
+
+class SpscBytesBuffer:
+    """Single producer single consumer bytes buffer
+
+    Buffer can be shared between one producer thread (calling `add`) and
+    one consumer (calling all other methods) without additional locking.
+    Producer and consumer each update only their own byte counter and
+    exchange chunks through `collections.deque` which supports thread-safe
+    appends and pops from opposite ends.
+
+    Consumer running in asyncio event loop can wait for data with `wait`.
+    Producer wakes waiting consumer with single
+    `asyncio.AbstractEventLoop.call_soon_threadsafe` call, which is
+    scheduled only when consumer is waiting and requested number of bytes
+    became available - adds while consumer is not waiting (or is already
+    notified) don't interact with event loop.
 
-            while data_len < n:
-                head = self._data.popleft()
-                self._data_len -= len(head)
+    As with `BytesBuffer`, added data should not be modified.
 
-                if data_len + len(head) <= n:
-                    data.append(head)
-                    data_len += len(head)
+    """
+
+    def __init__(self):
+        self._data = collections.deque()
+        self._head = None
+        self._added_len = 0
+        self._read_len = 0
+        self._loop = None
+        self._future = None
+        self._wait_len = None
+
+    def __len__(self):
+        return self._added_len - self._read_len
+
+    def add(self, data: Bytes):
+        """Add data (producer)"""
+        if not data:
+            return
+
+        self._data.append(data)
+        self._added_len += len(data)
+
+        wait_len = self._wait_len
+        if wait_len is None or self._added_len < wait_len:
+            return
+
+        self._wait_len = None
+        self._loop.call_soon_threadsafe(self._notify)
+
+    async def wait(self, n: int = 1):
+        """Wait until at least `n` bytes are available (consumer)"""
+        loop = asyncio.get_running_loop()
+
+        while len(self) < n:
+            self._loop = loop
+            self._future = loop.create_future()
+            self._wait_len = self._read_len + n
 
-                else:
-                    head = memoryview(head)
-                    head1, head2 = head[:n-data_len], head[n-data_len:]
+            if self._added_len >= self._wait_len:
+                self._wait_len = None
+                break
 
-                    data.append(head1)
-                    data_len += len(head1)
+            try:
+                await self._future
 
-                    self._data.appendleft(head2)
-                    self._data_len += len(head2)
+            finally:
+                self._wait_len = None
+                self._future = None
+
+    def read(self, n: int = -1) -> Bytes:
+        """Read up to `n` bytes (consumer)
+
+        If ``n < 0``, read all available data.
+
+        """
+        data = self._pop(n)
 
         if len(data) < 1:
             return b''
@@ -69,18 +515,279 @@ class BytesBuffer:
         if len(data) < 2:
             return data[0]
 
-        data_bytes = bytearray(data_len)
-        data_bytes_len = 0
+        return bytearray().join(data)
+
+    def read_views(self, n: int = -1) -> list[memoryview]:
+        """Read up to `n` bytes as list of memoryviews (consumer)
 
-        while data:
-            head = data.popleft()
-            data_bytes[data_bytes_len:data_bytes_len+len(head)] = head
-            data_bytes_len += len(head)
+        If ``n < 0``, read all available data.
 
-        return data_bytes
+        """
+        return [memoryview(i) for i in self._pop(n)]
+
+    def clear(self) -> int:
+        """Clear available data and return number of bytes cleared
+        (consumer)"""
+        return sum(len(i) for i in self._pop(-1))
+
+    def _notify(self):
+        if self._future and not self._future.done():
+            self._future.set_result(None)
+
+    def _pop(self, n):
+        data_len = self._added_len - self._read_len
+        if n < 0 or n > data_len:
+            n = data_len
+
+        data = []
+        data_len = 0
+
+        while data_len < n:
+            if self._head is not None:
+                chunk, self._head = self._head, None
+
+            else:
+                chunk = self._data.popleft()
+
+            if data_len + len(chunk) > n:
+                chunk = memoryview(chunk)
+                chunk, self._head = chunk[:n-data_len], chunk[n-data_len:]
+
+            data.append(chunk)
+            data_len += len(chunk)
+
+        self._read_len += data_len
+        return data
+
+
+class _RingBuffer(typing.Protocol):
+    """Interface shared by C and pure Python implementation of
+    `RingBuffer`"""
+
+    def __init__(self, size: int):
+        ...
+
+    def __len__(self) -> int:
+        ...
+
+    @property
+    def size(self) -> int:
+        """Maximum number of bytes"""
+
+    def add(self, data: Bytes, /):
+        """Add data
+
+        If there is not enough space, `ValueError` is raised.
+
+        """
+
+    def write(self, data: Bytes, /) -> int:
+        """Write as much data as possible and return number of written bytes"""
+
+    def read(self, n: int = -1) -> Bytes:
+        """Read up to `n` bytes
+
+        If ``n < 0``, read all data.
+
+        """
+
+    def read_views(self, n: int = -1) -> list[memoryview]:
+        """Read up to `n` bytes as list of memoryviews
+
+        If ``n < 0``, read all data.
+
+        """
+
+    def readinto(self, buf: Bytes, /) -> int:
+        """Read data into writable buffer `buf`
+
+        Up to ``len(buf)`` bytes are read. Number of read bytes is returned.
+
+        """
+
+    def peek(self, n: int = -1) -> Bytes:
+        """Get up to `n` bytes without reading them
+
+        If ``n < 0``, get all data.
+
+        """
+
+    def peek_uint(self,
+                  size: int,
+                  byteorder: typing.Literal['big', 'little'] = 'big',
+                  offset: int = 0
+                  ) -> int | None:
+        """Get unsigned integer without reading it"""
+
+    def find(self, sep: Bytes, start: int = 0) -> int:
+        """Find position of first occurrence of `sep`"""
+
+    def readuntil(self, sep: Bytes, /) -> Bytes | None:
+        """Read data up to and including first occurrence of `sep`"""
 
     def clear(self) -> int:
         """Clear data and return number of bytes cleared"""
-        self._data.clear()
-        data_len, self._data_len = self._data_len, 0
+
+
+class _PyRingBuffer(_RingBuffer):
+    """Bounded bytes buffer
+
+    Pure Python implementation of `RingBuffer` used if C extension is not
+    available. Data is stored in `BytesBuffer` (without copying) and
+    buffer protocol is not supported.
+
+    """
+
+    def __init__(self, size: int):
+        if size < 1:
+            raise ValueError('invalid size')
+
+        self._size = size
+        self._buff = BytesBuffer()
+
+    def __len__(self):
+        return len(self._buff)
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    def add(self, data, /):
+        if len(data) > self._size - len(self._buff):
+            raise ValueError('insufficient space')
+
+        self._buff.add(data)
+
+    def write(self, data, /):
+        data_len = min(len(data), self._size - len(self._buff))
+        if data_len < len(data):
+            data = memoryview(data)[:data_len]
+
+        self._buff.add(data)
         return data_len
+
+    def read(self, n=-1):
+        return self._buff.read(n)
+
+    def read_views(self, n=-1):
+        return self._buff.read_views(n)
+
+    def readinto(self, buf, /):
+        return self._buff.readinto(buf)
+
+    def peek(self, n=-1):
+        return self._buff.peek(n)
+
+    def peek_uint(self, size, byteorder='big', offset=0):
+        return self._buff.peek_uint(size, byteorder, offset)
+
+    def find(self, sep, start=0):
+        return self._buff.find(sep, start)
+
+    def readuntil(self, sep, /):
+        return self._buff.readuntil(sep)
+
+    def clear(self):
+        return self._buff.clear()
+
+
+RingBuffer: type[_RingBuffer] = (_ring.RingBuffer if _ring
+                                 else _PyRingBuffer)
+"""Bounded bytes buffer
+
+Buffer which can hold at most `size` bytes. It provides subset of
+`BytesBuffer` interface (without watermarks, statistics, `drain` and
+`compact`). Additionally, `RingBuffer.write` writes as much data as possible
+and returns number of written bytes.
+
+If C extension is available, data is copied into preallocated ring
+(``hat_ring_t``), which provides low per-call overhead for small
+reads and writes. C implementation also supports buffer protocol which
+provides read-only contiguous view of all buffered data - while view exists,
+data can not be read. Unlike `BytesBuffer`, `RingBuffer.read_views` of C
+implementation copies read data - buffer protocol should be used for
+zero-copy access.
+
+"""
+
+
+class _PyBytesMap(collections.abc.MutableMapping):
+    """Mapping with bytes keys
+
+    Pure Python implementation of `BytesMap` used if C extension is not
+    available. Data is stored in `dict` with `bytes` keys.
+
+    """
+
+    def __init__(self, data: typing.Any = (), /):
+        self._data = {}
+        self.update(data)
+
+    def __len__(self):
+        return len(self._data)
+
+    def __getitem__(self, key):
+        return self._data[_to_bytes(key)]
+
+    def __setitem__(self, key, value):
+        self._data[_to_bytes(key)] = value
+
+    def __delitem__(self, key):
+        del self._data[_to_bytes(key)]
+
+    def __contains__(self, key):
+        try:
+            return _to_bytes(key) in self._data
+
+        except TypeError:
+            return False
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def clear(self):
+        self._data.clear()
+
+
+if _bytes_map:
+
+    class _CBytesMap(_bytes_map.BytesMap, collections.abc.MutableMapping):
+        """Mapping with bytes keys
+
+        C implementation of `BytesMap`.
+
+        """
+
+        __slots__ = ()
+
+        def __init__(self, data: typing.Any = (), /):
+            self.update(data)
+
+
+BytesMap: type[collections.abc.MutableMapping[Bytes, typing.Any]] = (
+    _CBytesMap if _bytes_map else _PyBytesMap)
+"""Mapping with bytes keys
+
+Mutable mapping which accepts any `Bytes` as keys - keys are stored (and
+returned while iterating) as `bytes`.
+
+If C extension is available, mapping is implemented with hash table
+(``hat_ht_t``) which stores copies of keys inside table elements, without
+creating Python objects for keys. This significantly reduces memory usage
+of mappings with large number of small keys. Lookups with `memoryview` or
+`bytearray` keys don't copy key data. Modification of mapping during
+iteration raises `RuntimeError`.
+
+"""
+
+
+def _to_bytes(key):
+    # unlike bytes(key), memoryview accepts only objects supporting buffer
+    # protocol (same as C implementation)
+    return memoryview(key).tobytes()
+
+
+class _FindCache(typing.NamedTuple):
+    sep: bytes
+    from_abs: int
+    searched_abs: int
@@ -1,5 +1,9 @@
 from collections.abc import Callable
+import asyncio
+import inspect
+import time
 import typing
+import weakref
 
 
 class RegisterCallbackHandle(typing.NamedTuple):
@@ -18,6 +22,40 @@ class RegisterCallbackHandle(typing.NamedTuple):
 ExceptionCb: typing.TypeAlias = Callable[[Exception], None]
 """Exception callback"""
 
+SlowCb: typing.TypeAlias = Callable[[Callable, float], None]
+"""Slow callback handler
+
+Handler is called with slow callback and its call duration in seconds.
+
+"""
+
+
+class CallbackStats(typing.NamedTuple):
+    """Callback registration statistics."""
+
+    cb: Callable
+    """registered callback"""
+    call_count: int
+    """number of calls"""
+    exception_count: int
+    """number of calls which raised exception"""
+    total_duration: float
+    """cumulative call duration in seconds"""
+    max_duration: float
+    """maximum call duration in seconds"""
+
+
+Topic: typing.TypeAlias = tuple[str, ...]
+"""Topic"""
+
+TopicPattern: typing.TypeAlias = tuple[str, ...]
+"""Topic pattern
+
+Pattern segment ``'*'`` matches any single topic segment. Last pattern
+segment can be ``'**'`` which matches zero or more topic segments.
+
+"""
+
 
 class CallbackRegistry:
     """Registry that enables callback registration and notification.
@@ -28,6 +66,34 @@ class CallbackRegistry:
     subsequent callbacks is not interrupted. If handler is `None`, the
     exception is reraised and no subsequent callback is notified.
 
+    Callbacks are notified in order of registration. Each registration is
+    independent - same callback can be registered multiple times and
+    canceling one registration doesn't affect others. Callbacks registered
+    during notification are not notified until next notification, while
+    callbacks canceled during notification are not notified if they were
+    not already notified.
+
+    Callbacks can also be notified with `CallbackRegistry.notify_async`
+    which awaits awaitable results of callbacks (e.g. callbacks implemented
+    as coroutine functions) concurrently. Number of concurrently awaited
+    results can be limited with `concurrency_limit`.
+
+    Notification with `CallbackRegistry.notify` can be instrumented. If
+    `stats_enabled` is set, number of calls, number of exceptions and
+    call durations (measured with `time.perf_counter`) are collected for
+    each registration and can be obtained with `CallbackRegistry.get_stats`.
+    If `slow_cb_threshold` is set, `slow_cb` is called for each callback
+    call which lasted at least `slow_cb_threshold` seconds. Without
+    instrumentation, notification doesn't measure time.
+
+    Callbacks registered with `weak` flag are referenced with weak
+    references (for bound methods, including methods of builtin types,
+    instance is referenced weakly). Once such callback is garbage collected,
+    its registration is considered dead - it is removed from registry during
+    next notification. If callback (or instance of bound method) doesn't
+    support weak references (e.g. ``list().append``), `TypeError` is
+    raised.
+
     Example::
 
         x = []
@@ -48,20 +114,468 @@ class CallbackRegistry:
     """
 
     def __init__(self,
-                 exception_cb: ExceptionCb | None = None):
+                 exception_cb: ExceptionCb | None = None,
+                 concurrency_limit: int | None = None,
+                 stats_enabled: bool = False,
+                 slow_cb_threshold: float | None = None,
+                 slow_cb: SlowCb | None = None):
+        if concurrency_limit is not None and concurrency_limit < 1:
+            raise ValueError('invalid concurrency limit')
+
+        if (slow_cb_threshold is None) != (slow_cb is None):
+            raise ValueError('slow_cb_threshold and slow_cb should be '
+                             'provided together')
+
         self._exception_cb = exception_cb
-        self._cbs = []  # type: list[Callable]
+        self._concurrency_limit = concurrency_limit
+        self._stats = None  # type: dict[int, list] | None
+        self._slow_cb_threshold = slow_cb_threshold
+        self._slow_cb = slow_cb
+        self._instrumented = stats_enabled or slow_cb is not None
+        self._cbs = {}  # type: dict[int, Callable]
+        self._cbs_snapshot = ()  # type: tuple[tuple[int, Callable], ...]|None
+        self._last_cb_id = 0
+        self._dead_cb_ids = set()  # type: set[int]
+
+        if stats_enabled:
+            self._stats = {}
+
+    @property
+    def cb_count(self) -> int:
+        """Number of registered live callbacks"""
+        return len(self._cbs) - len(self._dead_cb_ids)
+
+    @property
+    def dead_cb_count(self) -> int:
+        """Number of weakly registered callbacks that are garbage collected
+        but not yet removed from registry"""
+        return len(self._dead_cb_ids)
 
     def register(self,
-                 cb: Callable
+                 cb: Callable,
+                 weak: bool = False
                  ) -> RegisterCallbackHandle:
         """Register a callback."""
-        self._cbs.append(cb)
-        return RegisterCallbackHandle(lambda: self._cbs.remove(cb))
+        self._last_cb_id += 1
+        cb_id = self._last_cb_id
+
+        if weak:
+            dead_cb_ids = self._dead_cb_ids
+
+            def on_dead(ref):
+                dead_cb_ids.add(cb_id)
+
+            if inspect.ismethod(cb):
+                cb = _WeakCb(weakref.ref(cb.__self__, on_dead), cb.__func__)
+
+            elif _is_builtin_method(cb):
+                func = getattr(type(cb.__self__), cb.__name__, None)
+                if func is None:
+                    raise TypeError('unsupported builtin method')
+
+                cb = _WeakCb(weakref.ref(cb.__self__, on_dead), func)
+
+            else:
+                cb = _WeakCb(weakref.ref(cb, on_dead))
+
+        self._cbs[cb_id] = cb
+        self._cbs_snapshot = None
+
+        return RegisterCallbackHandle(lambda: self._cancel(cb_id))
 
     def notify(self, *args, **kwargs):
         """Notify all registered callbacks."""
-        for cb in self._cbs:
+        if self._dead_cb_ids:
+            self._remove_dead()
+
+        cbs_snapshot = self._get_cbs_snapshot()
+
+        if self._instrumented:
+            self._notify_instrumented(cbs_snapshot, args, kwargs)
+            return
+
+        for cb_id, cb in cbs_snapshot:
+            if (cbs_snapshot is not self._cbs_snapshot and
+                    cb_id not in self._cbs):
+                continue
+
+            try:
+                cb(*args, **kwargs)
+            except Exception as e:
+                if self._exception_cb:
+                    self._exception_cb(e)
+                else:
+                    raise
+
+    def get_stats(self) -> list[CallbackStats]:
+        """Get statistics of current registrations.
+
+        Statistics are ordered by registration order. If statistics are not
+        enabled, `ValueError` is raised.
+
+        """
+        if self._stats is None:
+            raise ValueError('statistics not enabled')
+
+        result = []
+        for cb_id, cb in self._cbs.items():
+            if isinstance(cb, _WeakCb):
+                cb = cb.get_cb()
+                if cb is None:
+                    continue
+
+            stats = self._stats.get(cb_id)
+            result.append(CallbackStats(cb, *stats) if stats
+                          else CallbackStats(cb, 0, 0, 0.0, 0.0))
+
+        return result
+
+    async def notify_async(self, *args, **kwargs):
+        """Notify all registered callbacks and await their results.
+
+        Callbacks are called sequentially. Awaitable results are awaited
+        concurrently - if `concurrency_limit` is reached, calling of
+        subsequent callbacks is postponed until one of awaited results
+        completes. Exceptions raised by callbacks or their awaitable results
+        are handled same as in `CallbackRegistry.notify` - if `exception_cb`
+        is `None`, exception is reraised and all pending results are
+        canceled.
+
+        """
+        if self._dead_cb_ids:
+            self._remove_dead()
+
+        cbs_snapshot = self._get_cbs_snapshot()
+        futures = set()
+
+        try:
+            for cb_id, cb in cbs_snapshot:
+                if (cbs_snapshot is not self._cbs_snapshot and
+                        cb_id not in self._cbs):
+                    continue
+
+                try:
+                    result = cb(*args, **kwargs)
+                except Exception as e:
+                    if self._exception_cb:
+                        self._exception_cb(e)
+                        continue
+                    raise
+
+                if not inspect.isawaitable(result):
+                    continue
+
+                if (self._concurrency_limit is not None and
+                        len(futures) >= self._concurrency_limit):
+                    futures = await self._wait_futures(futures)
+
+                futures.add(asyncio.ensure_future(result))
+
+            while futures:
+                futures = await self._wait_futures(futures)
+
+        finally:
+            for future in futures:
+                future.cancel()
+
+    async def _wait_futures(self, futures):
+        done, pending = await asyncio.wait(
+            futures, return_when=asyncio.FIRST_COMPLETED)
+
+        for future in done:
+            e = future.exception()
+            if e is None:
+                continue
+
+            if not isinstance(e, Exception):
+                raise e
+
+            if self._exception_cb:
+                self._exception_cb(e)
+            else:
+                raise e
+
+        return pending
+
+    def _notify_instrumented(self, cbs_snapshot, args, kwargs):
+        for cb_id, cb in cbs_snapshot:
+            if (cbs_snapshot is not self._cbs_snapshot and
+                    cb_id not in self._cbs):
+                continue
+
+            start = time.perf_counter()
+
+            try:
+                cb(*args, **kwargs)
+            except Exception as e:
+                self._update_stats(cb_id, cb, start, True)
+                if self._exception_cb:
+                    self._exception_cb(e)
+                else:
+                    raise
+            else:
+                self._update_stats(cb_id, cb, start, False)
+
+    def _update_stats(self, cb_id, cb, start, failed):
+        duration = time.perf_counter() - start
+
+        if self._stats is not None and cb_id in self._cbs:
+            stats = self._stats.get(cb_id)
+            if stats is None:
+                stats = self._stats[cb_id] = [0, 0, 0.0, 0.0]
+
+            stats[0] += 1
+            stats[1] += failed
+            stats[2] += duration
+            stats[3] = max(stats[3], duration)
+
+        if (self._slow_cb_threshold is None or
+                duration < self._slow_cb_threshold):
+            return
+
+        if isinstance(cb, _WeakCb):
+            cb = cb.get_cb()
+            if cb is None:
+                return
+
+        self._slow_cb(cb, duration)
+
+    def _get_cbs_snapshot(self):
+        if self._cbs_snapshot is None:
+            self._cbs_snapshot = tuple(self._cbs.items())
+
+        return self._cbs_snapshot
+
+    def _remove_dead(self):
+        while self._dead_cb_ids:
+            self._cancel(self._dead_cb_ids.pop())
+
+    def _cancel(self, cb_id):
+        if self._cbs.pop(cb_id, None) is None:
+            return
+
+        self._cbs_snapshot = None
+        self._dead_cb_ids.discard(cb_id)
+
+        if self._stats is not None:
+            self._stats.pop(cb_id, None)
+
+
+class _WeakCb:
+
+    def __init__(self, ref, func=None):
+        self._ref = ref
+        self._func = func
+
+    def __call__(self, *args, **kwargs):
+        obj = self._ref()
+        if obj is None:
+            return
+
+        if self._func is None:
+            return obj(*args, **kwargs)
+
+        return self._func(obj, *args, **kwargs)
+
+    def get_cb(self):
+        obj = self._ref()
+        if obj is None or self._func is None:
+            return obj
+
+        return self._func.__get__(obj, type(obj))
+
+
+def _is_builtin_method(cb):
+    return (inspect.isbuiltin(cb) and
+            cb.__self__ is not None and
+            not inspect.ismodule(cb.__self__))
+
+
+class BatchCallbackRegistry(CallbackRegistry):
+    """Callback registry with batched notification.
+
+    Instead of notifying callbacks immediately, `BatchCallbackRegistry.notify`
+    stores positional arguments as a tuple. All stored tuples are delivered
+    to callbacks as single list argument - either in next event loop
+    iteration (if `delay` is `None`) or `delay` seconds after the first
+    stored tuple. This amortizes per-call overhead when events are
+    notified at high rate. Delivery of stored tuples can also be forced with
+    `BatchCallbackRegistry.flush`.
+
+    Keyword arguments are not supported - `BatchCallbackRegistry.notify`
+    raises `TypeError` if they are provided.
+
+    `BatchCallbackRegistry.notify_async` stores positional arguments in the
+    same way, but instead of scheduling delivery, it immediately notifies
+    callbacks with all stored tuples and awaits their results (as in
+    `CallbackRegistry.notify_async`).
+
+    `BatchCallbackRegistry.notify` requires running asyncio event loop.
+    Exceptions raised by callbacks during delivery scheduled in event loop,
+    if not handled by `exception_cb`, are propagated to event loop's
+    exception handler.
+
+    Example::
+
+        batches = []
+        registry = BatchCallbackRegistry()
+        registry.register(batches.append)
+
+        registry.notify(1)
+        registry.notify(2, 3)
+        await asyncio.sleep(0)
+
+        assert batches == [[(1, ), (2, 3)]]
+
+    """
+
+    def __init__(self,
+                 exception_cb: ExceptionCb | None = None,
+                 delay: float | None = None):
+        super().__init__(exception_cb)
+        self._delay = delay
+        self._batch = []  # type: list[tuple]
+        self._flush_handle = None
+
+    def notify(self, *args):
+        """Store arguments for batched notification."""
+        self._batch.append(args)
+
+        if self._flush_handle is not None:
+            return
+
+        loop = asyncio.get_running_loop()
+        self._flush_handle = (loop.call_soon(self.flush)
+                              if self._delay is None
+                              else loop.call_later(self._delay, self.flush))
+
+    async def notify_async(self, *args):
+        """Notify all registered callbacks with stored arguments (including
+        `args`) and await their results."""
+        self._batch.append(args)
+        batch = self._take_batch()
+        await super().notify_async(batch)
+
+    def flush(self):
+        """Notify all registered callbacks with stored arguments."""
+        batch = self._take_batch()
+        if not batch:
+            return
+
+        super().notify(batch)
+
+    def _take_batch(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        batch, self._batch = self._batch, []
+        return batch
+
+
+class TopicCallbackRegistry:
+    """Registry that enables callback registration and notification
+    based on topics.
+
+    Callbacks are registered with topic pattern and notified with topic
+    - only callbacks with patterns matching notified topic are called.
+    Patterns are stored in a tree indexed by pattern segments, so cost of
+    notification depends on number of matching callbacks and topic length,
+    not on total number of registered callbacks.
+
+    Matching callbacks are notified in order of registration. Handling of
+    exceptions raised by callbacks, as well as registrations and
+    cancellations during notification, is the same as in
+    `CallbackRegistry`.
+
+    Example::
+
+        x = []
+        y = []
+        registry = TopicCallbackRegistry()
+
+        registry.register(('a', '*'), x.append)
+        registry.register(('a', '**'), y.append)
+
+        registry.notify(('a', 'b'), 1)
+        registry.notify(('a', 'b', 'c'), 2)
+        registry.notify(('b', ), 3)
+
+        assert x == [1]
+        assert y == [1, 2]
+
+    """
+
+    def __init__(self,
+                 exception_cb: ExceptionCb | None = None):
+        self._exception_cb = exception_cb
+        self._root = _TopicNode()
+        self._patterns = {}  # type: dict[int, TopicPattern]
+        self._last_cb_id = 0
+
+    def register(self,
+                 pattern: TopicPattern,
+                 cb: Callable
+                 ) -> RegisterCallbackHandle:
+        """Register a callback."""
+        pattern = tuple(pattern)
+        if '**' in pattern[:-1]:
+            raise ValueError('invalid pattern')
+
+        node = self._root
+        for segment in _get_pattern_segments(pattern):
+            child = node.children.get(segment)
+            if child is None:
+                child = node.children[segment] = _TopicNode()
+            node = child
+
+        self._last_cb_id += 1
+        cb_id = self._last_cb_id
+
+        cbs = node.multi_cbs if pattern[-1:] == ('**', ) else node.cbs
+        cbs[cb_id] = cb
+        self._patterns[cb_id] = pattern
+
+        return RegisterCallbackHandle(lambda: self._cancel(cb_id))
+
+    def notify(self, topic: Topic, *args, **kwargs):
+        """Notify callbacks registered with patterns matching `topic`."""
+        nodes = [self._root]
+        matches = []
+
+        for segment in topic:
+            next_nodes = []
+
+            for node in nodes:
+                if node.multi_cbs:
+                    matches.extend(node.multi_cbs.items())
+
+                child = node.children.get(segment)
+                if child is not None:
+                    next_nodes.append(child)
+
+                if segment == '*':
+                    continue
+
+                child = node.children.get('*')
+                if child is not None:
+                    next_nodes.append(child)
+
+            nodes = next_nodes
+            if not nodes:
+                break
+
+        for node in nodes:
+            matches.extend(node.cbs.items())
+            matches.extend(node.multi_cbs.items())
+
+        if len(matches) > 1:
+            matches.sort()
+
+        for cb_id, cb in matches:
+            if cb_id not in self._patterns:
+                continue
+
             try:
                 cb(*args, **kwargs)
             except Exception as e:
@@ -69,3 +583,35 @@ class CallbackRegistry:
                     self._exception_cb(e)
                 else:
                     raise
+
+    def _cancel(self, cb_id):
+        pattern = self._patterns.pop(cb_id, None)
+        if pattern is None:
+            return
+
+        path = [(None, self._root)]
+        for segment in _get_pattern_segments(pattern):
+            path.append((segment, path[-1][1].children[segment]))
+
+        node = path[-1][1]
+        cbs = node.multi_cbs if pattern[-1:] == ('**', ) else node.cbs
+        del cbs[cb_id]
+
+        for i in range(len(path) - 1, 0, -1):
+            segment, node = path[i]
+            if node.children or node.cbs or node.multi_cbs:
+                break
+
+            del path[i - 1][1].children[segment]
+
+
+class _TopicNode:
+
+    def __init__(self):
+        self.children = {}  # type: dict[str, _TopicNode]
+        self.cbs = {}  # type: dict[int, Callable]
+        self.multi_cbs = {}  # type: dict[int, Callable]
+
+
+def _get_pattern_segments(pattern):
+    return pattern[:-1] if pattern[-1:] == ('**', ) else pattern
@@ -1,6 +1,21 @@
-from collections.abc import Collection
+from collections.abc import (AsyncIterator,
+                             Awaitable,
+                             Callable,
+                             Collection,
+                             Iterable,
+                             Iterator)
+import asyncio
+import calendar
 import datetime
+import heapq
+import time
 import typing
+import weakref
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
 
 class AllSubExpr(typing.NamedTuple):
@@ -14,6 +29,7 @@ class ValueSubExpr(typing.NamedTuple):
 class RangeSubExpr(typing.NamedTuple):
     from_: int
     to: int
+    step: int = 1
 
 
 class ListSubExpr(typing.NamedTuple):
@@ -32,37 +48,527 @@ class Expr(typing.NamedTuple):
     day: SubExpr
     month: SubExpr
     day_of_week: SubExpr
+    second: SubExpr = ValueSubExpr(0)
+
+
+class CompiledExpr(typing.NamedTuple):
+    """Expression with each field represented as bitmask of valid values
+
+    Value ``v`` is valid if bit ``1 << v`` is set.
+
+    """
+    minute: int
+    hour: int
+    day: int
+    month: int
+    day_of_week: int
+    second: int = 1
 
 
 def parse(expr_str: str) -> Expr:
+    """Parse expression
+
+    Expression consists of 5 (minute, hour, day, month and day of week) or 6
+    (second, minute, hour, day, month and day of week) whitespace separated
+    subexpressions. If second subexpression is omitted, only second ``0`` is
+    matched.
+
+    Each subexpression is one of:
+
+        * ``*`` - all values
+        * ``a`` - single value
+        * ``a-b`` - all values from ``a`` to ``b`` (inclusive)
+        * ``*/n``, ``a/n`` or ``a-b/n`` - every ``n``-th value in range
+          (``a/n`` ranges from ``a`` to maximum value)
+        * comma separated list of previous subexpressions
+
+    Month values can be specified with names ``jan`` - ``dec`` and day of
+    week values with names ``sun`` - ``sat`` (case insensitive).
+
+    """
     subexpr_strs = expr_str.split()
-    if len(subexpr_strs) != 5:
+    if len(subexpr_strs) == 5:
+        second = ValueSubExpr(0)
+
+    elif len(subexpr_strs) == 6:
+        second = _parse_subexpr(subexpr_strs[0], _second_field)
+        subexpr_strs = subexpr_strs[1:]
+
+    else:
         raise ValueError('invalid number of subexpressions')
 
     return Expr(
-        minute=_parse_subexpr(subexpr_strs[0], _parse_minute),
-        hour=_parse_subexpr(subexpr_strs[1], _parse_hour),
-        day=_parse_subexpr(subexpr_strs[2], _parse_day),
-        month=_parse_subexpr(subexpr_strs[3], _parse_month),
-        day_of_week=_parse_subexpr(subexpr_strs[4], _parse_day_of_week))
+        minute=_parse_subexpr(subexpr_strs[0], _minute_field),
+        hour=_parse_subexpr(subexpr_strs[1], _hour_field),
+        day=_parse_subexpr(subexpr_strs[2], _day_field),
+        month=_parse_subexpr(subexpr_strs[3], _month_field),
+        day_of_week=_parse_subexpr(subexpr_strs[4], _day_of_week_field),
+        second=second)
 
 
-def next(expr: Expr,
+def compile(expr: Expr) -> CompiledExpr:
+    """Compile expression
+
+    Compiled expression can be used instead of `Expr` in `next` and `match`.
+    When same expression is evaluated many times, compiling it once avoids
+    repeated traversal of subexpressions.
+
+    """
+    return CompiledExpr(
+        minute=_get_subexpr_mask(expr.minute, 0, 59),
+        hour=_get_subexpr_mask(expr.hour, 0, 23),
+        day=_get_subexpr_mask(expr.day, 1, 31),
+        month=_get_subexpr_mask(expr.month, 1, 12),
+        day_of_week=_get_subexpr_mask(expr.day_of_week, 0, 6),
+        second=_get_subexpr_mask(expr.second, 0, 59))
+
+
+def next(expr: Expr | CompiledExpr,
          t: datetime.datetime
          ) -> datetime.datetime:
-    t = t.replace(second=0, microsecond=0)
+    """Get first time after `t` matching `expr`
 
-    while True:
-        t = t + datetime.timedelta(minutes=1)
+    Resulting time is calculated by searching for next valid value of each
+    field (month, day, hour, minute and second), carrying to next larger
+    field if there is no valid value in the current one.
+
+    If there is no matching time, `ValueError` is raised.
+
+    """
+    if not isinstance(expr, CompiledExpr):
+        expr = compile(expr)
+
+    t = t.replace(microsecond=0) + datetime.timedelta(seconds=1)
+    year, month, day = t.year, t.month, t.day
+    hour, minute, second = t.hour, t.minute, t.second
+
+    # gregorian calendar repeats itself every 400 years
+    max_year = min(year + 400, datetime.MAXYEAR)
+
+    while year <= max_year:
+        next_month = _get_next_value(expr.month, month)
+        if next_month is None:
+            year, month, day, hour, minute, second = year + 1, 1, 1, 0, 0, 0
+            continue
+
+        if next_month != month:
+            month, day, hour, minute, second = next_month, 1, 0, 0, 0
+
+        next_day = _get_next_day(expr.day, expr.day_of_week, year, month,
+                                 day)
+        if next_day is None:
+            month, day, hour, minute, second = month + 1, 1, 0, 0, 0
+            continue
 
-        if match(expr, t):
-            return t
+        if next_day != day:
+            day, hour, minute, second = next_day, 0, 0, 0
 
+        next_hour = _get_next_value(expr.hour, hour)
+        if next_hour is None:
+            day, hour, minute, second = day + 1, 0, 0, 0
+            continue
 
-def match(expr: Expr,
+        if next_hour != hour:
+            hour, minute, second = next_hour, 0, 0
+
+        next_minute = _get_next_value(expr.minute, minute)
+        if next_minute is None:
+            hour, minute, second = hour + 1, 0, 0
+            continue
+
+        if next_minute != minute:
+            minute, second = next_minute, 0
+
+        next_second = _get_next_value(expr.second, second)
+        if next_second is None:
+            minute, second = minute + 1, 0
+            continue
+
+        return datetime.datetime(year, month, day, hour, minute, next_second,
+                                 tzinfo=t.tzinfo)
+
+    raise ValueError('matching time not found')
+
+
+def match(expr: Expr | CompiledExpr,
           t: datetime.datetime
           ) -> bool:
-    if t.second or t.microsecond:
+    if t.microsecond:
+        return False
+
+    if not isinstance(expr, CompiledExpr):
+        return _match_expr(expr, t)
+
+    return bool((expr.second >> t.second) &
+                (expr.minute >> t.minute) &
+                (expr.hour >> t.hour) &
+                (expr.day >> t.day) &
+                (expr.month >> t.month) &
+                (expr.day_of_week >> (t.isoweekday() % 7)) &
+                1)
+
+
+def match_many(expr: Expr | CompiledExpr,
+               timestamps: Iterable[int | float],
+               tz: datetime.timezone = datetime.timezone.utc
+               ) -> list[bool]:
+    """Match multiple POSIX timestamps
+
+    Timestamps are represented as number of seconds since epoch and are
+    matched as local time in timezone `tz`. Any iterable of numbers can be
+    used (e.g. `list`, `array.array` or `memoryview`). If `timestamps` is
+    `numpy.ndarray`, calculation is vectorized and result is `numpy.ndarray`
+    with boolean type.
+
+    Validity of time of day is precalculated for all seconds in day, while
+    validity of date is calculated only once for each distinct date.
+
+    """
+    if not isinstance(expr, CompiledExpr):
+        expr = compile(expr)
+
+    offset = int(tz.utcoffset(None).total_seconds())
+    seconds_table = _get_seconds_table(expr)
+
+    if numpy is not None and isinstance(timestamps, numpy.ndarray):
+        return _match_many_numpy(expr, timestamps, offset, seconds_table)
+
+    days_cache = {}
+    result = []
+
+    for timestamp in timestamps:
+        timestamp_int = int(timestamp)
+        if timestamp_int != timestamp:
+            result.append(False)
+            continue
+
+        days, seconds = divmod(timestamp_int + offset, 86400)
+        if not seconds_table[seconds]:
+            result.append(False)
+            continue
+
+        day_valid = days_cache.get(days)
+        if day_valid is None:
+            day_valid = _match_days(expr, days)
+            days_cache[days] = day_valid
+
+        result.append(day_valid)
+
+    return result
+
+
+def iter_between(expr: Expr | CompiledExpr,
+                 start: datetime.datetime,
+                 end: datetime.datetime
+                 ) -> Iterator[datetime.datetime]:
+    """Iterate over times matching `expr` between `start` and `end`
+
+    Resulting times are greater than or equal to `start` and less than `end`.
+    Times are calculated lazily with `next`.
+
+    """
+    if not isinstance(expr, CompiledExpr):
+        expr = compile(expr)
+
+    t = start
+    if match(expr, t) and t < end:
+        yield t
+
+    while True:
+        try:
+            t = next(expr, t)
+
+        except ValueError:
+            return
+
+        if t >= end:
+            return
+
+        yield t
+
+
+async def sleep_until(t: datetime.datetime):
+    """Sleep until time `t`
+
+    Sleeping is based on event loop's monotonic clock. Once woken up, wall
+    clock is checked and, if `t` is not yet reached because of clock drift,
+    sleeping is continued for remaining duration.
+
+    All concurrent calls, associated with the same event loop, share single
+    timer which is scheduled for the earliest requested time. Calls
+    requesting the same time are woken up together.
+
+    """
+    loop = asyncio.get_running_loop()
+
+    timer = _timers.get(loop)
+    if timer is None:
+        timer = _Timer(loop)
+        _timers[loop] = timer
+
+    await timer.wait(t.timestamp())
+
+
+async def ticks(expr: Expr | CompiledExpr,
+                tz: datetime.tzinfo | None = None
+                ) -> AsyncIterator[datetime.datetime]:
+    """Iterate over matching times as they occur
+
+    Each matching time is yielded once it is reached (see `sleep_until`).
+    Times are represented in timezone `tz` (local time if ``None``). If
+    matching times are missed because consumer of this iterator was busy,
+    they are skipped - next yielded time is first matching time after
+    consumer resumes iteration.
+
+    """
+    if not isinstance(expr, CompiledExpr):
+        expr = compile(expr)
+
+    t = datetime.datetime.now(tz)
+
+    while True:
+        t = next(expr, max(t, datetime.datetime.now(tz)))
+        await sleep_until(t)
+        yield t
+
+
+async def run(expr: Expr | CompiledExpr,
+              fn: Callable[[datetime.datetime], Awaitable[None]],
+              tz: datetime.tzinfo | None = None):
+    """Run `fn` on each matching time
+
+    Matching time is passed as argument to `fn`. Next matching time is
+    awaited only after `fn` is done (see `ticks`).
+
+    """
+    async for t in ticks(expr, tz):
+        await fn(t)
+
+
+class Schedule:
+    """Schedule of jobs defined by cron expressions
+
+    Each job is identified by job id returned by `Schedule.add`. Jobs with
+    equal expressions are grouped together so that next time is calculated
+    only once for each distinct expression. Groups are kept in a heap ordered
+    by their next time, which enables retrieval of due jobs without
+    evaluation of expressions that are not due.
+
+    Next time of newly added expression is calculated relative to the latest
+    time passed to `Schedule.pop_due` (or initial time `t`). If multiple
+    times of the same expression are missed between two calls of
+    `Schedule.pop_due`, its jobs are returned only once.
+
+    Example::
+
+        schedule = Schedule(datetime.datetime(2000, 1, 1))
+        job_id = schedule.add(parse('0 * * * *'))
+
+        assert schedule.get_next() == datetime.datetime(2000, 1, 1, 1)
+        assert schedule.pop_due(datetime.datetime(2000, 1, 1, 0, 30)) == []
+        assert schedule.pop_due(datetime.datetime(2000, 1, 1, 1)) == [job_id]
+
+    """
+
+    def __init__(self, t: datetime.datetime):
+        self._t = t
+        self._last_job_id = 0
+        self._last_seq = 0
+        self._job_exprs = {}  # type: dict[int, CompiledExpr]
+        self._groups = {}  # type: dict[CompiledExpr, _ScheduleGroup]
+        self._heap = []  # type: list[tuple[datetime.datetime, int, CompiledExpr]]  # NOQA
+        self._stale_count = 0
+
+    def __len__(self) -> int:
+        return len(self._job_exprs)
+
+    def add(self, expr: Expr | CompiledExpr) -> int:
+        """Add job and return its job id"""
+        if not isinstance(expr, CompiledExpr):
+            expr = compile(expr)
+
+        group = self._groups.get(expr)
+        if not group:
+            group = self._push_group(expr, {}, self._t)
+
+        self._last_job_id += 1
+        job_id = self._last_job_id
+
+        group.job_ids[job_id] = None
+        self._job_exprs[job_id] = expr
+        return job_id
+
+    def remove(self, job_id: int):
+        """Remove job
+
+        Removal of last job associated with expression leaves stale entry in
+        heap which is discarded once it reaches the top of heap or when number
+        of stale entries exceeds number of active expressions.
+
+        """
+        expr = self._job_exprs.pop(job_id, None)
+        if expr is None:
+            return
+
+        group = self._groups[expr]
+        del group.job_ids[job_id]
+        if group.job_ids:
+            return
+
+        del self._groups[expr]
+        self._stale_count += 1
+
+        if self._stale_count > len(self._groups):
+            self._heap = [(group.t, group.seq, expr)
+                          for expr, group in self._groups.items()]
+            heapq.heapify(self._heap)
+            self._stale_count = 0
+
+    def get_next(self) -> datetime.datetime | None:
+        """Get earliest next time of all jobs"""
+        while self._heap:
+            t, seq, expr = self._heap[0]
+
+            group = self._groups.get(expr)
+            if group and group.seq == seq:
+                return t
+
+            heapq.heappop(self._heap)
+            self._stale_count -= 1
+
+    def pop_due(self, now: datetime.datetime) -> list[int]:
+        """Get ids of jobs with next time less than or equal to `now`
+
+        Job ids are ordered by their next time. Next time of returned jobs
+        is recalculated as first time after `now`.
+
+        """
+        if now > self._t:
+            self._t = now
+
+        job_ids = []
+
+        while self._heap and self._heap[0][0] <= now:
+            t, seq, expr = heapq.heappop(self._heap)
+
+            group = self._groups.get(expr)
+            if not group or group.seq != seq:
+                self._stale_count -= 1
+                continue
+
+            job_ids.extend(group.job_ids)
+            self._push_group(expr, group.job_ids, self._t)
+
+        return job_ids
+
+    def _push_group(self, expr, job_ids, t):
+        self._last_seq += 1
+        group = _ScheduleGroup(t=next(expr, t),
+                               seq=self._last_seq,
+                               job_ids=job_ids)
+
+        self._groups[expr] = group
+        heapq.heappush(self._heap, (group.t, group.seq, expr))
+        return group
+
+
+class _ScheduleGroup(typing.NamedTuple):
+    t: datetime.datetime
+    seq: int
+    job_ids: dict[int, None]
+
+
+class _Timer:
+
+    def __init__(self, loop):
+        self._loop = loop
+        self._futures = {}
+        self._timestamps = []
+        self._handle = None
+        self._handle_timestamp = None
+
+    async def wait(self, timestamp):
+        futures = self._futures.get(timestamp)
+        if futures is None:
+            futures = []
+            self._futures[timestamp] = futures
+            heapq.heappush(self._timestamps, timestamp)
+
+        future = self._loop.create_future()
+        futures.append(future)
+
+        self._schedule()
+        await future
+
+    def _schedule(self):
+        if not self._timestamps:
+            return
+
+        timestamp = self._timestamps[0]
+        if self._handle:
+            if self._handle_timestamp == timestamp:
+                return
+
+            self._handle.cancel()
+
+        when = self._loop.time() + timestamp - time.time()
+        self._handle = self._loop.call_at(when, self._on_timer)
+        self._handle_timestamp = timestamp
+
+    def _on_timer(self):
+        self._handle = None
+        self._handle_timestamp = None
+
+        now = time.time() + _timer_tolerance
+        while self._timestamps and self._timestamps[0] <= now:
+            timestamp = heapq.heappop(self._timestamps)
+
+            for future in self._futures.pop(timestamp):
+                if not future.done():
+                    future.set_result(None)
+
+        self._schedule()
+
+
+_timers = weakref.WeakKeyDictionary()  # type: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _Timer]  # NOQA
+
+_timer_tolerance = 0.001
+
+
+def _parse_subexpr(subexpr_str, field):
+    if subexpr_str == '*':
+        return AllSubExpr()
+
+    if ',' in subexpr_str:
+        return ListSubExpr([_parse_subexpr(i, field)
+                            for i in subexpr_str.split(',')])
+
+    if '/' in subexpr_str:
+        range_str, step_str = subexpr_str.split('/')
+
+        step = int(step_str)
+        if step < 1:
+            raise ValueError(f'invalid {field.name} step')
+
+        if range_str == '*':
+            return RangeSubExpr(field.min_value, field.max_value, step)
+
+        if '-' in range_str:
+            from_str, to_str = range_str.split('-')
+            return RangeSubExpr(field.parse(from_str), field.parse(to_str),
+                                step)
+
+        return RangeSubExpr(field.parse(range_str), field.max_value, step)
+
+    if '-' in subexpr_str:
+        from_str, to_str = subexpr_str.split('-')
+        return RangeSubExpr(field.parse(from_str), field.parse(to_str))
+
+    return ValueSubExpr(field.parse(subexpr_str))
+
+
+def _match_expr(expr, t):
+    if not _match_subexpr(expr.second, t.second):
         return False
 
     if not _match_subexpr(expr.minute, t.minute):
@@ -83,72 +589,158 @@ def match(expr: Expr,
     return True
 
 
-def _parse_subexpr(subexpr_str, value_parser):
-    if subexpr_str == '*':
-        return AllSubExpr()
+def _match_subexpr(subexpr, value):
+    if isinstance(subexpr, AllSubExpr):
+        return True
 
-    if ',' in subexpr_str:
-        return ListSubExpr([_parse_subexpr(i, value_parser)
-                            for i in subexpr_str.split(',')])
+    if isinstance(subexpr, ValueSubExpr):
+        return value == subexpr.value
 
-    if '-' in subexpr_str:
-        from_str, to_str = subexpr_str.split('-')
-        return RangeSubExpr(value_parser(from_str), value_parser(to_str))
+    if isinstance(subexpr, RangeSubExpr):
+        return (subexpr.from_ <= value <= subexpr.to and
+                (value - subexpr.from_) % subexpr.step == 0)
+
+    if isinstance(subexpr, ListSubExpr):
+        return any(_match_subexpr(i, value) for i in subexpr.subexprs)
 
-    return ValueSubExpr(value_parser(subexpr_str))
+    raise ValueError('unsupported subexpression')
 
 
-def _match_subexpr(subexpr, value):
+def _get_subexpr_mask(subexpr, min_value, max_value):
     if isinstance(subexpr, AllSubExpr):
-        return True
+        return ((1 << (max_value + 1)) - 1) & ~((1 << min_value) - 1)
 
     if isinstance(subexpr, ValueSubExpr):
-        return value == subexpr.value
+        return 1 << subexpr.value
 
     if isinstance(subexpr, RangeSubExpr):
-        return subexpr.from_ <= value <= subexpr.to
+        if subexpr.from_ > subexpr.to:
+            return 0
+
+        if subexpr.step == 1:
+            return (((1 << (subexpr.to + 1)) - 1) &
+                    ~((1 << subexpr.from_) - 1))
+
+        mask = 0
+        for i in range(subexpr.from_, subexpr.to + 1, subexpr.step):
+            mask |= 1 << i
+        return mask
 
     if isinstance(subexpr, ListSubExpr):
-        return any(_match_subexpr(i, value) for i in subexpr.subexprs)
+        mask = 0
+        for i in subexpr.subexprs:
+            mask |= _get_subexpr_mask(i, min_value, max_value)
+        return mask
 
     raise ValueError('unsupported subexpression')
 
 
-def _parse_minute(value_str):
-    value = int(value_str)
-    if not (0 <= value <= 59):
-        raise ValueError('invalid minute value')
+def _get_next_value(mask, value):
+    mask >>= value
+    if not mask:
+        return
+
+    return value + (mask & -mask).bit_length() - 1
+
+
+def _get_next_day(day_mask, day_of_week_mask, year, month, day):
+    days_in_month = calendar.monthrange(year, month)[1]
+
+    while True:
+        day = _get_next_value(day_mask, day)
+        if day is None or day > days_in_month:
+            return
+
+        day_of_week = datetime.date(year, month, day).isoweekday() % 7
+        if day_of_week_mask & (1 << day_of_week):
+            return day
+
+        day += 1
+
+
+def _get_seconds_table(expr):
+    table = bytearray(86400)
+    minute_table = bytes((expr.second >> second) & 1
+                         for second in range(60))
+
+    for hour in range(24):
+        if not (expr.hour >> hour) & 1:
+            continue
+
+        for minute in range(60):
+            if (expr.minute >> minute) & 1:
+                i = hour * 3600 + minute * 60
+                table[i:i+60] = minute_table
+
+    return table
+
+
+def _match_days(expr, days):
+    date = _epoch_date + datetime.timedelta(days=days)
+    return bool((expr.day >> date.day) &
+                (expr.month >> date.month) &
+                (expr.day_of_week >> (date.isoweekday() % 7)) &
+                1)
+
+
+def _match_many_numpy(expr, timestamps, offset, seconds_table):
+    if numpy.issubdtype(timestamps.dtype, numpy.integer):
+        valid = numpy.ones(timestamps.shape, dtype=bool)
+        timestamps = timestamps.astype(numpy.int64)
+
+    else:
+        timestamps_floor = numpy.floor(timestamps)
+        valid = timestamps_floor == timestamps
+        timestamps = numpy.where(valid, timestamps_floor, 0)
+        timestamps = timestamps.astype(numpy.int64)
+
+    days, seconds = numpy.divmod(timestamps + offset, 86400)
+
+    seconds_table = numpy.frombuffer(seconds_table, dtype=numpy.uint8)
+    valid &= seconds_table[seconds].astype(bool)
+
+    unique_days, inverse = numpy.unique(days[valid], return_inverse=True)
+    days_valid = numpy.array([_match_days(expr, int(i)) for i in unique_days],
+                             dtype=bool)
+    valid[valid] = days_valid[inverse]
+
+    return valid
+
 
-    return value
+_epoch_date = datetime.date(1970, 1, 1)
 
 
-def _parse_hour(value_str):
-    value = int(value_str)
-    if not (0 <= value <= 23):
-        raise ValueError('invalid hour value')
+class _Field(typing.NamedTuple):
+    name: str
+    min_value: int
+    max_value: int
+    names: dict[str, int] = {}
 
-    return value
+    def parse(self, value_str):
+        value = self.names.get(value_str.lower())
+        if value is None:
+            value = int(value_str)
 
+        if not (self.min_value <= value <= self.max_value):
+            raise ValueError(f'invalid {self.name} value')
 
-def _parse_day(value_str):
-    value = int(value_str)
-    if not (1 <= value <= 31):
-        raise ValueError('invalid day value')
+        return value
 
-    return value
 
+_second_field = _Field('second', 0, 59)
 
-def _parse_month(value_str):
-    value = int(value_str)
-    if not (1 <= value <= 12):
-        raise ValueError('invalid month value')
+_minute_field = _Field('minute', 0, 59)
 
-    return value
+_hour_field = _Field('hour', 0, 23)
 
+_day_field = _Field('day', 1, 31)
 
-def _parse_day_of_week(value_str):
-    value = int(value_str)
-    if not (0 <= value <= 6):
-        raise ValueError('invalid day of week value')
+_month_field = _Field('month', 1, 12,
+                      {name: i + 1 for i, name in enumerate([
+                          'jan', 'feb', 'mar', 'apr', 'may', 'jun',
+                          'jul', 'aug', 'sep', 'oct', 'nov', 'dec'])})
 
-    return value
+_day_of_week_field = _Field('day of week', 0, 6,
+                            {name: i for i, name in enumerate([
+                                'sun', 'mon', 'tue', 'wed', 'thu', 'fri',
+                                'sat'])})
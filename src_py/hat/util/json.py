@@ -0,0 +1,338 @@
+from collections.abc import Iterable, Iterator
+import codecs
+import enum
+import json
+import re
+import typing
+
+from hat.util.bytes import Bytes
+
+
+class JsonToken(enum.Enum):
+    NULL = 0
+    BOOL = 1
+    INT = 2
+    REAL = 3
+    STR = 4
+    ARR = 5
+    ARR_END = 6
+    OBJ = 7
+    OBJ_KEY = 8
+    OBJ_END = 9
+
+
+class JsonEvent(typing.NamedTuple):
+    token: JsonToken
+    value: typing.Any = None
+    """value of NULL, BOOL, INT, REAL, STR and OBJ_KEY tokens"""
+
+
+class JsonArrayDecoder:
+    """Incremental decoder of top-level JSON array items
+
+    Data containing single JSON array (encoded as UTF-8) is fed to decoder
+    in chunks of arbitrary size. Each call of `JsonArrayDecoder.feed` returns
+    array items which were completely received. Only data of items which are
+    not yet decoded is stored in decoder, so memory usage is bounded by
+    size of largest item (and chunk), not by size of whole array.
+
+    Items are decoded with `json.JSONDecoder.raw_decode`. Decoding of
+    incompletely received item is retried with each fed chunk while its
+    received data is smaller than `retry_size`. Decoding of larger items is
+    retried only once size of their received data is doubled, which keeps
+    total decoding time linear to data size regardless of chunk size -
+    consequently, such items can be returned only after additional data (up
+    to the size of item) is received, or by `JsonArrayDecoder.close`.
+    Data which can not be beginning of valid item (e.g. item starting
+    with invalid character) is reported as soon as it is received. Other
+    invalid items can not be distinguished from incomplete ones, so they
+    are reported only once their size exceeds `max_item_size` characters (if
+    it is not ``None``), once their data is complete, or by
+    `JsonArrayDecoder.close`. Valid items larger than `max_item_size` are
+    also rejected.
+
+    Example::
+
+        decoder = JsonArrayDecoder()
+
+        assert decoder.feed(b'[1, {"a": ') == [1]
+        assert decoder.feed(b'2}, "x"') == [{'a': 2}]
+        assert decoder.feed(b']') == ['x']
+        assert decoder.close() == []
+
+    """
+
+    def __init__(self,
+                 retry_size: int = 4096,
+                 max_item_size: int | None = 64 * 1024 * 1024):
+        self._retry_size = retry_size
+        self._max_item_size = max_item_size
+        self._text_decoder = codecs.getincrementaldecoder('utf-8')()
+        self._chunks = []
+        self._chunks_len = 0
+        self._state = _State.START
+        self._retry_len = 0
+
+    @property
+    def is_started(self) -> bool:
+        """Is beginning of array received"""
+        return self._state != _State.START
+
+    @property
+    def is_done(self) -> bool:
+        """Is end of array received"""
+        return self._state == _State.END
+
+    def feed(self, data: Bytes) -> list[typing.Any]:
+        """Feed data and return decoded items"""
+        self._add_text(self._text_decoder.decode(data))
+
+        exceeded = (self._max_item_size is not None and
+                    self._chunks_len > self._max_item_size)
+
+        # pending text is joined only once decoding is retried
+        if self._chunks_len < self._retry_len and not exceeded:
+            return []
+
+        if exceeded:
+            self._retry_len = 0
+
+        items = self._decode(False)
+
+        if (self._max_item_size is not None and
+                self._chunks_len > self._max_item_size):
+            raise ValueError('json array item too large')
+
+        return items
+
+    def close(self) -> list[typing.Any]:
+        """Decode remaining items
+
+        If data doesn't contain complete array, `ValueError` is raised.
+
+        """
+        self._add_text(self._text_decoder.decode(b'', True))
+        items = self._decode(True)
+
+        if self._state != _State.END:
+            raise ValueError('incomplete json array')
+
+        return items
+
+    def _add_text(self, text):
+        if not text:
+            return
+
+        self._chunks.append(text)
+        self._chunks_len += len(text)
+
+    def _decode(self, final):
+        text = ''.join(self._chunks)
+        pos = 0
+        items = []
+
+        while True:
+            pos = _whitespace.match(text, pos).end()
+            if pos >= len(text):
+                break
+
+            if self._state == _State.START:
+                if text[pos] != '[':
+                    raise ValueError('invalid json array')
+
+                pos += 1
+                self._state = _State.FIRST_ITEM
+
+            elif self._state == _State.SEP:
+                if text[pos] == ',':
+                    self._state = _State.ITEM
+
+                elif text[pos] == ']':
+                    self._state = _State.END
+
+                else:
+                    raise ValueError('invalid json array')
+
+                pos += 1
+
+            elif self._state == _State.END:
+                raise ValueError('invalid data after json array')
+
+            elif self._state == _State.FIRST_ITEM and text[pos] == ']':
+                pos += 1
+                self._state = _State.END
+
+            else:
+                _check_item_start(text, pos)
+
+                if not final and len(text) - pos < self._retry_len:
+                    break
+
+                try:
+                    item, end = _decoder.raw_decode(text, pos)
+
+                except json.JSONDecodeError:
+                    if final:
+                        raise
+
+                    item_len = len(text) - pos
+                    self._retry_len = (item_len + 1
+                                       if item_len < self._retry_size
+                                       else 2 * item_len)
+                    break
+
+                # numbers and literals could continue in next chunk
+                if not final and (end >= len(text) or
+                                  (text[end] in _number_chars and
+                                   text[pos] in _number_chars)):
+                    self._retry_len = len(text) - pos + 1
+                    break
+
+                items.append(item)
+                pos = end
+                self._state = _State.SEP
+                self._retry_len = 0
+
+        text = text[pos:]
+        self._chunks = [text] if text else []
+        self._chunks_len = len(text)
+        return items
+
+
+class JsonEventDecoder:
+    """Incremental decoder of top-level JSON array events
+
+    Events are generated for top-level array (`JsonToken.ARR` and
+    `JsonToken.ARR_END`) and for all tokens of each array item. Item
+    events are generated once item is completely received and decoded by
+    `JsonArrayDecoder` (which is created with provided `max_item_size`).
+
+    Example::
+
+        decoder = JsonEventDecoder()
+
+        assert decoder.feed(b'[{"a": [true]') == [
+            JsonEvent(JsonToken.ARR)]
+        assert decoder.feed(b'}]') == [
+            JsonEvent(JsonToken.OBJ),
+            JsonEvent(JsonToken.OBJ_KEY, 'a'),
+            JsonEvent(JsonToken.ARR),
+            JsonEvent(JsonToken.BOOL, True),
+            JsonEvent(JsonToken.ARR_END),
+            JsonEvent(JsonToken.OBJ_END),
+            JsonEvent(JsonToken.ARR_END)]
+        assert decoder.close() == []
+
+    """
+
+    def __init__(self, max_item_size: int | None = 64 * 1024 * 1024):
+        self._decoder = JsonArrayDecoder(max_item_size=max_item_size)
+        self._started = False
+        self._done = False
+
+    def feed(self, data: Bytes) -> list[JsonEvent]:
+        """Feed data and return generated events"""
+        return self._get_events(self._decoder.feed(data))
+
+    def close(self) -> list[JsonEvent]:
+        """Generate remaining events
+
+        If data doesn't contain complete array, `ValueError` is raised.
+
+        """
+        return self._get_events(self._decoder.close())
+
+    def _get_events(self, items):
+        events = []
+
+        if not self._started and self._decoder.is_started:
+            events.append(JsonEvent(JsonToken.ARR))
+            self._started = True
+
+        for item in items:
+            _append_events(events, item)
+
+        if not self._done and self._decoder.is_done:
+            events.append(JsonEvent(JsonToken.ARR_END))
+            self._done = True
+
+        return events
+
+
+def decode_json_array(chunks: Iterable[Bytes]) -> Iterator[typing.Any]:
+    """Decode top-level JSON array items from data chunks
+
+    Example::
+
+        chunks = [b'[1, 2', b'3, 4]']
+        assert list(decode_json_array(chunks)) == [1, 23, 4]
+
+    """
+    decoder = JsonArrayDecoder()
+
+    for chunk in chunks:
+        yield from decoder.feed(chunk)
+
+    yield from decoder.close()
+
+
+class _State(enum.Enum):
+    START = 0
+    FIRST_ITEM = 1
+    ITEM = 2
+    SEP = 3
+    END = 4
+
+
+_decoder = json.JSONDecoder()
+
+_whitespace = re.compile(r'[ \t\n\r]*')
+
+_number_chars = frozenset('0123456789+-.eE')
+
+_item_start_chars = frozenset('{["-0123456789tfn')
+
+_literals = {'t': 'true', 'f': 'false', 'n': 'null'}
+
+
+def _check_item_start(text, pos):
+    c = text[pos]
+    if c not in _item_start_chars:
+        raise ValueError('invalid json array item')
+
+    literal = _literals.get(c)
+    if literal and not literal.startswith(text[pos:pos+len(literal)]):
+        raise ValueError('invalid json array item')
+
+
+def _append_events(events, value):
+    if value is None:
+        events.append(JsonEvent(JsonToken.NULL))
+
+    elif isinstance(value, bool):
+        events.append(JsonEvent(JsonToken.BOOL, value))
+
+    elif isinstance(value, int):
+        events.append(JsonEvent(JsonToken.INT, value))
+
+    elif isinstance(value, float):
+        events.append(JsonEvent(JsonToken.REAL, value))
+
+    elif isinstance(value, str):
+        events.append(JsonEvent(JsonToken.STR, value))
+
+    elif isinstance(value, list):
+        events.append(JsonEvent(JsonToken.ARR))
+        for i in value:
+            _append_events(events, i)
+        events.append(JsonEvent(JsonToken.ARR_END))
+
+    elif isinstance(value, dict):
+        events.append(JsonEvent(JsonToken.OBJ))
+        for k, v in value.items():
+            events.append(JsonEvent(JsonToken.OBJ_KEY, k))
+            _append_events(events, v)
+        events.append(JsonEvent(JsonToken.OBJ_END))
+
+    else:
+        raise ValueError('unsupported value')
@@ -1,6 +1,16 @@
+from collections.abc import Iterable
 import contextlib
+import select
 import socket
 
+from hat.util.bytes import Bytes
+
+try:
+    from hat.util import _socket
+
+except ImportError:
+    _socket = None
+
 
 def get_unused_tcp_port(host: str = '127.0.0.1') -> int:
     """Search for unused TCP port"""
@@ -14,3 +24,131 @@ def get_unused_udp_port(host: str = '127.0.0.1') -> int:
     with contextlib.closing(socket.socket(type=socket.SOCK_DGRAM)) as sock:
         sock.bind((host, 0))
         return sock.getsockname()[1]
+
+
+def socket_sendv(sock: socket.socket,
+                 buffers: Iterable[Bytes]
+                 ) -> int:
+    """Send data from multiple buffers with single system call
+
+    Returns number of sent bytes. If `socket.socket.sendmsg` is not
+    available, buffers are joined and sent with `socket.socket.send`.
+
+    """
+    if hasattr(sock, 'sendmsg'):
+        return sock.sendmsg(buffers)
+
+    return sock.send(b''.join(buffers))
+
+
+def socket_recvv(sock: socket.socket,
+                 buffers: Iterable[Bytes]
+                 ) -> int:
+    """Receive data into multiple writable buffers with single system call
+
+    Buffers are filled in order. Returns number of received bytes. If
+    `socket.socket.recvmsg_into` is not available, data is received only
+    into first non empty buffer.
+
+    """
+    if hasattr(sock, 'recvmsg_into'):
+        return sock.recvmsg_into(buffers)[0]
+
+    for buffer in buffers:
+        if len(memoryview(buffer)):
+            return sock.recv_into(buffer)
+
+    return 0
+
+
+def socket_send_batch(sock: socket.socket,
+                      msgs: Iterable[tuple[Bytes, tuple[str, int]]]
+                      ) -> int:
+    """Send multiple datagrams
+
+    Each message is pair of data and destination address. Returns number of
+    sent messages - if sending of any message fails (e.g. because socket
+    buffer is full), following messages are not sent and error is raised
+    only if no message was sent.
+
+    On Linux, if C extension is available and `sock` is IPv4 UDP socket
+    (without timeout), messages are sent with ``sendmmsg``. If any
+    destination host is not IPv4 address string (e.g. it is host name),
+    messages are sent one by one with `socket.socket.sendto`.
+
+    """
+    if _can_use_extension(sock):
+        msgs = list(msgs)
+
+        try:
+            return _socket.send_batch(sock.fileno(), msgs)
+
+        except ValueError:
+            # host names are resolved by socket.socket.sendto
+            pass
+
+    count = 0
+    for data, addr in msgs:
+        try:
+            sock.sendto(data, addr)
+
+        except OSError:
+            if not count:
+                raise
+
+            break
+
+        count += 1
+
+    return count
+
+
+def socket_recv_batch(sock: socket.socket,
+                      bufsize: int,
+                      max_count: int = 64
+                      ) -> list[tuple[bytes, tuple[str, int]]]:
+    """Receive multiple datagrams
+
+    Returns list of up to `max_count` pairs of received data and source
+    address (same as `socket.socket.recvfrom`). If socket is blocking, this
+    function blocks only until first datagram is received. If no datagram
+    is available on non-blocking socket, `BlockingIOError` is raised.
+
+    On Linux, if C extension is available and `sock` is IPv4 UDP socket
+    (without timeout), datagrams are received with ``recvmmsg`` directly
+    into resulting `bytes` objects, which can be added to `BytesBuffer`
+    without additional copying. Because of this, `max_count` objects of
+    `bufsize` bytes are allocated on each call (and shrunk to received
+    data size afterwards) - `bufsize` should be chosen according to
+    expected datagram size, not maximum UDP datagram size.
+
+    """
+    if _can_use_extension(sock):
+        return _socket.receive_batch(sock.fileno(), max_count, bufsize)
+
+    msgs = [sock.recvfrom(bufsize)]
+
+    # socket timeout is applied regardless of MSG_DONTWAIT - in that case
+    # (or if MSG_DONTWAIT is not available), readiness is checked with
+    # select before receiving
+    flags = getattr(socket, 'MSG_DONTWAIT', None)
+    check_ready = flags is None or bool(sock.gettimeout())
+
+    while len(msgs) < max_count:
+        if check_ready and not select.select([sock], [], [], 0)[0]:
+            break
+
+        try:
+            msgs.append(sock.recvfrom(bufsize, 0 if check_ready else flags))
+
+        except OSError:
+            break
+
+    return msgs
+
+
+def _can_use_extension(sock):
+    return (_socket is not None and
+            sock.family == socket.AF_INET and
+            sock.type == socket.SOCK_DGRAM and
+            sock.gettimeout() in (None, 0))
@@ -1,4 +1,9 @@
+from collections.abc import Iterable
 import datetime
+import functools
+import itertools
+import os
+import sqlite3
 
 
 def sqlite3_adapt_datetime(val: datetime.datetime) -> str:
@@ -18,11 +23,274 @@ def sqlite3_convert_timestamp(val: bytes) -> datetime.datetime:
     This converter is modification of standard library convertor taking into
     account possible timezone info.
 
+    Values are parsed with `datetime.datetime.fromisoformat`. Values not
+    supported by `datetime.datetime.fromisoformat` (e.g. fractional seconds
+    with number of digits other than 3 or 6 on Python 3.10) are parsed
+    with slower fallback parser.
+
     Converter usage::
 
         sqlite3.register_converter("timestamp", sqlite3_convert_timestamp)
 
     """
+    try:
+        return datetime.datetime.fromisoformat(val.decode())
+
+    except ValueError:
+        return _convert_timestamp(val)
+
+
+def sqlite3_adapt_datetime_us(val: datetime.datetime) -> int:
+    """SQLite3 datetime adapter encoding datetime as integer
+
+    Datetime is encoded as ``us * 128 + offset_code``, where ``us`` is
+    number of microseconds since 1970-01-01 UTC (naive datetimes are
+    treated as if they were in UTC) and ``offset_code`` is ``0`` for naive
+    datetimes or ``offset // 15min + 64`` for aware datetimes. Supported UTC
+    offsets are multiples of 15 minutes between ``-15:45`` and ``+15:45``
+    (which includes offsets of all currently used time zones). Encoded
+    value fits into SQLite's 64-bit INTEGER for years up to 4253.
+
+    Ordering of encoded values is consistent with ordering of represented
+    points in time, so range queries can compare encoded values directly.
+
+    Adapter usage::
+
+        sqlite3.register_adapter(datetime.datetime, sqlite3_adapt_datetime_us)
+
+    """
+    offset = val.utcoffset()
+
+    if offset is None:
+        return ((val - _epoch) // _us) * 128
+
+    quarters, rest = divmod(offset, _quarter)
+    if rest or not (-63 <= quarters <= 63):
+        raise ValueError('unsupported utc offset')
+
+    us = (val.replace(tzinfo=None) - offset - _epoch) // _us
+    return us * 128 + quarters + 64
+
+
+def sqlite3_convert_timestamp_us(val: bytes) -> datetime.datetime:
+    """SQLite3 timestamp converter decoding integer encoded datetime
+
+    Decodes values encoded with `sqlite3_adapt_datetime_us`. Values which
+    are not integers (e.g. text values not yet migrated with
+    `sqlite3_migrate_timestamp_us`) are converted with
+    `sqlite3_convert_timestamp`.
+
+    Converter usage::
+
+        sqlite3.register_converter("timestamp_us",
+                                   sqlite3_convert_timestamp_us)
+
+    """
+    try:
+        val = int(val)
+
+    except ValueError:
+        return sqlite3_convert_timestamp(val)
+
+    us, offset_code = divmod(val, 128)
+    return _epochs[offset_code] + datetime.timedelta(0, 0, us)
+
+
+def sqlite3_register_timestamp(integer: bool = False):
+    """Register SQLite3 timestamp adapter and converters
+
+    Converters are registered for ``timestamp`` (`sqlite3_convert_timestamp`)
+    and ``timestamp_us`` (`sqlite3_convert_timestamp_us`) declared column
+    types. Because SQLite3 adapters are registered per Python type,
+    `datetime.datetime` values are adapted with
+    `sqlite3_adapt_datetime_us` if `integer` is set, otherwise with
+    `sqlite3_adapt_datetime`.
+
+    """
+    sqlite3.register_adapter(datetime.datetime,
+                             (sqlite3_adapt_datetime_us if integer
+                              else sqlite3_adapt_datetime))
+    sqlite3.register_converter("timestamp", sqlite3_convert_timestamp)
+    sqlite3.register_converter("timestamp_us", sqlite3_convert_timestamp_us)
+
+
+def sqlite3_migrate_timestamp_us(conn: sqlite3.Connection,
+                                 table: str,
+                                 column: str,
+                                 chunk_size: int = 10000
+                                 ) -> int:
+    """Rewrite text timestamps as integer encoded timestamps
+
+    All text values of `column` in rowid `table` are converted with
+    `sqlite3_convert_timestamp` and updated with values encoded with
+    `sqlite3_adapt_datetime_us`. Values are updated in chunks of
+    `chunk_size` rows, each chunk in its own transaction. Number of updated
+    rows is returned.
+
+    Declared column type can not be changed in place - to read migrated
+    values with `sqlite3_convert_timestamp_us`, declared type should be
+    changed to ``timestamp_us`` by recreating the table, or converter should
+    be selected with column name (``sqlite3.PARSE_COLNAMES``).
+
+    """
+    table = _quote_identifier(table)
+    column = _quote_identifier(column)
+
+    select_sql = (f"SELECT rowid, CAST({column} AS BLOB) FROM {table} "
+                  f"WHERE rowid > ? AND typeof({column}) = 'text' "
+                  f"ORDER BY rowid LIMIT ?")
+    update_sql = f"UPDATE {table} SET {column} = ? WHERE rowid = ?"
+
+    count = 0
+    last_rowid = float('-inf')
+
+    while True:
+        rows = conn.execute(select_sql, (last_rowid, chunk_size)).fetchall()
+        if not rows:
+            return count
+
+        last_rowid = rows[-1][0]
+
+        with conn:
+            conn.executemany(
+                update_sql,
+                ((sqlite3_adapt_datetime_us(sqlite3_convert_timestamp(val)),
+                  rowid)
+                 for rowid, val in rows))
+
+        count += len(rows)
+
+
+def sqlite3_connect(path: os.PathLike | str,
+                    journal_mode: str = 'WAL',
+                    synchronous: str = 'NORMAL',
+                    mmap_size: int = 256 * 1024 * 1024,
+                    cache_size: int = -64 * 1024,
+                    cached_statements: int = 1024,
+                    **kwargs
+                    ) -> sqlite3.Connection:
+    """Open SQLite3 connection
+
+    Connection is opened with
+    ``sqlite3.PARSE_DECLTYPES | sqlite3.PARSE_COLNAMES`` type detection and
+    statement cache of `cached_statements` size. Additional `kwargs` are
+    passed to `sqlite3.connect`.
+
+    Adapters and converters are registered globally (for all connections),
+    so they are not registered by this function - timestamp adapter and
+    converters should be registered once (e.g. during application startup)
+    with `sqlite3_register_timestamp`.
+
+    After connecting, pragmas ``journal_mode``, ``synchronous``,
+    ``mmap_size`` and ``cache_size`` are set to provided values. Default
+    values (write-ahead log with ``NORMAL`` synchronous mode, 256MB memory
+    map and 64MB page cache) favor throughput while keeping database
+    consistent in case of application crash - in case of power loss,
+    transactions committed just before failure could be rolled back.
+
+    Example::
+
+        sqlite3_register_timestamp()
+
+        with contextlib.closing(sqlite3_connect('data.db')) as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS data "
+                         "(t TIMESTAMP, value REAL)")
+            sqlite3_insert_many(conn, "INSERT INTO data VALUES (?, ?)",
+                                rows)
+
+    """
+    conn = sqlite3.connect(
+        path,
+        detect_types=sqlite3.PARSE_DECLTYPES | sqlite3.PARSE_COLNAMES,
+        cached_statements=cached_statements,
+        **kwargs)
+
+    try:
+        conn.execute(f"PRAGMA journal_mode = {_quote_pragma(journal_mode)}")
+        conn.execute(f"PRAGMA synchronous = {_quote_pragma(synchronous)}")
+        conn.execute(f"PRAGMA mmap_size = {int(mmap_size)}")
+        conn.execute(f"PRAGMA cache_size = {int(cache_size)}")
+
+    except Exception:
+        conn.close()
+        raise
+
+    return conn
+
+
+def sqlite3_insert_many(conn: sqlite3.Connection,
+                        sql: str,
+                        rows: Iterable,
+                        chunk_size: int = 10000
+                        ) -> int:
+    """Execute `sql` for each of `rows` in chunked transactions
+
+    Rows are executed with `sqlite3.Connection.executemany` in chunks of
+    `chunk_size` rows. Each chunk is executed in single transaction which is
+    explicitly started and committed after chunk is executed (or rolled back
+    in case of error), regardless of connection's `isolation_level` or
+    `autocommit` attribute. Number of executed rows is returned.
+
+    If transaction is already open (``conn.in_transaction``), all chunks
+    are executed as part of that transaction, which is neither committed
+    nor rolled back. This includes connections with `autocommit` set to
+    ``False``, which always have open transaction.
+
+    """
+    if chunk_size < 1:
+        raise ValueError('invalid chunk size')
+
+    rows = iter(rows)
+    count = 0
+    in_transaction = conn.in_transaction
+
+    while True:
+        chunk = list(itertools.islice(rows, chunk_size))
+        if not chunk:
+            return count
+
+        if in_transaction:
+            conn.executemany(sql, chunk)
+
+        else:
+            conn.execute("BEGIN")
+
+            try:
+                conn.executemany(sql, chunk)
+
+            except BaseException:
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK")
+                raise
+
+            conn.execute("COMMIT")
+
+        count += len(chunk)
+
+
+_epoch = datetime.datetime(1970, 1, 1)
+_us = datetime.timedelta(microseconds=1)
+_quarter = datetime.timedelta(minutes=15)
+
+
+def _quote_identifier(identifier):
+    return '"' + identifier.replace('"', '""') + '"'
+
+
+def _quote_pragma(value):
+    return "'" + value.replace("'", "''") + "'"
+
+
+def _get_epochs():
+    utc_epoch = _epoch.replace(tzinfo=datetime.timezone.utc)
+    yield _epoch
+
+    for offset_code in range(1, 128):
+        tz = _get_timezone((offset_code - 64) * 15)
+        yield utc_epoch.astimezone(tz)
+
+
+def _convert_timestamp(val):
     datepart, timetzpart = val.split(b" ")
     if b"+" in timetzpart:
         tzsign = 1
@@ -41,11 +309,19 @@ def sqlite3_convert_timestamp(val: bytes) -> datetime.datetime:
         microseconds = 0
     if tzpart:
         tzhours, tzminutes = map(int, tzpart.split(b":"))
-        tz = datetime.timezone(
-            tzsign * datetime.timedelta(hours=tzhours, minutes=tzminutes))
+        tz = _get_timezone(tzsign * (tzhours * 60 + tzminutes))
     else:
         tz = None
 
     dt = datetime.datetime(year, month, day, hours, minutes, seconds,
                            microseconds, tz)
     return dt
+
+
+@functools.lru_cache(maxsize=None)
+def _get_timezone(minutes):
+    return datetime.timezone(datetime.timedelta(minutes=minutes))
+
+
+# epoch (1970-01-01 UTC) indexed by offset code
+_epochs = tuple(_get_epochs())
@@ -1,3 +1,10 @@
+import asyncio
+import gc
+import random
+import weakref
+
+import pytest
+
 from hat import util
 
 
@@ -32,3 +39,681 @@ def test_bytes_buffer():
     assert len(buff) == 3
     assert buff.clear() == 3
     assert len(buff) == 0
+
+
+def test_bytes_buffer_read_views():
+    buff = util.BytesBuffer()
+    assert buff.read_views() == []
+
+    data1 = b'123'
+    data2 = bytearray(b'456')
+    buff.add(data1)
+    buff.add(data2)
+
+    views = buff.read_views(4)
+    assert [bytes(i) for i in views] == [b'123', b'4']
+    assert all(isinstance(i, memoryview) for i in views)
+    assert views[0].obj is data1
+    assert views[1].obj is data2
+    assert len(buff) == 2
+
+    assert buff.read_views(0) == []
+
+    views = buff.read_views()
+    assert [bytes(i) for i in views] == [b'56']
+    assert len(buff) == 0
+
+
+def test_bytes_buffer_readinto():
+    buff = util.BytesBuffer()
+    buff.add(b'12')
+    buff.add(b'34')
+    buff.add(b'56')
+
+    buf = bytearray(3)
+    assert buff.readinto(buf) == 3
+    assert buf == b'123'
+    assert len(buff) == 3
+
+    buf = bytearray(5)
+    assert buff.readinto(memoryview(buf)[1:]) == 3
+    assert buf == b'\x00456\x00'
+    assert len(buff) == 0
+
+    assert buff.readinto(buf) == 0
+
+
+@pytest.mark.parametrize('buf', [b'xxx',
+                                 memoryview(b'xxx'),
+                                 memoryview(bytearray(6))[::2],
+                                 'xxx'])
+def test_bytes_buffer_readinto_invalid(buf):
+    buff = util.BytesBuffer()
+    buff.add(b'123')
+    buff.add(b'456')
+
+    with pytest.raises(TypeError):
+        buff.readinto(buf)
+
+    assert len(buff) == 6
+    assert bytes(buff.read()) == b'123456'
+
+
+def test_bytes_buffer_peek():
+    buff = util.BytesBuffer()
+    assert bytes(buff.peek()) == b''
+
+    data = b'123'
+    buff.add(data)
+    buff.add(b'45')
+    buff.add(b'6')
+
+    assert buff.peek(3) is data
+    assert bytes(buff.peek(2)) == b'12'
+    assert bytes(buff.peek(4)) == b'1234'
+    assert bytes(buff.peek()) == b'123456'
+    assert bytes(buff.peek(10)) == b'123456'
+    assert bytes(buff.peek(0)) == b''
+    assert len(buff) == 6
+
+    assert bytes(buff.read(4)) == b'1234'
+    assert bytes(buff.peek(1)) == b'5'
+    assert bytes(buff.peek()) == b'56'
+
+
+def test_bytes_buffer_find():
+    buff = util.BytesBuffer()
+    assert buff.find(b'x') == -1
+
+    buff.add(b'ab')
+    buff.add(memoryview(b'cxa'))
+    buff.add(b'b')
+    buff.add(bytearray(b'cab'))
+
+    assert buff.find(b'a') == 0
+    assert buff.find(b'a', 1) == 4
+    assert buff.find(b'abc') == 0
+    assert buff.find(b'abc', 1) == 4
+    assert buff.find(b'bca') == 5
+    assert buff.find(b'xab') == 3
+    assert buff.find(b'cxabc') == 2
+    assert buff.find(b'abcxabcab') == 0
+    assert buff.find(b'abcxabcabx') == -1
+    assert buff.find(b'y') == -1
+    assert buff.find(b'b', 8) == 8
+    assert buff.find(b'b', 9) == -1
+
+    assert bytes(buff.read(3)) == b'abc'
+    assert buff.find(b'abc') == 1
+    assert buff.find(b'x') == 0
+
+
+def test_bytes_buffer_find_incremental():
+    data = b'0123456789' * 10 + b'\r\n' + b'abc'
+    buff = util.BytesBuffer()
+
+    for i in data[:-3]:
+        assert buff.find(b'\r\n') == -1
+        buff.add(bytes([i]))
+
+    assert buff.find(b'\r\n') == 100
+
+    buff.add(data[-3:])
+    assert buff.find(b'\r\n') == 100
+    assert buff.find(b'\r\n', 101) == -1
+
+    assert bytes(buff.read(50)) == data[:50]
+    assert buff.find(b'\r\n') == 50
+    assert buff.find(b'bc') == 53
+
+
+def test_bytes_buffer_readuntil():
+    buff = util.BytesBuffer()
+    assert buff.readuntil(b'\n') is None
+
+    buff.add(b'ab')
+    buff.add(b'c\nd')
+    assert buff.readuntil(b'\n\n') is None
+    assert len(buff) == 5
+
+    assert bytes(buff.readuntil(b'\n')) == b'abc\n'
+    assert buff.readuntil(b'\n') is None
+
+    buff.add(b'\n')
+    assert bytes(buff.readuntil(b'\n')) == b'd\n'
+    assert len(buff) == 0
+
+
+def test_bytes_buffer_peek_uint():
+    buff = util.BytesBuffer()
+    assert buff.peek_uint(2) is None
+
+    buff.add(b'\x01')
+    buff.add(b'\x02\x03')
+    assert buff.peek_uint(1) == 1
+    assert buff.peek_uint(2) == 0x0102
+    assert buff.peek_uint(2, 'little') == 0x0201
+    assert buff.peek_uint(2, offset=1) == 0x0203
+    assert buff.peek_uint(3, 'little') == 0x030201
+    assert buff.peek_uint(4) is None
+    assert buff.peek_uint(1, offset=3) is None
+    assert len(buff) == 3
+
+
+@pytest.mark.parametrize('seed', range(10))
+def test_bytes_buffer_find_random(seed):
+    rng = random.Random(seed)
+    buff = util.BytesBuffer()
+    data = b''
+
+    for _ in range(100):
+        chunk = bytes(rng.choice(b'ab') for _ in range(rng.randint(1, 5)))
+        buff.add(chunk)
+        data += chunk
+
+        if rng.random() < 0.2:
+            n = rng.randint(0, len(data))
+            assert bytes(buff.read(n)) == data[:n]
+            data = data[n:]
+
+        sep = rng.choice([b'b', b'ab', b'aab', b'abba'])
+        start = rng.randint(0, 2)
+        assert buff.find(sep, start) == data.find(sep, start)
+
+
+def test_bytes_buffer_coalesce():
+    buff = util.BytesBuffer(coalesce_size=2, coalesce_limit=4)
+
+    for i in b'123456':
+        buff.add(bytes([i]))
+    assert buff.stats.chunk_count == 2
+
+    buff.add(b'789')
+    buff.add(b'ab')
+    assert buff.stats.chunk_count == 4
+    assert bytes(buff.peek()) == b'123456789ab'
+
+    result = buff.read(5)
+    assert result == b'12345'
+
+    buff.add(b'c')
+    assert result == b'12345'
+    assert bytes(buff.read()) == b'6789abc'
+
+    buff.add(b'd')
+    view = buff.peek()
+    buff.add(b'e')
+    assert view == b'd'
+    assert bytes(buff.read()) == b'de'
+
+    for i in b'fghij':
+        buff.add(bytes([i]))
+    views = buff.read_views(3)
+    buff.add(b'k')
+    assert [bytes(i) for i in views] == [b'fgh']
+    assert bytes(buff.read()) == b'ijk'
+
+
+def test_bytes_buffer_compact():
+    buff = util.BytesBuffer(coalesce_size=2, coalesce_limit=10)
+    buff.compact()
+    assert buff.stats.chunk_count == 0
+
+    buff.add(b'123')
+    buff.add(memoryview(b'45'))
+    buff.add(b'678')
+    assert buff.stats.chunk_count == 3
+
+    buff.compact()
+    assert buff.stats.chunk_count == 1
+    assert len(buff) == 8
+
+    buff.add(b'9')
+    buff.add(b'a')
+    assert buff.stats.chunk_count == 1
+
+    buff.add(b'b')
+    assert buff.stats.chunk_count == 2
+    assert bytes(buff.read()) == b'123456789ab'
+
+
+def test_bytes_buffer_watermarks():
+    with pytest.raises(ValueError):
+        util.BytesBuffer(low_watermark=1)
+
+    with pytest.raises(ValueError):
+        util.BytesBuffer(high_watermark=1, low_watermark=2)
+
+    buff = util.BytesBuffer()
+    assert buff.high_watermark is None
+    assert buff.low_watermark is None
+
+    buff.add(b'x' * 1000)
+    assert buff.writable
+
+    buff = util.BytesBuffer(high_watermark=8)
+    assert buff.high_watermark == 8
+    assert buff.low_watermark == 2
+
+    buff = util.BytesBuffer(high_watermark=4, low_watermark=2)
+    buff.add(b'1234')
+    assert buff.writable
+
+    buff.add(b'5')
+    assert not buff.writable
+
+    buff.read(2)
+    assert not buff.writable
+
+    buff.read(1)
+    assert buff.writable
+
+    buff.add(b'678')
+    assert not buff.writable
+
+    buff.clear()
+    assert buff.writable
+
+
+def test_bytes_buffer_stats():
+    buff = util.BytesBuffer()
+    assert buff.stats == util.BytesBufferStats(size=0,
+                                               peak_size=0,
+                                               chunk_count=0)
+
+    buff.add(b'123')
+    buff.add(b'45')
+    assert buff.stats == util.BytesBufferStats(size=5,
+                                               peak_size=5,
+                                               chunk_count=2)
+
+    buff.read(4)
+    assert buff.stats == util.BytesBufferStats(size=1,
+                                               peak_size=5,
+                                               chunk_count=1)
+
+    buff.add(b'6')
+    buff.clear()
+    assert buff.stats == util.BytesBufferStats(size=0,
+                                               peak_size=5,
+                                               chunk_count=0)
+
+
+async def test_bytes_buffer_drain():
+    buff = util.BytesBuffer(high_watermark=4, low_watermark=2)
+    await buff.drain()
+
+    buff.add(b'12345')
+
+    drain_tasks = [asyncio.create_task(buff.drain()) for _ in range(3)]
+    cancelled_task = asyncio.create_task(buff.drain())
+    await asyncio.sleep(0)
+    assert not any(task.done() for task in drain_tasks)
+
+    cancelled_task.cancel()
+
+    buff.read(1)
+    await asyncio.sleep(0)
+    assert not any(task.done() for task in drain_tasks)
+
+    buff.read(2)
+    await asyncio.wait_for(asyncio.gather(*drain_tasks), 0.1)
+
+    with pytest.raises(asyncio.CancelledError):
+        await cancelled_task
+
+
+async def test_bytes_buffer_drain_producer():
+    buff = util.BytesBuffer(high_watermark=100, low_watermark=10)
+    data = bytes(range(256)) * 20
+
+    async def produce():
+        for i in range(0, len(data), 30):
+            await buff.drain()
+            buff.add(data[i:i+30])
+
+    producer = asyncio.create_task(produce())
+    result = bytearray()
+
+    while len(result) < len(data):
+        await asyncio.sleep(0)
+        result.extend(buff.read(7))
+        assert buff.stats.peak_size <= 130
+
+    await producer
+    assert result == data
+
+
+def test_spsc_bytes_buffer():
+    buff = util.SpscBytesBuffer()
+    assert len(buff) == 0
+    assert buff.read() == b''
+
+    buff.add(b'123')
+    buff.add(b'')
+    buff.add(bytearray(b'45'))
+    assert len(buff) == 5
+
+    assert bytes(buff.read(2)) == b'12'
+    assert bytes(buff.read(2)) == b'34'
+    assert [bytes(i) for i in buff.read_views()] == [b'5']
+
+    buff.add(b'678')
+    assert buff.clear() == 3
+    assert len(buff) == 0
+
+
+async def test_spsc_bytes_buffer_wait():
+    buff = util.SpscBytesBuffer()
+    buff.add(b'12')
+    await buff.wait(2)
+
+    wait_task = asyncio.create_task(buff.wait(4))
+    await asyncio.sleep(0)
+    buff.add(b'3')
+    await asyncio.sleep(0)
+    assert not wait_task.done()
+
+    buff.add(b'4')
+    await asyncio.wait_for(wait_task, 0.1)
+    assert bytes(buff.read()) == b'1234'
+
+
+async def test_spsc_bytes_buffer_threads():
+    loop = asyncio.get_running_loop()
+    buff = util.SpscBytesBuffer()
+    data = bytes(range(256)) * 100
+    notify_count = 0
+
+    def call_soon_threadsafe(*args):
+        nonlocal notify_count
+        notify_count += 1
+        return orig_call_soon_threadsafe(*args)
+
+    def produce():
+        for i in range(0, len(data), 3):
+            buff.add(data[i:i+3])
+
+    orig_call_soon_threadsafe = loop.call_soon_threadsafe
+    loop.call_soon_threadsafe = call_soon_threadsafe
+
+    try:
+        producer = loop.run_in_executor(None, produce)
+        result = bytearray()
+
+        while len(result) < len(data):
+            await asyncio.wait_for(buff.wait(), 1)
+            result.extend(buff.read(100))
+
+        await producer
+
+    finally:
+        loop.call_soon_threadsafe = orig_call_soon_threadsafe
+
+    assert result == data
+    assert len(buff) == 0
+    assert notify_count < len(data) // 3
+
+
+@pytest.fixture(params=['py', 'c'])
+def ring_buffer_cls(request):
+    if request.param == 'py':
+        return util.bytes._PyRingBuffer
+
+    return pytest.importorskip('hat.util._ring').RingBuffer
+
+
+def test_ring_buffer(ring_buffer_cls):
+    with pytest.raises(ValueError):
+        ring_buffer_cls(0)
+
+    buff = ring_buffer_cls(5)
+    assert buff.size == 5
+    assert len(buff) == 0
+    assert bytes(buff.read()) == b''
+
+    buff.add(b'12')
+    buff.add(bytearray(b'34'))
+    assert len(buff) == 4
+
+    with pytest.raises(ValueError):
+        buff.add(b'56')
+    assert len(buff) == 4
+
+    assert buff.write(b'56') == 1
+    assert buff.write(b'6') == 0
+    assert len(buff) == 5
+
+    assert bytes(buff.peek(2)) == b'12'
+    assert bytes(buff.read(2)) == b'12'
+    assert len(buff) == 3
+
+    buff.add(memoryview(b'67'))
+    assert bytes(buff.peek()) == b'34567'
+    assert buff.peek_uint(2, offset=2) == 0x3536
+    assert buff.peek_uint(2, 'little', 2) == 0x3635
+    assert buff.peek_uint(6) is None
+    assert buff.find(b'56') == 2
+    assert buff.find(b'4', 2) == -1
+
+    assert bytes(buff.readuntil(b'5')) == b'345'
+    assert buff.readuntil(b'5') is None
+
+    buf = bytearray(1)
+    assert buff.readinto(buf) == 1
+    assert buf == b'6'
+
+    assert [bytes(i) for i in buff.read_views()] == [b'7']
+    assert buff.read_views() == []
+
+    buff.add(b'12345')
+    assert buff.clear() == 5
+    assert len(buff) == 0
+
+
+def test_ring_buffer_keywords(ring_buffer_cls):
+    buff = ring_buffer_cls(10)
+    buff.add(b'123456')
+
+    assert bytes(buff.peek(n=2)) == b'12'
+    assert buff.peek_uint(size=1, byteorder='little', offset=1) == 0x32
+    assert buff.find(sep=b'4', start=1) == 3
+    assert bytes(buff.read(n=2)) == b'12'
+    assert [bytes(i) for i in buff.read_views(n=2)] == [b'34']
+    assert bytes(buff.read()) == b'56'
+
+
+def test_ring_buffer_interface(ring_buffer_cls):
+    names = {name for name in dir(util.bytes._RingBuffer)
+             if not name.startswith('_')}
+    buff = ring_buffer_cls(1)
+
+    assert names == {name for name in dir(buff) if not name.startswith('_')}
+
+
+def test_ring_buffer_wrap(ring_buffer_cls):
+    buff = ring_buffer_cls(7)
+    data = b''
+
+    for i in range(100):
+        chunk = bytes([i % 256]) * (i % 4 + 1)
+        written = buff.write(chunk)
+        data += chunk[:written]
+
+        assert len(buff) == len(data)
+        assert bytes(buff.peek()) == data
+        assert buff.find(data[-2:]) == data.find(data[-2:])
+        assert buff.peek_uint(len(data)) == int.from_bytes(data, 'big')
+
+        n = i % 3 + 1
+        assert bytes(buff.read(n)) == data[:n]
+        data = data[n:]
+
+
+def test_ring_buffer_buffer_protocol():
+    _ring = pytest.importorskip('hat.util._ring')
+
+    buff = _ring.RingBuffer(4)
+    buff.add(b'123')
+    buff.read(2)
+    buff.add(b'456')
+
+    with memoryview(buff) as view:
+        assert view.readonly
+        assert bytes(view) == b'3456'
+
+        with pytest.raises(BufferError):
+            buff.read(1)
+
+    assert bytes(buff.read(1)) == b'3'
+
+    with memoryview(buff) as view:
+        buff.add(b'7')
+        assert bytes(view) == b'456'
+
+        with pytest.raises(BufferError):
+            memoryview(buff)
+
+    assert bytes(memoryview(buff)) == b'4567'
+
+
+@pytest.fixture(params=['py', 'c'])
+def bytes_map_cls(request):
+    if request.param == 'py':
+        return util.bytes._PyBytesMap
+
+    pytest.importorskip('hat.util._bytes_map')
+    return util.bytes._CBytesMap
+
+
+def test_bytes_map(bytes_map_cls):
+    m = bytes_map_cls({b'a': 1})
+    assert len(m) == 1
+    assert m[b'a'] == 1
+
+    m[bytearray(b'b')] = 2
+    m[memoryview(b'xcx')[1:2]] = 3
+    assert len(m) == 3
+    assert dict(m) == {b'a': 1, b'b': 2, b'c': 3}
+    assert all(type(key) is bytes for key in m)
+
+    assert m[memoryview(b'b')] == 2
+    assert b'c' in m
+    assert b'd' not in m
+    assert 'a' not in m
+    assert m.get(b'd') is None
+
+    with pytest.raises(KeyError):
+        m[b'd']
+
+    with pytest.raises(TypeError):
+        m['a'] = 4
+
+    m[b'a'] = 4
+    assert m[b'a'] == 4
+    assert len(m) == 3
+
+    del m[b'a']
+    assert b'a' not in m
+    assert len(m) == 2
+
+    with pytest.raises(KeyError):
+        del m[b'a']
+
+    assert m.pop(b'b') == 2
+    assert list(m.items()) == [(b'c', 3)]
+
+    m[b''] = 5
+    assert m[b''] == 5
+
+    m.clear()
+    assert len(m) == 0
+    assert list(m) == []
+
+
+@pytest.mark.parametrize('key', [3, 10**9, 'a', None, [1, 2]])
+def test_bytes_map_invalid_key(bytes_map_cls, key):
+    m = bytes_map_cls({b'\x00\x00\x00': 1})
+
+    with pytest.raises(TypeError):
+        m[key] = 2
+
+    with pytest.raises(TypeError):
+        m[key]
+
+    with pytest.raises(TypeError):
+        del m[key]
+
+    assert key not in m
+    assert dict(m) == {b'\x00\x00\x00': 1}
+
+
+@pytest.mark.parametrize('key_size', [4, 32])
+def test_bytes_map_large(bytes_map_cls, key_size):
+    count = 10_000
+    m = bytes_map_cls()
+
+    for i in range(count):
+        m[i.to_bytes(key_size, 'big')] = i
+    assert len(m) == count
+    assert sorted(m.values()) == list(range(count))
+
+    for i in range(0, count, 2):
+        del m[i.to_bytes(key_size, 'big')]
+    assert len(m) == count // 2
+    assert all(m[i.to_bytes(key_size, 'big')] == i
+               for i in range(1, count, 2))
+
+    for i in range(1, count, 2):
+        del m[i.to_bytes(key_size, 'big')]
+    assert len(m) == 0
+    assert list(m) == []
+
+
+def test_bytes_map_modified_during_iteration():
+    pytest.importorskip('hat.util._bytes_map')
+
+    m = util.bytes._CBytesMap({b'a': 1, b'b': 2})
+
+    with pytest.raises(RuntimeError):
+        for key in m:
+            m[key + b'x'] = 3
+
+    it = iter(m)
+    next(it)
+    m[b'a'] = 4
+    next(it)
+
+
+def test_bytes_map_gc():
+    pytest.importorskip('hat.util._bytes_map')
+
+    class Value:
+        pass
+
+    m = util.bytes._CBytesMap()
+    value = Value()
+    value.m = m
+    m[b'a'] = value
+    ref = weakref.ref(value)
+
+    del m, value
+    gc.collect()
+    assert ref() is None
+
+
+def test_bytes_map_iter_gc():
+    pytest.importorskip('hat.util._bytes_map')
+
+    class Value:
+        pass
+
+    m = util.bytes._CBytesMap()
+    value = Value()
+    value.it = iter(m)
+    m[b'a'] = value
+    ref = weakref.ref(value)
+
+    del m, value
+    gc.collect()
+    assert ref() is None
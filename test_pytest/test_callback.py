@@ -1,3 +1,7 @@
+import asyncio
+import gc
+import time
+
 import pytest
 
 from hat import util
@@ -86,3 +90,542 @@ def test_callback_registry_without_exception_cb(cb_count):
     with pytest.raises(Exception):
         registry.notify()
     assert call_count == 1
+
+
+def test_callback_registry_duplicate():
+    x = []
+    registry = util.CallbackRegistry()
+
+    handle1 = registry.register(x.append)
+    handle2 = registry.register(x.append)
+    registry.notify(1)
+    assert x == [1, 1]
+
+    handle2.cancel()
+    handle2.cancel()
+    registry.notify(2)
+    assert x == [1, 1, 2]
+
+    handle1.cancel()
+    registry.notify(3)
+    assert x == [1, 1, 2]
+
+
+def test_callback_registry_cancel_during_notify():
+    calls = []
+    registry = util.CallbackRegistry()
+
+    def cb1():
+        calls.append(1)
+        handle1.cancel()
+
+    def cb2():
+        calls.append(2)
+        handle3.cancel()
+
+    def cb3():
+        calls.append(3)
+
+    handle1 = registry.register(cb1)
+    registry.register(cb2)
+    handle3 = registry.register(cb3)
+
+    registry.notify()
+    assert calls == [1, 2]
+
+    registry.notify()
+    assert calls == [1, 2, 2]
+
+
+def test_callback_registry_register_during_notify():
+    calls = []
+    registry = util.CallbackRegistry()
+
+    def cb():
+        calls.append('cb')
+        registry.register(lambda: calls.append('new'))
+
+    registry.register(cb)
+
+    registry.notify()
+    assert calls == ['cb']
+
+    registry.notify()
+    assert calls == ['cb', 'cb', 'new']
+
+
+async def test_callback_registry_notify_async():
+    calls = []
+    registry = util.CallbackRegistry()
+
+    async def async_cb(value):
+        await asyncio.sleep(0)
+        calls.append(('async', value))
+
+    def sync_cb(value):
+        calls.append(('sync', value))
+
+    registry.register(async_cb)
+    registry.register(sync_cb)
+
+    await registry.notify_async(1)
+    assert calls == [('sync', 1), ('async', 1)]
+
+
+@pytest.mark.parametrize('concurrency_limit', [None, 1, 3])
+async def test_callback_registry_notify_async_concurrency_limit(
+        concurrency_limit):
+    cb_count = 10
+    active = 0
+    max_active = 0
+    registry = util.CallbackRegistry(concurrency_limit=concurrency_limit)
+
+    async def cb():
+        nonlocal active, max_active
+        active += 1
+        max_active = max(active, max_active)
+        await asyncio.sleep(0.001)
+        active -= 1
+
+    for _ in range(cb_count):
+        registry.register(cb)
+
+    await registry.notify_async()
+    assert active == 0
+    assert max_active == (concurrency_limit or cb_count)
+
+
+async def test_callback_registry_notify_async_exception():
+    raised = []
+    registry = util.CallbackRegistry(raised.append)
+
+    def sync_cb():
+        raise Exception('sync')
+
+    async def async_cb():
+        raise Exception('async')
+
+    registry.register(sync_cb)
+    registry.register(async_cb)
+
+    await registry.notify_async()
+    assert [str(e) for e in raised] == ['sync', 'async']
+
+    registry = util.CallbackRegistry()
+    event = asyncio.Event()
+
+    async def wait_cb():
+        try:
+            await event.wait()
+        except asyncio.CancelledError:
+            raised.append('cancelled')
+            raise
+
+    registry.register(wait_cb)
+    registry.register(async_cb)
+
+    with pytest.raises(Exception, match='async'):
+        await registry.notify_async()
+
+    await asyncio.sleep(0)
+    assert raised[-1] == 'cancelled'
+
+
+def test_callback_registry_invalid_concurrency_limit():
+    with pytest.raises(ValueError):
+        util.CallbackRegistry(concurrency_limit=0)
+
+
+async def test_batch_callback_registry():
+    batches = []
+    registry = util.BatchCallbackRegistry()
+    registry.register(batches.append)
+
+    registry.notify(1)
+    registry.notify(2, 3)
+    assert batches == []
+
+    await asyncio.sleep(0)
+    assert batches == [[(1, ), (2, 3)]]
+
+    await asyncio.sleep(0)
+    assert batches == [[(1, ), (2, 3)]]
+
+    registry.notify(4)
+    registry.flush()
+    assert batches == [[(1, ), (2, 3)], [(4, )]]
+
+    await asyncio.sleep(0)
+    assert len(batches) == 2
+
+
+async def test_batch_callback_registry_delay():
+    batches = []
+    registry = util.BatchCallbackRegistry(delay=10)
+    registry.register(batches.append)
+
+    registry.notify(1)
+    await asyncio.sleep(0)
+    registry.notify(2)
+    await asyncio.sleep(0)
+    assert batches == []
+
+    registry.flush()
+    assert batches == [[(1, ), (2, )]]
+
+    loop = asyncio.get_running_loop()
+    future = loop.create_future()
+    registry = util.BatchCallbackRegistry(delay=0.01)
+    registry.register(future.set_result)
+
+    registry.notify(3)
+    batch = await asyncio.wait_for(future, 1)
+    assert batch == [(3, )]
+
+
+async def test_batch_callback_registry_notify_async():
+    batches = []
+    registry = util.BatchCallbackRegistry(delay=10)
+
+    async def cb(batch):
+        await asyncio.sleep(0)
+        batches.append(batch)
+
+    registry.register(cb)
+
+    registry.notify(1)
+    await registry.notify_async(2, 3)
+    assert batches == [[(1, ), (2, 3)]]
+
+    await asyncio.sleep(0)
+    assert batches == [[(1, ), (2, 3)]]
+
+
+def test_batch_callback_registry_kwargs():
+    registry = util.BatchCallbackRegistry()
+
+    with pytest.raises(TypeError):
+        registry.notify(1, x=2)
+
+
+async def test_batch_callback_registry_exception_cb():
+    raised = []
+    registry = util.BatchCallbackRegistry(raised.append)
+
+    def cb(batch):
+        raise Exception(len(batch))
+
+    registry.register(cb)
+    registry.notify(1)
+    registry.notify(2)
+    await asyncio.sleep(0)
+
+    assert [e.args for e in raised] == [(2, )]
+
+
+def test_topic_callback_registry_example():
+    x = []
+    y = []
+    registry = util.TopicCallbackRegistry()
+
+    registry.register(('a', '*'), x.append)
+    registry.register(('a', '**'), y.append)
+
+    registry.notify(('a', 'b'), 1)
+    registry.notify(('a', 'b', 'c'), 2)
+    registry.notify(('b', ), 3)
+
+    assert x == [1]
+    assert y == [1, 2]
+
+
+@pytest.mark.parametrize('pattern, topic, matches', [
+    ((), (), True),
+    ((), ('a', ), False),
+    (('a', ), ('a', ), True),
+    (('a', ), ('b', ), False),
+    (('a', ), ('a', 'b'), False),
+    (('*', ), ('a', ), True),
+    (('*', ), (), False),
+    (('a', '*', 'c'), ('a', 'b', 'c'), True),
+    (('a', '*', 'c'), ('a', 'b', 'd'), False),
+    (('a', '*', 'c'), ('a', 'c'), False),
+    (('**', ), (), True),
+    (('**', ), ('a', 'b', 'c'), True),
+    (('a', '**'), ('a', ), True),
+    (('a', '**'), ('a', 'b', 'c'), True),
+    (('a', '**'), ('b', 'a'), False),
+    (('*', 'b', '**'), ('a', 'b'), True),
+    (('*', 'b', '**'), ('a', 'b', 'c', 'd'), True),
+    (('*', 'b', '**'), ('a', 'c', 'b'), False),
+])
+def test_topic_callback_registry_match(pattern, topic, matches):
+    calls = []
+    registry = util.TopicCallbackRegistry()
+
+    with registry.register(pattern, calls.append):
+        registry.notify(topic, 1)
+
+    assert calls == ([1] if matches else [])
+
+    registry.notify(topic, 2)
+    assert calls == ([1] if matches else [])
+
+
+def test_topic_callback_registry_order():
+    calls = []
+    registry = util.TopicCallbackRegistry()
+
+    registry.register(('a', 'b'), lambda: calls.append(1))
+    registry.register(('**', ), lambda: calls.append(2))
+    registry.register(('*', 'b'), lambda: calls.append(3))
+    registry.register(('a', '**'), lambda: calls.append(4))
+    registry.register(('a', 'b'), lambda: calls.append(5))
+
+    registry.notify(('a', 'b'))
+    assert calls == [1, 2, 3, 4, 5]
+
+
+def test_topic_callback_registry_wildcard_topic_segment():
+    calls = []
+    registry = util.TopicCallbackRegistry()
+
+    registry.register(('a', '*'), lambda: calls.append(1))
+    registry.register(('*', '*'), lambda: calls.append(2))
+    registry.register(('*', '**'), lambda: calls.append(3))
+
+    registry.notify(('a', '*'))
+    assert calls == [1, 2, 3]
+
+    calls.clear()
+    registry.notify(('*', '*'))
+    assert calls == [2, 3]
+
+
+def test_topic_callback_registry_cancel():
+    calls = []
+    registry = util.TopicCallbackRegistry()
+
+    def cb1():
+        calls.append(1)
+        handle2.cancel()
+
+    handle1 = registry.register(('a', 'b'), cb1)
+    handle2 = registry.register(('a', '*'), lambda: calls.append(2))
+    handle3 = registry.register(('a', '**'), lambda: calls.append(3))
+
+    registry.notify(('a', 'b'))
+    assert calls == [1, 3]
+
+    handle1.cancel()
+    handle3.cancel()
+    handle3.cancel()
+    registry.notify(('a', 'b'))
+    assert calls == [1, 3]
+
+    assert registry._root.children == {}
+
+
+def test_topic_callback_registry_invalid_pattern():
+    registry = util.TopicCallbackRegistry()
+
+    with pytest.raises(ValueError):
+        registry.register(('a', '**', 'b'), lambda: None)
+
+
+def test_topic_callback_registry_exception_cb():
+    raised = []
+    registry = util.TopicCallbackRegistry(raised.append)
+
+    def cb():
+        raise Exception()
+
+    registry.register(('a', ), cb)
+    registry.register(('a', ), cb)
+    registry.notify(('a', ))
+    assert len(raised) == 2
+
+    registry = util.TopicCallbackRegistry()
+    registry.register(('a', ), cb)
+
+    with pytest.raises(Exception):
+        registry.notify(('a', ))
+
+
+def test_callback_registry_stats():
+    registry = util.CallbackRegistry(lambda e: None, stats_enabled=True)
+
+    def cb1(value):
+        if value:
+            raise Exception()
+
+    def cb2(value):
+        time.sleep(0.01)
+
+    handle1 = registry.register(cb1)
+    registry.register(cb2)
+
+    stats = registry.get_stats()
+    assert stats == [util.CallbackStats(cb1, 0, 0, 0.0, 0.0),
+                     util.CallbackStats(cb2, 0, 0, 0.0, 0.0)]
+
+    registry.notify(False)
+    registry.notify(True)
+
+    stats1, stats2 = registry.get_stats()
+    assert stats1.cb is cb1
+    assert stats1.call_count == 2
+    assert stats1.exception_count == 1
+    assert stats2.cb is cb2
+    assert stats2.call_count == 2
+    assert stats2.exception_count == 0
+    assert stats2.total_duration >= 0.02
+    assert 0.01 <= stats2.max_duration <= stats2.total_duration
+
+    handle1.cancel()
+    assert [i.cb for i in registry.get_stats()] == [cb2]
+
+    with pytest.raises(ValueError):
+        util.CallbackRegistry().get_stats()
+
+
+def test_callback_registry_slow_cb():
+    slow = []
+    registry = util.CallbackRegistry(
+        slow_cb_threshold=0.01,
+        slow_cb=lambda cb, duration: slow.append((cb, duration)))
+
+    def fast_cb():
+        pass
+
+    def slow_cb():
+        time.sleep(0.01)
+
+    registry.register(fast_cb)
+    registry.register(slow_cb)
+    registry.notify()
+
+    assert len(slow) == 1
+    assert slow[0][0] is slow_cb
+    assert slow[0][1] >= 0.01
+
+    with pytest.raises(ValueError):
+        util.CallbackRegistry(slow_cb_threshold=1)
+
+
+def test_callback_registry_slow_cb_weak():
+    slow = []
+    registry = util.CallbackRegistry(
+        slow_cb_threshold=0,
+        slow_cb=lambda cb, duration: slow.append(cb))
+
+    class Subscriber:
+
+        def on_event(self):
+            pass
+
+    def fn_cb():
+        pass
+
+    subscriber = Subscriber()
+    registry.register(subscriber.on_event, weak=True)
+    registry.register(fn_cb, weak=True)
+    registry.notify()
+
+    assert len(slow) == 2
+    assert slow[0] == subscriber.on_event
+    assert slow[0].__self__ is subscriber
+    assert slow[1] is fn_cb
+
+
+def test_callback_registry_weak():
+    calls = []
+
+    class Subscriber:
+
+        def __init__(self, name):
+            self.name = name
+
+        def on_event(self, value):
+            calls.append((self.name, value))
+
+    def fn_cb(value):
+        calls.append(('fn', value))
+
+    subscriber1 = Subscriber('s1')
+    subscriber2 = Subscriber('s2')
+
+    registry = util.CallbackRegistry(stats_enabled=True)
+    registry.register(subscriber1.on_event, weak=True)
+    registry.register(subscriber2.on_event, weak=True)
+    registry.register(fn_cb, weak=True)
+    assert registry.cb_count == 3
+    assert [i.cb for i in registry.get_stats()] == [subscriber1.on_event,
+                                                    subscriber2.on_event,
+                                                    fn_cb]
+    assert registry.dead_cb_count == 0
+
+    registry.notify(1)
+    assert calls == [('s1', 1), ('s2', 1), ('fn', 1)]
+
+    del subscriber1
+    gc.collect()
+    assert registry.cb_count == 2
+    assert registry.dead_cb_count == 1
+
+    registry.notify(2)
+    assert calls[3:] == [('s2', 2), ('fn', 2)]
+    assert registry.cb_count == 2
+    assert registry.dead_cb_count == 0
+
+    del fn_cb
+    gc.collect()
+    registry.notify(3)
+    assert calls[5:] == [('s2', 3)]
+    assert registry.cb_count == 1
+    assert registry.dead_cb_count == 0
+
+
+def test_callback_registry_weak_builtin_method():
+    registry = util.CallbackRegistry(stats_enabled=True)
+
+    with pytest.raises(TypeError):
+        registry.register([].append, weak=True)
+    assert registry.cb_count == 0
+
+    class List(list):
+        pass
+
+    lst = List()
+    registry.register(lst.append, weak=True)
+    assert registry.cb_count == 1
+
+    registry.notify(1)
+    assert lst == [1]
+    assert [i.cb for i in registry.get_stats()] == [lst.append]
+
+    del lst
+    gc.collect()
+    assert registry.cb_count == 0
+    assert registry.dead_cb_count == 1
+
+
+def test_callback_registry_weak_cancel():
+    calls = []
+    registry = util.CallbackRegistry(stats_enabled=True)
+
+    def cb():
+        calls.append(1)
+
+    handle = registry.register(cb, weak=True)
+    registry.notify()
+    assert [i.cb for i in registry.get_stats()] == [cb]
+
+    handle.cancel()
+    del cb
+    gc.collect()
+
+    registry.notify()
+    assert calls == [1]
+    assert registry.cb_count == 0
+    assert registry.dead_cb_count == 0
@@ -1,4 +1,6 @@
+import asyncio
 import datetime
+import time
 
 import pytest
 
@@ -19,7 +21,38 @@ from hat import util
                                    util.cron.ValueSubExpr(5)]),
         month=util.cron.ListSubExpr([util.cron.ValueSubExpr(6),
                                      util.cron.RangeSubExpr(7, 8)]),
-        day_of_week=util.cron.AllSubExpr()))
+        day_of_week=util.cron.AllSubExpr())),
+
+    ('*/5 1-10/3 2/10 * *', util.cron.Expr(
+        minute=util.cron.RangeSubExpr(0, 59, 5),
+        hour=util.cron.RangeSubExpr(1, 10, 3),
+        day=util.cron.RangeSubExpr(2, 31, 10),
+        month=util.cron.AllSubExpr(),
+        day_of_week=util.cron.AllSubExpr())),
+
+    ('0 0 * jan,MAR-Jun sun-fri/2', util.cron.Expr(
+        minute=util.cron.ValueSubExpr(0),
+        hour=util.cron.ValueSubExpr(0),
+        day=util.cron.AllSubExpr(),
+        month=util.cron.ListSubExpr([util.cron.ValueSubExpr(1),
+                                     util.cron.RangeSubExpr(3, 6)]),
+        day_of_week=util.cron.RangeSubExpr(0, 5, 2))),
+
+    ('*/10 * * * * *', util.cron.Expr(
+        minute=util.cron.AllSubExpr(),
+        hour=util.cron.AllSubExpr(),
+        day=util.cron.AllSubExpr(),
+        month=util.cron.AllSubExpr(),
+        day_of_week=util.cron.AllSubExpr(),
+        second=util.cron.RangeSubExpr(0, 59, 10))),
+
+    ('0 * * * *', util.cron.Expr(
+        minute=util.cron.ValueSubExpr(0),
+        hour=util.cron.AllSubExpr(),
+        day=util.cron.AllSubExpr(),
+        month=util.cron.AllSubExpr(),
+        day_of_week=util.cron.AllSubExpr(),
+        second=util.cron.ValueSubExpr(0)))
 ])
 def test_parse(expr_str, expr):
     result = util.cron.parse(expr_str)
@@ -32,7 +65,14 @@ def test_parse(expr_str, expr):
     '* 24 * * *',
     '* * 0 * *',
     '* * * 0 *',
-    '* * * * 7'
+    '* * * * 7',
+    '*/0 * * * *',
+    '1-2/x * * * *',
+    '* * * * mon/sun/tue',
+    '* * * foo *',
+    '* * * * jan',
+    '60 * * * * *',
+    '* * * * * * *'
 ])
 def test_parse_invalid(expr_str):
     with pytest.raises(Exception):
@@ -42,7 +82,67 @@ def test_parse_invalid(expr_str):
 @pytest.mark.parametrize('expr_str, t_now, t_next', [
     ('* * * * *',
      datetime.datetime(1970, 1, 1),
-     datetime.datetime(1970, 1, 1, minute=1))
+     datetime.datetime(1970, 1, 1, minute=1)),
+
+    ('* * * * *',
+     datetime.datetime(1970, 1, 1, 0, 0, 30, 123),
+     datetime.datetime(1970, 1, 1, minute=1)),
+
+    ('59 23 31 12 *',
+     datetime.datetime(1970, 1, 1),
+     datetime.datetime(1970, 12, 31, 23, 59)),
+
+    ('0 0 1 1 *',
+     datetime.datetime(1970, 12, 31, 23, 59),
+     datetime.datetime(1971, 1, 1)),
+
+    ('0 0 29 2 *',
+     datetime.datetime(2001, 3, 1),
+     datetime.datetime(2004, 2, 29)),
+
+    ('0 0 29 2 1',
+     datetime.datetime(2001, 3, 1),
+     datetime.datetime(2016, 2, 29)),
+
+    ('0 0 31 * *',
+     datetime.datetime(1970, 1, 31),
+     datetime.datetime(1970, 3, 31)),
+
+    ('30 12 * * 0',
+     datetime.datetime(1970, 1, 1),
+     datetime.datetime(1970, 1, 4, 12, 30)),
+
+    ('0-10 3,5 10-12 * *',
+     datetime.datetime(1970, 1, 10, 3, 10),
+     datetime.datetime(1970, 1, 10, 5, 0)),
+
+    ('* * * * *',
+     datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc),
+     datetime.datetime(1970, 1, 1, minute=1, tzinfo=datetime.timezone.utc)),
+
+    ('*/15 * * * *',
+     datetime.datetime(1970, 1, 1, 0, 50),
+     datetime.datetime(1970, 1, 1, 1, 0)),
+
+    ('0 0 * * mon',
+     datetime.datetime(1970, 1, 1),
+     datetime.datetime(1970, 1, 5)),
+
+    ('* * * * * *',
+     datetime.datetime(1970, 1, 1, 0, 0, 0, 500),
+     datetime.datetime(1970, 1, 1, 0, 0, 1)),
+
+    ('*/20 * * * * *',
+     datetime.datetime(1970, 1, 1, 0, 0, 40),
+     datetime.datetime(1970, 1, 1, 0, 1, 0)),
+
+    ('30 0 0 1 * *',
+     datetime.datetime(1970, 1, 1, 0, 0, 30),
+     datetime.datetime(1970, 2, 1, 0, 0, 30)),
+
+    ('15,45 */2 * * * *',
+     datetime.datetime(1970, 1, 1, 0, 1, 50),
+     datetime.datetime(1970, 1, 1, 0, 2, 15))
 ])
 def test_next(expr_str, t_now, t_next):
     expr = util.cron.parse(expr_str)
@@ -50,12 +150,346 @@ def test_next(expr_str, t_now, t_next):
     assert result == t_next
 
 
+@pytest.mark.parametrize('expr_str, step', [
+    ('0,7,14,21,28,35 * * * *', datetime.timedelta(minutes=1)),
+    ('0 3-5 * * 1,3', datetime.timedelta(minutes=1)),
+    ('15,45 12 1-3 * 0', datetime.timedelta(minutes=1)),
+    ('0 0 1,15 * *', datetime.timedelta(minutes=1)),
+    ('*/17 3-50/7 * * * *', datetime.timedelta(seconds=1))
+])
+def test_next_match(expr_str, step):
+    expr = util.cron.parse(expr_str)
+    t = datetime.datetime(1999, 12, 15, 7, 13)
+
+    for _ in range(5):
+        t_next = util.cron.next(expr, t)
+
+        t = t + step
+        while not util.cron.match(expr, t):
+            t = t + step
+
+        assert t_next == t
+
+
+@pytest.mark.parametrize('expr_str', [
+    '0 0 30 2 *',
+    '0 0 31 4 *'
+])
+def test_next_not_found(expr_str):
+    expr = util.cron.parse(expr_str)
+
+    with pytest.raises(ValueError):
+        util.cron.next(expr, datetime.datetime(1970, 1, 1))
+
+
 @pytest.mark.parametrize('expr_str, t, success', [
     ('* * * * *',
      datetime.datetime(1970, 1, 1),
-     True)
+     True),
+
+    ('* * * * *',
+     datetime.datetime(1970, 1, 1, second=1),
+     False),
+
+    ('1 2-3 4,5 6,7-8 *',
+     datetime.datetime(1970, 8, 5, 3, 1),
+     True),
+
+    ('1 2-3 4,5 6,7-8 *',
+     datetime.datetime(1970, 9, 5, 3, 1),
+     False),
+
+    ('* * * * 0',
+     datetime.datetime(1970, 1, 4),
+     True),
+
+    ('* * * * 0',
+     datetime.datetime(1970, 1, 5),
+     False),
+
+    ('*/15 * * * *',
+     datetime.datetime(1970, 1, 1, 0, 45),
+     True),
+
+    ('*/15 * * * *',
+     datetime.datetime(1970, 1, 1, 0, 50),
+     False),
+
+    ('*/10 * * * * *',
+     datetime.datetime(1970, 1, 1, 0, 0, 20),
+     True),
+
+    ('*/10 * * * * *',
+     datetime.datetime(1970, 1, 1, 0, 0, 25),
+     False),
+
+    ('*/10 * * * * *',
+     datetime.datetime(1970, 1, 1, 0, 0, 20, 1),
+     False)
 ])
 def test_match(expr_str, t, success):
     expr = util.cron.parse(expr_str)
     result = util.cron.match(expr, t)
     assert result == success
+
+
+@pytest.mark.parametrize('expr_str, compiled', [
+    ('* * * * *', util.cron.CompiledExpr(minute=(1 << 60) - 1,
+                                         hour=(1 << 24) - 1,
+                                         day=((1 << 32) - 1) & ~1,
+                                         month=((1 << 13) - 1) & ~1,
+                                         day_of_week=(1 << 7) - 1)),
+
+    ('1 2-3 4,5 6,7-8 0', util.cron.CompiledExpr(
+        minute=0b10,
+        hour=0b1100,
+        day=0b110000,
+        month=0b111000000,
+        day_of_week=0b1))
+])
+def test_compile(expr_str, compiled):
+    expr = util.cron.parse(expr_str)
+    result = util.cron.compile(expr)
+    assert result == compiled
+
+
+@pytest.mark.parametrize('expr_str', [
+    '* * * * *',
+    '1 2-3 4,5 6,7-8 *',
+    '0,30 12 * * 1-5',
+    '0 0 29 2 *',
+    '*/13 * * * mon-fri',
+    '10-50/20 */3 * * * *'
+])
+def test_compiled_match(expr_str):
+    expr = util.cron.parse(expr_str)
+    compiled = util.cron.compile(expr)
+    t = datetime.datetime(2000, 1, 1)
+
+    for _ in range(100):
+        t_next = util.cron.next(expr, t)
+        assert util.cron.next(compiled, t) == t_next
+
+        for i in [t, t_next, t_next + datetime.timedelta(minutes=1)]:
+            assert (util.cron.match(compiled, i) ==
+                    util.cron.match(expr, i))
+
+        t = t_next
+
+
+def test_schedule_example():
+    schedule = util.cron.Schedule(datetime.datetime(2000, 1, 1))
+    job_id = schedule.add(util.cron.parse('0 * * * *'))
+
+    assert schedule.get_next() == datetime.datetime(2000, 1, 1, 1)
+    assert schedule.pop_due(datetime.datetime(2000, 1, 1, 0, 30)) == []
+    assert schedule.pop_due(datetime.datetime(2000, 1, 1, 1)) == [job_id]
+
+
+def test_schedule():
+    t = datetime.datetime(2000, 1, 1)
+    schedule = util.cron.Schedule(t)
+    assert len(schedule) == 0
+    assert schedule.get_next() is None
+    assert schedule.pop_due(t) == []
+
+    expr1 = util.cron.parse('0,10,20,30,40,50 * * * *')
+    expr2 = util.cron.parse('0 * * * *')
+
+    job_id_1 = schedule.add(expr1)
+    job_id_2 = schedule.add(util.cron.compile(expr1))
+    job_id_3 = schedule.add(expr2)
+    assert len(schedule) == 3
+    assert len({job_id_1, job_id_2, job_id_3}) == 3
+    assert schedule.get_next() == datetime.datetime(2000, 1, 1, 0, 10)
+
+    result = schedule.pop_due(datetime.datetime(2000, 1, 1, 0, 10))
+    assert result == [job_id_1, job_id_2]
+    assert schedule.get_next() == datetime.datetime(2000, 1, 1, 0, 20)
+
+    schedule.remove(job_id_1)
+    assert len(schedule) == 2
+
+    result = schedule.pop_due(datetime.datetime(2000, 1, 1, 0, 45))
+    assert result == [job_id_2]
+    assert schedule.get_next() == datetime.datetime(2000, 1, 1, 0, 50)
+
+    result = schedule.pop_due(datetime.datetime(2000, 1, 1, 1))
+    assert result == [job_id_2, job_id_3]
+
+    schedule.remove(job_id_2)
+    schedule.remove(job_id_2)
+    assert schedule.get_next() == datetime.datetime(2000, 1, 1, 2)
+
+    job_id_4 = schedule.add(expr1)
+    assert schedule.get_next() == datetime.datetime(2000, 1, 1, 1, 10)
+
+    result = schedule.pop_due(datetime.datetime(2000, 1, 1, 2))
+    assert result == [job_id_4, job_id_3]
+
+    schedule.remove(job_id_3)
+    schedule.remove(job_id_4)
+    assert len(schedule) == 0
+    assert schedule.get_next() is None
+
+
+def test_schedule_missed():
+    schedule = util.cron.Schedule(datetime.datetime(2000, 1, 1))
+    job_id = schedule.add(util.cron.parse('* * * * *'))
+
+    result = schedule.pop_due(datetime.datetime(2000, 1, 1, 1, 0, 30))
+    assert result == [job_id]
+    assert schedule.get_next() == datetime.datetime(2000, 1, 1, 1, 1)
+
+
+def test_schedule_remove_churn():
+    schedule = util.cron.Schedule(datetime.datetime(2000, 1, 1))
+    job_ids = [schedule.add(util.cron.parse(f'{i} * * * *'))
+               for i in range(60)]
+
+    for job_id in job_ids[:-1]:
+        schedule.remove(job_id)
+
+    assert len(schedule) == 1
+    assert schedule.get_next() == datetime.datetime(2000, 1, 1, 0, 59)
+    assert schedule.pop_due(datetime.datetime(2000, 1, 2)) == job_ids[-1:]
+
+
+@pytest.mark.parametrize('expr_str', [
+    '* * * * *',
+    '0,30 12 * * 1-5',
+    '15 3 1,15 2-4 *',
+    '0 0 29 2 *',
+    '*/15 */7 * * * sat,sun'
+])
+@pytest.mark.parametrize('tz', [
+    datetime.timezone.utc,
+    datetime.timezone(datetime.timedelta(hours=2)),
+    datetime.timezone(-datetime.timedelta(hours=5, minutes=30))
+])
+def test_match_many(expr_str, tz):
+    expr = util.cron.parse(expr_str)
+    start = int(datetime.datetime(1999, 12, 1, tzinfo=tz).timestamp())
+    timestamps = [*range(start, start + 100 * 86400, 595),
+                  start + 1,
+                  start + 0.5,
+                  float(start)]
+
+    result = util.cron.match_many(expr, timestamps, tz)
+    assert result == [
+        util.cron.match(expr, datetime.datetime.fromtimestamp(i, tz))
+        for i in timestamps]
+
+    numpy = pytest.importorskip('numpy')
+
+    result = util.cron.match_many(expr, numpy.array(timestamps[:-2]), tz)
+    assert list(result) == [
+        util.cron.match(expr, datetime.datetime.fromtimestamp(i, tz))
+        for i in timestamps[:-2]]
+
+    result = util.cron.match_many(expr, numpy.array(timestamps), tz)
+    assert list(result) == [
+        util.cron.match(expr, datetime.datetime.fromtimestamp(i, tz))
+        for i in timestamps]
+
+
+@pytest.mark.parametrize('expr_str, start, end, ts', [
+    ('0 * * * *',
+     datetime.datetime(2000, 1, 1),
+     datetime.datetime(2000, 1, 1, 3),
+     [datetime.datetime(2000, 1, 1, 0),
+      datetime.datetime(2000, 1, 1, 1),
+      datetime.datetime(2000, 1, 1, 2)]),
+
+    ('0 * * * *',
+     datetime.datetime(2000, 1, 1, 0, 0, 1),
+     datetime.datetime(2000, 1, 1, 3, 0, 1),
+     [datetime.datetime(2000, 1, 1, 1),
+      datetime.datetime(2000, 1, 1, 2),
+      datetime.datetime(2000, 1, 1, 3)]),
+
+    ('0 0 29 2 *',
+     datetime.datetime(2000, 1, 1),
+     datetime.datetime(2010, 1, 1),
+     [datetime.datetime(2000, 2, 29),
+      datetime.datetime(2004, 2, 29),
+      datetime.datetime(2008, 2, 29)]),
+
+    ('0 0 30 2 *',
+     datetime.datetime(2000, 1, 1),
+     datetime.datetime(2010, 1, 1),
+     [])
+])
+def test_iter_between(expr_str, start, end, ts):
+    expr = util.cron.parse(expr_str)
+    result = list(util.cron.iter_between(expr, start, end))
+    assert result == ts
+
+
+async def test_sleep_until():
+    t = datetime.datetime.now() + datetime.timedelta(seconds=0.1)
+
+    await util.cron.sleep_until(t)
+    assert time.time() >= t.timestamp() - 0.001
+
+
+async def test_sleep_until_concurrent():
+    now = datetime.datetime.now(datetime.timezone.utc)
+    ts = [now + datetime.timedelta(seconds=i * 0.05)
+          for i in reversed(range(5))]
+    result = []
+
+    async def sleep(t):
+        await util.cron.sleep_until(t)
+        result.append(t)
+
+    await asyncio.gather(*(sleep(t) for t in ts for _ in range(10)))
+    assert result == [t for t in reversed(ts) for _ in range(10)]
+
+
+async def test_sleep_until_cancel():
+    t1 = datetime.datetime.now() + datetime.timedelta(seconds=0.05)
+    t2 = t1 + datetime.timedelta(seconds=0.05)
+
+    task = asyncio.create_task(util.cron.sleep_until(t1))
+    await asyncio.sleep(0)
+    task.cancel()
+
+    await util.cron.sleep_until(t2)
+    assert task.cancelled()
+    assert time.time() >= t2.timestamp() - 0.001
+
+
+async def test_ticks():
+    expr = util.cron.parse('* * * * * *')
+    result = []
+
+    async for t in util.cron.ticks(expr, datetime.timezone.utc):
+        assert t.microsecond == 0
+        assert time.time() >= t.timestamp() - 0.001
+
+        result.append(t)
+        if len(result) > 2:
+            break
+
+    assert result[1] - result[0] == datetime.timedelta(seconds=1)
+    assert result[2] - result[1] == datetime.timedelta(seconds=1)
+
+
+async def test_run():
+    expr = util.cron.parse('* * * * * *')
+    queue = asyncio.Queue()
+
+    async def on_tick(t):
+        queue.put_nowait(t)
+        await asyncio.sleep(1.5)
+
+    task = asyncio.create_task(util.cron.run(expr, on_tick))
+
+    t1 = await queue.get()
+    t2 = await queue.get()
+    assert t2 - t1 == datetime.timedelta(seconds=2)
+
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
@@ -0,0 +1,215 @@
+import json
+import random
+
+import pytest
+
+from hat import util
+
+
+data = [
+    [],
+    [None, True, False, 0, -1, 123456789012345678901234567890, 1.5, -1e-10,
+     '', 'abc', 'čćž\u20ac\U0001f600', '\\"\n'],
+    [[], {}, [[1, [2, [3]]]], {'a': {'b': {'c': [1, {}]}}}],
+    [{'id': i, 'value': i * 0.5, 'name': f'item {i}'} for i in range(100)],
+    [str(i) * i for i in range(100)],
+]
+
+
+@pytest.mark.parametrize('value', data)
+@pytest.mark.parametrize('chunk_size', [1, 2, 7, 100, 100_000])
+@pytest.mark.parametrize('indent', [None, 2])
+def test_json_array_decoder(value, chunk_size, indent):
+    encoded = json.dumps(value, indent=indent, ensure_ascii=False).encode()
+    encoded = b' \n' + encoded + b'\r\t '
+    chunks = [encoded[i:i+chunk_size]
+              for i in range(0, len(encoded), chunk_size)]
+
+    decoder = util.JsonArrayDecoder()
+    assert not decoder.is_started
+
+    result = []
+    for chunk in chunks:
+        result.extend(decoder.feed(memoryview(chunk)))
+
+    assert decoder.is_started
+
+    result.extend(decoder.close())
+    assert decoder.is_done
+    assert result == value
+
+    assert list(util.decode_json_array(chunks)) == value
+
+
+def test_json_array_decoder_example():
+    decoder = util.JsonArrayDecoder()
+
+    assert decoder.feed(b'[1, {"a": ') == [1]
+    assert decoder.feed(b'2}, "x"') == [{'a': 2}]
+    assert decoder.feed(b']') == ['x']
+    assert decoder.close() == []
+
+
+def test_json_array_decoder_streaming():
+    decoder = util.JsonArrayDecoder()
+    item = {'x': 'y' * 1000}
+    encoded = json.dumps(item).encode()
+
+    assert decoder.feed(b'[') == []
+
+    for _ in range(100):
+        assert decoder.feed(encoded[:10]) == []
+        assert decoder.feed(encoded[10:] + b', ') == [item]
+        assert decoder._chunks_len < 10
+
+    assert decoder.feed(b'1]') == [1]
+    assert decoder.is_done
+
+
+def test_json_array_decoder_large_item():
+    decoder = util.JsonArrayDecoder(retry_size=100)
+    item = ['x' * 100] * 100
+    encoded = json.dumps(item).encode()
+    result = []
+
+    assert decoder.feed(b'[') == []
+
+    for i in range(0, len(encoded), 10):
+        result.extend(decoder.feed(encoded[i:i+10]))
+
+    result.extend(decoder.feed(b']'))
+    result.extend(decoder.close())
+    assert result == [item]
+
+
+def test_json_array_decoder_multi_mb_item():
+    decoder = util.JsonArrayDecoder()
+    item = {'x': 'x' * (4 * 1024 * 1024)}
+    encoded = json.dumps([item, 1]).encode()
+    chunk_size = 64
+    result = []
+
+    for i in range(0, len(encoded), chunk_size):
+        result.extend(decoder.feed(encoded[i:i+chunk_size]))
+
+    result.extend(decoder.close())
+    assert result == [item, 1]
+
+
+@pytest.mark.parametrize('encoded', [
+    b'',
+    b'[',
+    b'[1',
+    b'[1,',
+    b'[1,]',
+    b'[,1]',
+    b'[1 2]',
+    b'{}',
+    b'1',
+    b'[] []',
+    b'[tru]',
+    b'[{"a" 1}]',
+])
+def test_json_array_decoder_invalid(encoded):
+    decoder = util.JsonArrayDecoder()
+
+    with pytest.raises(ValueError):
+        decoder.feed(encoded)
+        decoder.close()
+
+
+@pytest.mark.parametrize('encoded', [
+    b'x',
+    b'[x',
+    b'[1, <html>',
+    b'[1, tx',
+    b'[nul1',
+    b'[1, }',
+])
+def test_json_array_decoder_invalid_feed(encoded):
+    decoder = util.JsonArrayDecoder()
+
+    with pytest.raises(ValueError):
+        decoder.feed(encoded)
+
+
+def test_json_array_decoder_max_item_size():
+    decoder = util.JsonArrayDecoder(max_item_size=1000)
+    assert decoder.feed(b'[{"a": "') == []
+
+    with pytest.raises(ValueError):
+        for _ in range(100):
+            decoder.feed(b'x' * 100)
+
+    decoder = util.JsonArrayDecoder(max_item_size=1000)
+    encoded = json.dumps(['x' * 500] * 10).encode()
+    assert decoder.feed(encoded) == ['x' * 500] * 10
+
+    decoder = util.JsonEventDecoder(max_item_size=1000)
+    encoded = json.dumps(['x' * 2000]).encode()
+
+    with pytest.raises(ValueError):
+        for i in range(0, len(encoded), 10):
+            decoder.feed(encoded[i:i+10])
+
+
+def test_json_event_decoder_example():
+    decoder = util.JsonEventDecoder()
+
+    assert decoder.feed(b'[{"a": [true]') == [
+        util.JsonEvent(util.JsonToken.ARR)]
+    assert decoder.feed(b'}]') == [
+        util.JsonEvent(util.JsonToken.OBJ),
+        util.JsonEvent(util.JsonToken.OBJ_KEY, 'a'),
+        util.JsonEvent(util.JsonToken.ARR),
+        util.JsonEvent(util.JsonToken.BOOL, True),
+        util.JsonEvent(util.JsonToken.ARR_END),
+        util.JsonEvent(util.JsonToken.OBJ_END),
+        util.JsonEvent(util.JsonToken.ARR_END)]
+    assert decoder.close() == []
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_json_event_decoder_random(seed):
+    rng = random.Random(seed)
+    value = data[1] + data[2]
+    encoded = json.dumps(value).encode()
+
+    decoder = util.JsonEventDecoder()
+    events = []
+    pos = 0
+    while pos < len(encoded):
+        size = rng.randint(1, 20)
+        events.extend(decoder.feed(encoded[pos:pos+size]))
+        pos += size
+    events.extend(decoder.close())
+
+    assert _decode_events(events) == value
+
+
+def _decode_events(events):
+    stack = [[]]
+    keys = []
+
+    def add(value):
+        if isinstance(stack[-1], dict):
+            stack[-1][keys.pop()] = value
+        else:
+            stack[-1].append(value)
+
+    for event in events:
+        if event.token in (util.JsonToken.ARR, util.JsonToken.OBJ):
+            stack.append([] if event.token == util.JsonToken.ARR else {})
+
+        elif event.token in (util.JsonToken.ARR_END,
+                             util.JsonToken.OBJ_END):
+            value = stack.pop()
+            add(value)
+
+        elif event.token == util.JsonToken.OBJ_KEY:
+            keys.append(event.value)
+
+        else:
+            add(event.value)
+
+    return stack[0][0]
@@ -0,0 +1,131 @@
+import asyncio
+import sys
+import threading
+
+import pytest
+
+from hat import util
+
+
+pytestmark = pytest.mark.perf
+
+
+@pytest.fixture(params=['BytesBuffer', 'RingBuffer'])
+def buffer_cls(request):
+    if request.param == 'BytesBuffer':
+        return util.BytesBuffer
+
+    return lambda: util.RingBuffer(1024 * 1024)
+
+
+@pytest.mark.parametrize('chunk_size', [1, 10, 100])
+@pytest.mark.parametrize('read_size', [10, 50])
+def test_small_reads(duration, buffer_cls, chunk_size, read_size):
+    count = 100_000
+    chunk = b'x' * chunk_size
+    buff = buffer_cls()
+
+    with duration(f'{buff.__class__.__name__}: {count} x add {chunk_size}B '
+                  f'+ read {read_size}B'):
+        for _ in range(count):
+            buff.add(chunk)
+
+            while len(buff) >= read_size:
+                buff.read(read_size)
+
+
+@pytest.mark.parametrize('coalesce_size', [0, 64])
+@pytest.mark.parametrize('chunk_size', [1, 8])
+def test_coalesce(duration, coalesce_size, chunk_size):
+    count = 100_000
+    read_size = 4096
+    chunk = b'x' * chunk_size
+    buff = util.BytesBuffer(coalesce_size=coalesce_size)
+
+    with duration(f'coalesce_size {coalesce_size}: {count} x add '
+                  f'{chunk_size}B'):
+        for _ in range(count):
+            buff.add(chunk)
+
+    chunk_count = buff.stats.chunk_count
+
+    with duration(f'coalesce_size {coalesce_size}: read {chunk_count} '
+                  f'chunks ({len(buff)}B) in {read_size}B reads'):
+        while buff:
+            buff.read(read_size)
+
+
+@pytest.mark.parametrize('chunk_size', [16, 64 * 20_000])
+def test_readuntil(duration, chunk_size):
+    count = 20_000
+    data = (b'x' * 63 + b'\n') * count
+    buff = util.BytesBuffer()
+
+    for i in range(0, len(data), chunk_size):
+        buff.add(data[i:i+chunk_size])
+
+    with duration(f'readuntil: {count} x 64B lines in {chunk_size}B '
+                  f'chunks'):
+        for _ in range(count):
+            buff.readuntil(b'\n')
+
+    assert not buff
+
+
+def _get_gil_label():
+    is_gil_enabled = getattr(sys, '_is_gil_enabled', lambda: True)
+    return 'GIL' if is_gil_enabled() else 'free-threaded'
+
+
+@pytest.mark.parametrize('chunk_size', [10, 1000])
+async def test_spsc_threads(duration, chunk_size):
+    loop = asyncio.get_running_loop()
+    count = 100_000
+    chunk = b'x' * chunk_size
+    buff = util.SpscBytesBuffer()
+
+    def produce():
+        for _ in range(count):
+            buff.add(chunk)
+
+    with duration(f'SpscBytesBuffer ({_get_gil_label()}): {count} x '
+                  f'{chunk_size}B from thread'):
+        producer = loop.run_in_executor(None, produce)
+        read_len = 0
+
+        while read_len < count * chunk_size:
+            await buff.wait()
+            read_len += sum(len(i) for i in buff.read_views())
+
+        await producer
+
+
+@pytest.mark.parametrize('chunk_size', [10, 1000])
+async def test_locked_threads(duration, chunk_size):
+    loop = asyncio.get_running_loop()
+    count = 100_000
+    chunk = b'x' * chunk_size
+    buff = util.BytesBuffer()
+    lock = threading.Lock()
+    event = asyncio.Event()
+
+    def produce():
+        for _ in range(count):
+            with lock:
+                buff.add(chunk)
+
+            loop.call_soon_threadsafe(event.set)
+
+    with duration(f'BytesBuffer + Lock ({_get_gil_label()}): {count} x '
+                  f'{chunk_size}B from thread'):
+        producer = loop.run_in_executor(None, produce)
+        read_len = 0
+
+        while read_len < count * chunk_size:
+            await event.wait()
+            event.clear()
+
+            with lock:
+                read_len += sum(len(i) for i in buff.read_views())
+
+        await producer
@@ -0,0 +1,61 @@
+import tracemalloc
+
+import pytest
+
+from hat import util
+
+
+pytestmark = pytest.mark.perf
+
+
+@pytest.fixture(params=['dict', 'BytesMap'])
+def map_cls(request):
+    if request.param == 'dict':
+        return dict
+
+    return util.BytesMap
+
+
+def _get_memory(duration, map_cls, count, key_size):
+    tracemalloc.start()
+    try:
+        keys = [i.to_bytes(key_size, 'big') for i in range(count)]
+
+        with duration(f'{map_cls.__name__}: {count} x set {key_size}B'):
+            m = map_cls()
+            for key in keys:
+                m[key] = None
+
+        del keys
+        size, _ = tracemalloc.get_traced_memory()
+
+    finally:
+        tracemalloc.stop()
+
+    return size
+
+
+@pytest.mark.parametrize('key_size', [4, 32])
+def test_memory(duration, key_size):
+    if util.BytesMap is util.bytes._PyBytesMap:
+        pytest.skip('C extension not available')
+
+    count = 100_000
+    dict_size = _get_memory(duration, dict, count, key_size)
+    map_size = _get_memory(duration, util.BytesMap, count, key_size)
+
+    assert map_size < dict_size
+
+
+@pytest.mark.parametrize('key_type', [bytes, memoryview])
+def test_lookup(duration, map_cls, key_type):
+    count = 100_000
+    keys = [key_type(i.to_bytes(8, 'big')) for i in range(count)]
+    m = map_cls((bytes(key), None) for key in keys)
+
+    if map_cls is dict and key_type is memoryview:
+        keys = [bytes(key) for key in keys]
+
+    with duration(f'{map_cls.__name__}: {count} x get {key_type.__name__}'):
+        for key in keys:
+            m[key]
@@ -0,0 +1,165 @@
+import asyncio
+import random
+
+import pytest
+
+from hat import util
+
+
+pytestmark = pytest.mark.perf
+
+
+@pytest.mark.parametrize('cb_count', [100, 10_000, 50_000])
+def test_register_cancel(duration, cb_count):
+    registry = util.CallbackRegistry()
+    cbs = [lambda: None for _ in range(cb_count)]
+
+    with duration(f'register {cb_count} callbacks'):
+        handles = [registry.register(cb) for cb in cbs]
+
+    random.shuffle(handles)
+
+    with duration(f'cancel {cb_count} callbacks (random order)'):
+        for handle in handles:
+            handle.cancel()
+
+
+@pytest.mark.parametrize('cb_count', [1, 100, 10_000])
+def test_notify(duration, cb_count):
+    registry = util.CallbackRegistry()
+    notify_count = 1_000_000 // cb_count
+
+    for _ in range(cb_count):
+        registry.register(lambda x: None)
+
+    with duration(f'notify {notify_count} x {cb_count} callbacks'):
+        for i in range(notify_count):
+            registry.notify(i)
+
+
+@pytest.mark.parametrize('cb_count', [100, 10_000])
+def test_notify_churn(duration, cb_count):
+    registry = util.CallbackRegistry()
+    notify_count = 100_000 // cb_count
+    handles = [registry.register(lambda x: None) for _ in range(cb_count)]
+
+    with duration(f'notify {notify_count} x {cb_count} callbacks '
+                  f'with register/cancel between notifications'):
+        for i in range(notify_count):
+            handles.pop(0).cancel()
+            handles.append(registry.register(lambda x: None))
+            registry.notify(i)
+
+
+@pytest.mark.parametrize('cb_count', [1, 100])
+async def test_notify_batch(duration, cb_count):
+    event_count = 100_000
+    registry = util.CallbackRegistry()
+    batch_registry = util.BatchCallbackRegistry()
+
+    for _ in range(cb_count):
+        registry.register(lambda x: None)
+        batch_registry.register(lambda batch: None)
+
+    with duration(f'notify {event_count} events to {cb_count} callbacks'):
+        for i in range(event_count):
+            registry.notify(i)
+
+    with duration(f'notify {event_count} events to {cb_count} callbacks '
+                  f'(batched)'):
+        for i in range(event_count):
+            batch_registry.notify(i)
+
+        batch_registry.flush()
+
+
+@pytest.mark.parametrize('concurrency_limit', [None, 10])
+async def test_notify_async(duration, concurrency_limit):
+    cb_count = 1000
+    notify_count = 100
+    registry = util.CallbackRegistry(concurrency_limit=concurrency_limit)
+
+    async def cb(x):
+        await asyncio.sleep(0)
+
+    for _ in range(cb_count):
+        registry.register(cb)
+
+    with duration(f'notify_async {notify_count} x {cb_count} coroutine '
+                  f'callbacks (concurrency limit {concurrency_limit})'):
+        for i in range(notify_count):
+            await registry.notify_async(i)
+
+
+@pytest.mark.parametrize('cb_count', [100, 10_000])
+def test_notify_topic(duration, cb_count):
+    notify_count = 1_000_000 // cb_count
+    registry = util.CallbackRegistry()
+    topic_registry = util.TopicCallbackRegistry()
+
+    for i in range(cb_count):
+        topic = ('data', str(i % 100), str(i))
+
+        def cb(t, value, topic=topic):
+            if t != topic:
+                return
+
+        registry.register(cb)
+        topic_registry.register(topic, lambda value: None)
+
+    with duration(f'notify {notify_count} x {cb_count} filtering '
+                  f'callbacks'):
+        for i in range(notify_count):
+            registry.notify(('data', '1', '1'), i)
+
+    with duration(f'notify {notify_count} x topic with {cb_count} '
+                  f'subscribers'):
+        for i in range(notify_count):
+            topic_registry.notify(('data', '1', '1'), i)
+
+
+@pytest.mark.parametrize('stats_enabled', [False, True])
+def test_notify_stats(duration, stats_enabled):
+    cb_count = 100
+    notify_count = 10_000
+    registry = util.CallbackRegistry(stats_enabled=stats_enabled)
+
+    for _ in range(cb_count):
+        registry.register(lambda x: None)
+
+    with duration(f'notify {notify_count} x {cb_count} callbacks '
+                  f'(stats enabled: {stats_enabled})'):
+        for i in range(notify_count):
+            registry.notify(i)
+
+
+@pytest.mark.parametrize('weak', [False, True])
+def test_notify_weak(duration, weak):
+    cb_count = 10_000
+    notify_count = 100
+
+    class Subscriber:
+
+        def on_event(self, value):
+            pass
+
+    registry = util.CallbackRegistry()
+    subscribers = [Subscriber() for _ in range(cb_count)]
+
+    for subscriber in subscribers:
+        registry.register(subscriber.on_event, weak=weak)
+
+    with duration(f'notify {notify_count} x {cb_count} callbacks '
+                  f'(weak: {weak})'):
+        for i in range(notify_count):
+            registry.notify(i)
+
+    if not weak:
+        return
+
+    del subscribers[::2]
+
+    with duration(f'notify {notify_count} x {cb_count} callbacks '
+                  f'(weak: {weak}, half dead)'):
+        for i in range(notify_count):
+            registry.notify(i)
@@ -0,0 +1,61 @@
+import json
+
+import pytest
+
+from hat import util
+
+
+pytestmark = pytest.mark.perf
+
+
+@pytest.fixture(scope='module')
+def encoded():
+    data = [{'id': i,
+             'timestamp': 1_700_000_000 + i * 0.001,
+             'name': f'event {i}',
+             'tags': ['a', 'b', 'c'],
+             'payload': {'value': i * 0.5, 'valid': i % 2 == 0}}
+            for i in range(100_000)]
+    return json.dumps(data).encode()
+
+
+def test_json_loads(duration, encoded):
+    with duration(f'json.loads: {len(encoded)}B'):
+        json.loads(encoded)
+
+
+@pytest.mark.parametrize('chunk_size', [1024, 64 * 1024])
+def test_decode_json_array(duration, encoded, chunk_size):
+    chunks = [memoryview(encoded)[i:i+chunk_size]
+              for i in range(0, len(encoded), chunk_size)]
+
+    with duration(f'decode_json_array: {len(encoded)}B in {chunk_size}B '
+                  f'chunks'):
+        for _ in util.decode_json_array(chunks):
+            pass
+
+
+@pytest.mark.parametrize('chunk_size', [64 * 1024])
+def test_json_event_decoder(duration, encoded, chunk_size):
+    decoder = util.JsonEventDecoder()
+
+    with duration(f'JsonEventDecoder: {len(encoded)}B in {chunk_size}B '
+                  f'chunks'):
+        for i in range(0, len(encoded), chunk_size):
+            decoder.feed(encoded[i:i+chunk_size])
+
+        decoder.close()
+
+
+@pytest.mark.parametrize('item_size', [1024 * 1024, 4 * 1024 * 1024])
+def test_large_item(duration, item_size):
+    chunk_size = 64
+    encoded = json.dumps([{'x': 'x' * item_size}]).encode()
+    decoder = util.JsonArrayDecoder()
+
+    with duration(f'JsonArrayDecoder: {item_size}B item in {chunk_size}B '
+                  f'chunks'):
+        for i in range(0, len(encoded), chunk_size):
+            decoder.feed(encoded[i:i+chunk_size])
+
+        decoder.close()
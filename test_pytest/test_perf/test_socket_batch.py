@@ -0,0 +1,58 @@
+import contextlib
+import socket
+
+import pytest
+
+from hat import util
+
+
+pytestmark = pytest.mark.perf
+
+
+def _send_single(sock, msgs):
+    for data, addr in msgs:
+        sock.sendto(data, addr)
+
+
+def _recv_single(sock):
+    return [sock.recvfrom(2048)]
+
+
+def _send_batch(sock, msgs):
+    util.socket_send_batch(sock, msgs)
+
+
+def _recv_batch(sock):
+    return util.socket_recv_batch(sock, 2048)
+
+
+@pytest.fixture
+def udp_pair():
+    with contextlib.ExitStack() as stack:
+        socks = []
+        for _ in range(2):
+            sock = stack.enter_context(
+                socket.socket(type=socket.SOCK_DGRAM))
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF,
+                            4 * 1024 * 1024)
+            sock.bind(('127.0.0.1', 0))
+            socks.append(sock)
+
+        yield socks
+
+
+@pytest.mark.parametrize('send, recv', [(_send_single, _recv_single),
+                                        (_send_batch, _recv_batch)])
+def test_send_recv(duration, udp_pair, send, recv):
+    count = 100_000
+    batch_size = 64
+    a, b = udp_pair
+    msgs = [(b'x' * 100, b.getsockname())] * batch_size
+
+    with duration(f'{send.__name__} + {recv.__name__}: {count} x 100B'):
+        for _ in range(count // batch_size):
+            send(a, msgs)
+
+            received = 0
+            while received < batch_size:
+                received += len(recv(b))
@@ -0,0 +1,51 @@
+import contextlib
+import datetime
+import sqlite3
+
+import pytest
+
+from hat import util
+
+
+pytestmark = pytest.mark.perf
+
+
+@pytest.fixture
+def rows():
+    t = datetime.datetime.now(datetime.timezone.utc)
+    return [(t + datetime.timedelta(seconds=i), i * 0.5)
+            for i in range(10_000)]
+
+
+def test_insert_per_row_commit(duration, tmp_path, rows):
+    sqlite3.register_adapter(datetime.datetime, util.sqlite3_adapt_datetime)
+
+    with contextlib.closing(sqlite3.connect(tmp_path / 'test.db')) as conn:
+        conn.execute("CREATE TABLE data (t TIMESTAMP, value REAL)")
+
+        with duration(f'sqlite3.connect: insert {len(rows)} rows '
+                      f'(commit per row)'):
+            for row in rows:
+                conn.execute("INSERT INTO data VALUES (?, ?)", row)
+                conn.commit()
+
+
+@pytest.mark.parametrize('integer_timestamp', [False, True])
+@pytest.mark.parametrize('chunk_size', [1, 100, 10_000])
+def test_insert_many(duration, tmp_path, rows, integer_timestamp,
+                     chunk_size):
+    util.sqlite3_register_timestamp(integer=integer_timestamp)
+    conn = util.sqlite3_connect(tmp_path / 'test.db')
+    column_type = 'TIMESTAMP_US' if integer_timestamp else 'TIMESTAMP'
+
+    try:
+        conn.execute(f"CREATE TABLE data (t {column_type}, value REAL)")
+
+        with duration(f'sqlite3_connect: insert {len(rows)} rows '
+                      f'({column_type}, chunk size {chunk_size})'):
+            util.sqlite3_insert_many(conn, "INSERT INTO data VALUES (?, ?)",
+                                     rows, chunk_size)
+
+    finally:
+        conn.close()
+        util.sqlite3_register_timestamp()
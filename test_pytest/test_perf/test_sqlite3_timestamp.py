@@ -0,0 +1,77 @@
+import datetime
+import sqlite3
+
+import pytest
+
+from hat import util
+
+
+pytestmark = pytest.mark.perf
+
+
+@pytest.mark.parametrize('tz', [
+    None,
+    datetime.timezone.utc,
+    datetime.timezone(datetime.timedelta(hours=1, minutes=2))])
+@pytest.mark.parametrize('convert', [
+    util.sqlite3_convert_timestamp,
+    util.sqlite3._convert_timestamp])
+def test_convert(duration, tz, convert):
+    count = 100_000
+    t = datetime.datetime(2000, 1, 2, 3, 4, 5, 123456, tzinfo=tz)
+    val = util.sqlite3_adapt_datetime(t).encode()
+
+    with duration(f'{convert.__name__}: {count} x {val}'):
+        for _ in range(count):
+            convert(val)
+
+
+@pytest.mark.parametrize('row_count', [10_000, 1_000_000])
+def test_select(duration, row_count):
+    sqlite3.register_adapter(datetime.datetime, util.sqlite3_adapt_datetime)
+    sqlite3.register_converter("timestamp", util.sqlite3_convert_timestamp)
+
+    t = datetime.datetime.now(datetime.timezone.utc)
+
+    with sqlite3.connect(':memory:',
+                         detect_types=sqlite3.PARSE_DECLTYPES) as conn:
+        conn.execute("CREATE TABLE test (t TIMESTAMP)")
+        conn.executemany("INSERT INTO test VALUES (?)",
+                         ((t, ) for _ in range(row_count)))
+
+        with duration(f'select {row_count} timestamps'):
+            for _ in conn.execute("SELECT t FROM test"):
+                pass
+
+
+@pytest.mark.parametrize('column_type', ['TIMESTAMP', 'TIMESTAMP_US'])
+def test_storage(duration, column_type):
+    row_count = 100_000
+    integer = column_type == 'TIMESTAMP_US'
+    util.sqlite3_register_timestamp(integer=integer)
+
+    t = datetime.datetime.now(datetime.timezone.utc)
+    ts = [t + datetime.timedelta(seconds=i) for i in range(row_count)]
+
+    try:
+        with sqlite3.connect(':memory:',
+                             detect_types=sqlite3.PARSE_DECLTYPES) as conn:
+            conn.execute(f"CREATE TABLE test (t {column_type})")
+            conn.execute("CREATE INDEX test_t ON test (t)")
+
+            with duration(f'{column_type}: insert {row_count} timestamps'):
+                conn.executemany("INSERT INTO test VALUES (?)",
+                                 ((i, ) for i in ts))
+
+            with duration(f'{column_type}: select {row_count} timestamps'):
+                for _ in conn.execute("SELECT t FROM test"):
+                    pass
+
+            with duration(f'{column_type}: 1000 range queries'):
+                for i in range(1000):
+                    conn.execute("SELECT count(*) FROM test "
+                                 "WHERE t >= ? AND t < ?",
+                                 (ts[i * 50], ts[i * 50 + 100])).fetchone()
+
+    finally:
+        util.sqlite3_register_timestamp()
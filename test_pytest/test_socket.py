@@ -1,3 +1,10 @@
+import contextlib
+import signal
+import socket
+import time
+
+import pytest
+
 from hat import util
 
 
@@ -11,3 +18,147 @@ def test_get_unused_udp_port():
     port = util.get_unused_udp_port()
     assert isinstance(port, int)
     assert 0 < port <= 0xFFFF
+
+
+@pytest.fixture(params=['py', 'c'])
+def socket_impl(request, monkeypatch):
+    if request.param == 'py':
+        monkeypatch.setattr(util.socket, '_socket', None)
+
+    else:
+        pytest.importorskip('hat.util._socket')
+
+
+@pytest.fixture
+def udp_pair():
+    with contextlib.ExitStack() as stack:
+        socks = []
+        for _ in range(2):
+            sock = stack.enter_context(
+                socket.socket(type=socket.SOCK_DGRAM))
+            sock.bind(('127.0.0.1', 0))
+            socks.append(sock)
+
+        yield socks
+
+
+def test_socket_sendv_recvv():
+    a, b = socket.socketpair()
+
+    with a, b:
+        assert util.socket_sendv(a, [b'12', bytearray(b'345'), b'']) == 5
+
+        buffers = [bytearray(2), bytearray(1), bytearray(5)]
+        assert util.socket_recvv(b, buffers) == 5
+        assert buffers == [b'12', b'3', b'45\x00\x00\x00']
+
+
+def test_socket_batch(socket_impl, udp_pair):
+    a, b = udp_pair
+    b_addr = b.getsockname()
+    msgs = [(bytes([i]) * i, b_addr) for i in range(100)]
+
+    assert util.socket_send_batch(a, []) == 0
+    assert util.socket_send_batch(a, msgs) == len(msgs)
+
+    received = []
+    while len(received) < len(msgs):
+        received.extend(util.socket_recv_batch(b, 1024, max_count=30))
+
+    assert [data for data, _ in received] == [data for data, _ in msgs]
+    assert all(addr == a.getsockname() for _, addr in received)
+
+
+def test_socket_recv_batch_truncate(socket_impl, udp_pair):
+    a, b = udp_pair
+    a.sendto(b'123', b.getsockname())
+
+    result = util.socket_recv_batch(b, 2)
+    assert result == [(b'12', a.getsockname())]
+
+
+def test_socket_recv_batch_non_blocking(socket_impl, udp_pair):
+    a, b = udp_pair
+    b.setblocking(False)
+
+    with pytest.raises(BlockingIOError):
+        util.socket_recv_batch(b, 1024)
+
+    util.socket_send_batch(a, [(b'1', b.getsockname()),
+                               (b'2', b.getsockname())])
+    time.sleep(0.01)
+
+    result = util.socket_recv_batch(b, 1024)
+    assert [data for data, _ in result] == [b'1', b'2']
+
+    with pytest.raises(BlockingIOError):
+        util.socket_recv_batch(b, 1024)
+
+
+def test_socket_recv_batch_bytes_buffer(socket_impl, udp_pair):
+    a, b = udp_pair
+    buff = util.BytesBuffer()
+
+    a.sendto(b'123', b.getsockname())
+    for data, _ in util.socket_recv_batch(b, 1024):
+        buff.add(data)
+
+    assert bytes(buff.read()) == b'123'
+
+
+def test_socket_recv_batch_timeout(socket_impl, udp_pair):
+    a, b = udp_pair
+    b.settimeout(0.5)
+
+    for i in range(3):
+        a.sendto(bytes([i]), b.getsockname())
+    time.sleep(0.01)
+
+    start = time.monotonic()
+    result = util.socket_recv_batch(b, 1024)
+    assert time.monotonic() - start < 0.4
+    assert [data for data, _ in result] == [b'\x00', b'\x01', b'\x02']
+
+    with pytest.raises(TimeoutError):
+        util.socket_recv_batch(b, 1024)
+
+
+def test_socket_send_batch_host_name(socket_impl, udp_pair):
+    a, b = udp_pair
+    port = b.getsockname()[1]
+
+    count = util.socket_send_batch(a, [(b'1', ('localhost', port)),
+                                       (b'2', ('127.0.0.1', port))])
+    assert count == 2
+
+    result = util.socket_recv_batch(b, 1024)
+    while len(result) < 2:
+        result.extend(util.socket_recv_batch(b, 1024))
+    assert [data for data, _ in result] == [b'1', b'2']
+
+    with pytest.raises(OverflowError):
+        util.socket_send_batch(a, [(b'1', ('127.0.0.1', 0x10000))])
+
+
+@pytest.mark.skipif(not hasattr(signal, 'setitimer'),
+                    reason='setitimer not available')
+def test_socket_recv_batch_interrupted(socket_impl, udp_pair):
+    a, b = udp_pair
+    interrupts = []
+
+    def on_signal(signum, frame):
+        interrupts.append(signum)
+        a.sendto(b'x', b.getsockname())
+
+    handler = signal.signal(signal.SIGALRM, on_signal)
+
+    try:
+        signal.setitimer(signal.ITIMER_REAL, 0.05)
+        result = util.socket_recv_batch(b, 1024)
+
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, handler)
+
+    assert interrupts == [signal.SIGALRM]
+    assert [data for data, _ in result] == [b'x']
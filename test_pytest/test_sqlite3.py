@@ -1,4 +1,5 @@
 import datetime
+import itertools
 import sqlite3
 
 import pytest
@@ -34,3 +35,220 @@ def test_sqlite3_timestamp_converter(t):
 
         result = conn.execute("SELECT t FROM test").fetchone()[0]
         assert result == t
+
+
+@pytest.mark.parametrize("val", [
+    b"2000-01-02 03:04:05",
+    b"2000-01-02 03:04:05.1",
+    b"2000-01-02 03:04:05.123",
+    b"2000-01-02 03:04:05.123456",
+    b"2000-01-02 03:04:05.1234567",
+    b"2000-01-02 03:04:05+00:00",
+    b"2000-01-02 03:04:05.12+01:02",
+    b"2000-01-02 03:04:05.123456-01:02",
+    b"2000-01-02 23:59:59.999999-23:59",
+])
+def test_sqlite3_convert_timestamp_fallback(val):
+    result = util.sqlite3_convert_timestamp(val)
+    expected = util.sqlite3._convert_timestamp(val)
+
+    assert result == expected
+    assert result.tzinfo == expected.tzinfo
+
+
+@pytest.mark.parametrize("t", [
+    datetime.datetime.now(),
+    datetime.datetime(1, 1, 1),
+    datetime.datetime(1969, 12, 31, 23, 59, 59, 999999),
+    datetime.datetime(2000, 1, 2, 3, 4, 5, 123456),
+    datetime.datetime(4000, 1, 1),
+    datetime.datetime(2000, 1, 2, 3, 4, 5, 123456,
+                      tzinfo=datetime.timezone.utc),
+    datetime.datetime(2000, 1, 2, 3, 4, 5, 123456,
+                      tzinfo=datetime.timezone(
+                          datetime.timedelta(hours=5, minutes=45))),
+    datetime.datetime(1900, 1, 2, 3, 4, 5, 123456,
+                      tzinfo=datetime.timezone(
+                          -datetime.timedelta(hours=15, minutes=45)))
+])
+def test_sqlite3_timestamp_us(t):
+    val = util.sqlite3_adapt_datetime_us(t)
+    assert isinstance(val, int)
+    assert -2**63 <= val < 2**63
+
+    result = util.sqlite3_convert_timestamp_us(str(val).encode())
+    assert result == t
+    assert result.utcoffset() == t.utcoffset()
+
+
+def test_sqlite3_timestamp_us_order():
+    t = datetime.datetime(2000, 1, 1, tzinfo=datetime.timezone.utc)
+    tz = datetime.timezone(datetime.timedelta(hours=2))
+    ts = [t + datetime.timedelta(microseconds=i * 1000) for i in range(10)]
+    ts = [(i if n % 2 else i.astimezone(tz)) for n, i in enumerate(ts)]
+
+    vals = [util.sqlite3_adapt_datetime_us(i) for i in ts]
+    assert vals == sorted(vals)
+
+
+@pytest.mark.parametrize("offset", [
+    datetime.timedelta(minutes=1),
+    datetime.timedelta(hours=16),
+    datetime.timedelta(hours=-16),
+])
+def test_sqlite3_timestamp_us_invalid_offset(offset):
+    t = datetime.datetime(2000, 1, 1, tzinfo=datetime.timezone(offset))
+
+    with pytest.raises(ValueError):
+        util.sqlite3_adapt_datetime_us(t)
+
+
+def test_sqlite3_timestamp_us_text():
+    val = b"2000-01-02 03:04:05.123456+01:00"
+    result = util.sqlite3_convert_timestamp_us(val)
+    assert result == util.sqlite3_convert_timestamp(val)
+
+
+def test_sqlite3_register_timestamp():
+    t = datetime.datetime(2000, 1, 2, 3, 4, 5, 123456,
+                          tzinfo=datetime.timezone.utc)
+
+    util.sqlite3_register_timestamp(integer=True)
+
+    try:
+        with sqlite3.connect(':memory:',
+                             isolation_level=None,
+                             detect_types=sqlite3.PARSE_DECLTYPES) as conn:
+            conn.execute("CREATE TABLE test (t TIMESTAMP_US)")
+            conn.execute("INSERT INTO test VALUES (?)", (t, ))
+
+            result = conn.execute("SELECT typeof(t), t FROM test").fetchone()
+            assert result == ('integer', t)
+
+    finally:
+        util.sqlite3_register_timestamp()
+
+    with sqlite3.connect(':memory:',
+                         isolation_level=None,
+                         detect_types=sqlite3.PARSE_DECLTYPES) as conn:
+        conn.execute("CREATE TABLE test (t TIMESTAMP)")
+        conn.execute("INSERT INTO test VALUES (?)", (t, ))
+
+        result = conn.execute("SELECT typeof(t), t FROM test").fetchone()
+        assert result == ('text', t)
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 100])
+def test_sqlite3_migrate_timestamp_us(chunk_size):
+    ts = [datetime.datetime(2000, 1, 1, i, 2, 3, 4) for i in range(10)]
+    ts[3] = ts[3].replace(tzinfo=datetime.timezone.utc)
+
+    with sqlite3.connect(':memory:',
+                         detect_types=sqlite3.PARSE_COLNAMES) as conn:
+        conn.execute('CREATE TABLE "test ""x""" (id INTEGER, t TIMESTAMP)')
+        conn.executemany('INSERT INTO "test ""x""" VALUES (?, ?)',
+                         enumerate(ts))
+        conn.execute('INSERT INTO "test ""x""" VALUES (?, ?)', (10, None))
+        conn.commit()
+
+        count = util.sqlite3_migrate_timestamp_us(conn, 'test "x"', 't',
+                                                  chunk_size)
+        assert count == len(ts)
+
+        count = util.sqlite3_migrate_timestamp_us(conn, 'test "x"', 't',
+                                                  chunk_size)
+        assert count == 0
+
+        result = conn.execute('SELECT typeof(t), t AS "t [timestamp_us]" '
+                              'FROM "test ""x""" ORDER BY id').fetchall()
+        assert result == [*(('integer', t) for t in ts), ('null', None)]
+
+
+def test_sqlite3_connect(tmp_path):
+    t = datetime.datetime(2000, 1, 2, 3, 4, 5, 123456,
+                          tzinfo=datetime.timezone.utc)
+    util.sqlite3_register_timestamp()
+    conn = util.sqlite3_connect(tmp_path / 'test.db')
+
+    try:
+        assert conn.execute("PRAGMA journal_mode").fetchone() == ('wal', )
+        assert conn.execute("PRAGMA synchronous").fetchone() == (1, )
+        assert conn.execute("PRAGMA cache_size").fetchone() == (-65536, )
+
+        conn.execute("CREATE TABLE test (t TIMESTAMP)")
+        conn.execute("INSERT INTO test VALUES (?)", (t, ))
+        conn.commit()
+
+        result = conn.execute("SELECT t, t AS \"x [timestamp]\" "
+                              "FROM test").fetchone()
+        assert result == (t, t)
+
+    finally:
+        conn.close()
+
+    conn = util.sqlite3_connect(tmp_path / 'test.db',
+                                journal_mode='DELETE',
+                                synchronous='FULL',
+                                isolation_level=None)
+
+    try:
+        assert conn.isolation_level is None
+        assert conn.execute("PRAGMA journal_mode").fetchone() == ('delete', )
+        assert conn.execute("PRAGMA synchronous").fetchone() == (2, )
+
+    finally:
+        conn.close()
+
+
+@pytest.mark.parametrize("isolation_level", [None, 'DEFERRED'])
+@pytest.mark.parametrize("chunk_size", [1, 3, 100])
+def test_sqlite3_insert_many(tmp_path, isolation_level, chunk_size):
+    conn = util.sqlite3_connect(tmp_path / 'test.db',
+                                isolation_level=isolation_level)
+
+    try:
+        conn.execute("CREATE TABLE test (x INTEGER PRIMARY KEY)")
+
+        count = util.sqlite3_insert_many(conn, "INSERT INTO test VALUES (?)",
+                                         ((i, ) for i in range(10)),
+                                         chunk_size)
+        assert count == 10
+        assert not conn.in_transaction
+
+        rows = ((i, ) for i in range(10, 20) if i != 15)
+        rows = itertools.chain(rows, [(10, )])
+
+        with pytest.raises(sqlite3.IntegrityError):
+            util.sqlite3_insert_many(conn, "INSERT INTO test VALUES (?)",
+                                     rows, chunk_size)
+        assert not conn.in_transaction
+
+        result = conn.execute("SELECT count(*) FROM test").fetchone()[0]
+        assert result == 10 + (9 // chunk_size) * chunk_size
+
+    finally:
+        conn.close()
+
+
+def test_sqlite3_insert_many_open_transaction(tmp_path):
+    conn = util.sqlite3_connect(tmp_path / 'test.db')
+
+    try:
+        conn.execute("CREATE TABLE test (x INTEGER PRIMARY KEY)")
+        conn.commit()
+
+        conn.execute("INSERT INTO test VALUES (-1)")
+        assert conn.in_transaction
+
+        count = util.sqlite3_insert_many(conn, "INSERT INTO test VALUES (?)",
+                                         ((i, ) for i in range(10)), 3)
+        assert count == 10
+        assert conn.in_transaction
+
+        conn.rollback()
+
+        result = conn.execute("SELECT count(*) FROM test").fetchone()[0]
+        assert result == 0
+
+    finally:
+        conn.close()